@@ -1,26 +1,71 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, g, render_template, request, jsonify
 import numpy as np
+import asyncio
+import hmac
+import json
 import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Define directories
 PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))
 MODEL_DIR = os.path.abspath(os.path.join(PROJECT_ROOT, "models"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src"))
 
-# Load model weights
-def load_model():
-    model_path = os.path.join(MODEL_DIR, "nn_weights.npy")
-    if not os.path.exists(model_path):
-        raise FileNotFoundError(f"Model weights file not found at {model_path}")
-    weights = np.load(model_path, allow_pickle=True).item()
-    return weights
+from serving.ensemble import describe, input_dtype, input_width, is_ensemble, member_predictions, summarize
+from serving.features import build_feature_matrix
+from serving.metrics import BATCH_SIZE_BUCKETS, MetricsRegistry, process_rss_bytes
+from serving.quantized import is_quantized, quantized_forward
+from serving.registry import ModelRouter
+from serving.streaming import FileOddsSource, RepredictionPipeline
+from ratings import SOURCES as RATED_SPORTS, EngineCache
+
+# Optional live odds feeds for the re-prediction stream
+ODDS_STREAM_FILE = os.environ.get("ODDS_STREAM_FILE")  # JSON-lines file of odds changes
+LIVE_ODDS_POLLER = os.environ.get("LIVE_ODDS_POLLER", "") not in ("", "0")  # Poll TheOddsAPI in-process
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") not in ("", "0")  # Record request metrics for /metrics
+MODEL_WATCH_INTERVAL = float(os.environ.get("MODEL_WATCH_INTERVAL", "2"))  # Seconds between checks for new weights; 0 disables
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")  # /admin requests must send it as X-Admin-Token; /admin is off when unset
+SERVED_SPORTS = [s.strip() for s in os.environ.get("SERVED_SPORTS", "nba,nfl").split(",") if s.strip()]
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", "1000"))  # Games per /predict/batch request
+SERVING_PRECISION = os.environ.get("SERVING_PRECISION") or None  # e.g. float32, or int8 to serve quantized artifacts; default keeps each artifact's dtype
+
+# Prometheus metrics
+metrics = MetricsRegistry(enabled=METRICS_ENABLED)
+REQUEST_COUNT = metrics.counter("http_requests_total", "HTTP requests by endpoint and status.", ("method", "endpoint", "status"))
+REQUEST_LATENCY = metrics.histogram("http_request_duration_seconds", "HTTP request latency.", ("endpoint",))
+REQUESTS_IN_FLIGHT = metrics.gauge("http_requests_in_flight", "HTTP requests currently being served.")
+PREDICT_PHASE_LATENCY = metrics.histogram(
+    "predict_phase_duration_seconds", "Time spent in each phase of /predict.", ("phase",)
+)
+BATCH_SIZE = metrics.histogram(
+    "prediction_batch_size", "Rows per forward pass.", ("source",), buckets=BATCH_SIZE_BUCKETS
+)
+MODEL_INFO = metrics.gauge(
+    "model_info", "Version (content hash) of the loaded model weights.", ("sport", "version", "role")
+)
+SHADOW_DELTA = metrics.histogram(
+    "shadow_prediction_delta", "Absolute difference between shadow and active predictions.",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+PROCESS_RSS = metrics.gauge("process_resident_memory_bytes", "Resident memory of the server process.")
+metrics.add_collector(lambda: PROCESS_RSS.set(process_rss_bytes() or 0))
 
 # Activation function
 def sigmoid(x):
-    return 1 / (1 + np.exp(-x))
+    # Overflow-free form of 1 / (1 + exp(-x)) that keeps the dtype of x
+    return 0.5 * (1 + np.tanh(0.5 * x))
 
-# Forward pass
+# Forward pass; an ensemble returns its members' mean
 def forward_propagation(X, weights):
-    X = np.array(X, dtype=np.float64)
+    if is_ensemble(weights):
+        return member_predictions(X, weights).mean(axis=0)[:, None]
+    if is_quantized(weights):
+        return quantized_forward(X, weights)
+    X = np.asarray(X, dtype=weights["w1"].dtype)  # Serve in the precision of the loaded weights
     z1 = np.dot(X, weights["w1"]) + weights["b1"]
     a1 = sigmoid(z1)
     z2 = np.dot(a1, weights["w2"]) + weights["b2"]
@@ -32,8 +77,85 @@ def forward_propagation(X, weights):
 # Flask app
 app = Flask(__name__)
 
-# Load the model weights once when the app starts
-weights = load_model()
+# One model per sport (nn_weights_{sport}.npy, else the shared nn_weights.npy); retrained
+# artifacts are picked up and swapped in without a restart
+router = ModelRouter(MODEL_DIR, SERVED_SPORTS, dtype=SERVING_PRECISION)
+
+def update_model_info(_registry):
+    MODEL_INFO.clear()
+    for sport, registry in router.sport_registries.items():
+        if registry.active is not None:
+            MODEL_INFO.set(1, sport=sport, version=registry.active.version, role="active")
+        if registry.candidate is not None:
+            MODEL_INFO.set(1, sport=sport, version=registry.candidate.version, role=registry.candidate_mode)
+
+router.on_swap(update_model_info)
+router.load()
+router.start_watching(MODEL_WATCH_INTERVAL)
+
+# Shadow predictions are scored off the request path
+shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow-scoring")
+
+def score_shadow(shadow, X, served):
+    shadow_prediction = forward_propagation(X, shadow.weights)
+    for delta in np.abs(shadow_prediction - served).ravel():
+        SHADOW_DELTA.observe(float(delta))
+
+def submit_shadow(shadow, X, served):
+    shadow_executor.submit(score_shadow, shadow, X, served)
+
+def counted_forward(source, summary=False):
+    """
+    Forward pass for `router.predict` that records the batch size. With
+    `summary` it returns mean, std and quantiles over ensemble members
+    (std 0 for a single network) instead of one prediction column.
+    """
+    def forward(X, weights):
+        BATCH_SIZE.observe(len(X), source=source)
+        if summary:
+            return summarize(member_predictions(X, weights))
+        return forward_propagation(X, weights)
+    return forward
+
+def predict_batch(sports, spreads, total_points):
+    predictions, _ = router.predict(sports, spreads, total_points, counted_forward("stream"), on_shadow=submit_shadow)
+    return predictions[:, 0]
+
+# Pre-game Elo ratings (src/ratings.py), looked up per /predict request and
+# reloaded when src/ratings.py saves a new state
+ratings = EngineCache([sport for sport in SERVED_SPORTS if sport in RATED_SPORTS])
+
+# Re-score games as their lines move and stream the results to /stream subscribers
+pipeline = RepredictionPipeline(predict_batch).start()
+
+if ODDS_STREAM_FILE:
+    FileOddsSource(ODDS_STREAM_FILE, pipeline).start()
+
+if LIVE_ODDS_POLLER:
+    from data_gathering.odds_poller import OddsPoller
+
+    poller = OddsPoller(["basketball_nba", "americanfootball_nfl"], on_changes=pipeline.submit,
+                        on_snapshot=pipeline.sync)
+    threading.Thread(target=lambda: asyncio.run(poller.run()), name="odds-poller", daemon=True).start()
+
+@app.before_request
+def start_timer():
+    g.start_time = time.perf_counter()
+    REQUESTS_IN_FLIGHT.inc()
+
+@app.after_request
+def record_request(response):
+    if "start_time" in g:
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        REQUEST_LATENCY.observe(time.perf_counter() - g.start_time, endpoint=endpoint)
+        REQUEST_COUNT.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+    return response
+
+@app.teardown_request
+def finish_request(exc):
+    # Teardown also runs when a view raises, which skips after_request
+    if "start_time" in g:
+        REQUESTS_IN_FLIGHT.dec()
 
 @app.route("/")
 def home():
@@ -43,34 +165,183 @@ def home():
 def predict():
     try:
         # Get JSON data from the request
-        data = request.get_json()
+        with PREDICT_PHASE_LATENCY.time(phase="parse"):
+            data = request.get_json()
 
-        # Validate required fields
-        required_fields = ["sport", "homeTeam", "awayTeam", "spread", "totalPoints"]
-        for field in required_fields:
-            if field not in data:
-                return jsonify({"error": f"Missing required field: {field}"}), 400
+            # Validate required fields
+            required_fields = ["sport", "homeTeam", "awayTeam", "spread", "totalPoints"]
+            for field in required_fields:
+                if field not in data:
+                    return jsonify({"error": f"Missing required field: {field}"}), 400
 
-        # Map user inputs to the 37 feature vector
-        features = []
-        features.append(1 if data["sport"] == "nba" else 0)  # Example: sport encoding
-        features.extend([
-            data["spread"],
-            data["totalPoints"],
-        ])
+            # Canary routing is keyed by game so repeat requests hit the same model
+            try:
+                model, shadow = router.registry(data["sport"]).route(key=f"{data['homeTeam']}|{data['awayTeam']}")
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
 
-        # Add dummy values for one-hot encodings or placeholders
-        # Ensure the features array has 37 elements
-        features += [0] * (37 - len(features))
+        # Map user inputs to the sport model's feature vector
+        with PREDICT_PHASE_LATENCY.time(phase="feature_build"):
+            features = build_feature_matrix(
+                [data["sport"]], [data["spread"]], [data["totalPoints"]],
+                input_width(model.weights), input_dtype(model.weights),
+            )
+        # Ensembles score all members in one batched pass and report their spread
+        with PREDICT_PHASE_LATENCY.time(phase="forward"):
+            if is_ensemble(model.weights):
+                summary = summarize(member_predictions(features, model.weights))
+                prediction = summary[:, :1]
+            else:
+                summary = None
+                prediction = forward_propagation(features, model.weights)
+        BATCH_SIZE.observe(len(features), source="predict")
+        if shadow is not None:
+            submit_shadow(shadow, features, prediction)
 
-        # Reshape for prediction
-        features = np.array(features).reshape(1, -1)
-        prediction = forward_propagation(features, weights)
+        with PREDICT_PHASE_LATENCY.time(phase="serialize"):
+            result = describe(summary[0]) if summary is not None else {"prediction": float(prediction[0, 0])}
+            engine = ratings.get(data["sport"])
+            if engine is not None and engine.games:
+                result["ratings"] = engine.pregame(data["homeTeam"], data["awayTeam"])
+            return jsonify(dict(result, modelVersion=model.version))
 
-        return jsonify({"prediction": float(prediction[0, 0])})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch_endpoint():
+    """
+    Score many games in one request: {"games": [<`/predict` payload>, ...]}.
+    Games are grouped per sport model and each group is scored in one pass.
+    """
+    try:
+        data = request.get_json()
+        games = data.get("games") if isinstance(data, dict) else None
+        if not isinstance(games, list) or not games:
+            return jsonify({"error": "Missing required field: games"}), 400
+        if len(games) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"At most {MAX_BATCH_SIZE} games per batch"}), 400
+        required_fields = ["sport", "homeTeam", "awayTeam", "spread", "totalPoints"]
+        for i, game in enumerate(games):
+            for field in required_fields:
+                if field not in game:
+                    return jsonify({"error": f"Missing required field in game {i}: {field}"}), 400
+
+        try:
+            summaries, versions = router.predict(
+                [game["sport"] for game in games],
+                [game["spread"] for game in games],
+                [game["totalPoints"] for game in games],
+                counted_forward("batch", summary=True),
+                keys=[f"{game['homeTeam']}|{game['awayTeam']}" for game in games],
+                on_shadow=submit_shadow,
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        return jsonify({"predictions": [
+            dict(describe(row) if is_ensemble(version.weights) else {"prediction": float(row[0])},
+                 modelVersion=version.version)
+            for row, version in zip(summaries, versions)
+        ]})
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/stream")
+def stream():
+    """
+    Server-sent events: one `prediction` event per re-scored game.
+    """
+    subscription = pipeline.broadcaster.subscribe()
+
+    def events():
+        try:
+            while True:
+                try:
+                    message = subscription.get(timeout=15)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: prediction\ndata: {json.dumps(message)}\n\n"
+        finally:
+            pipeline.broadcaster.unsubscribe(subscription)
+
+    return Response(events(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.route("/stream/stats")
+def stream_stats():
+    return jsonify(pipeline.latency.summary())
+
+@app.route("/lines/arbitrage")
+def lines_arbitrage():
+    """
+    Markets whose best prices across books currently lock in a profit.
+    """
+    return jsonify({"arbitrages": [
+        dict(arbitrage._asdict(), legs={name: leg._asdict() for name, leg in arbitrage.legs.items()})
+        for arbitrage in pipeline.lines.all_arbitrages()
+    ]})
+
+@app.route("/lines/<game_id>")
+def game_lines(game_id):
+    """
+    Best line and consensus of every outcome of a game from the streamed odds.
+    """
+    lines = pipeline.lines.describe(game_id)
+    if lines is None:
+        return jsonify({"error": f"Unknown game: {game_id}"}), 404
+    return jsonify(lines)
+
+@app.route("/admin/model", methods=["GET", "POST"])
+def admin_model():
+    """
+    Inspect or change the served model.
+
+    POST body: {"sport": <sport>, "action": <action>, "file": <file name in models/>, "fraction": <canary share>}
+    The action applies to the model serving `sport` (and any sport sharing its file).
+        reload    load `file` (default: the sport's watched file) and make it active
+        rollback  reactivate the previous version
+        shadow    load `file` as a shadow candidate
+        canary    load `file` as a canary serving `fraction` of games (default 0.1)
+        promote   make the candidate active
+        clear     drop the candidate
+    """
+    # Artifacts are unpickled on load, so model changes need the token and are off without one
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Not found"}), 404
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", "").encode(), ADMIN_TOKEN.encode()):
+        return jsonify({"error": "Forbidden"}), 403
+    if request.method == "GET":
+        return jsonify(router.status())
+
+    data = request.get_json(silent=True) or {}
+    action = data.get("action")
+    try:
+        registry = router.registry(data.get("sport"))
+        if action == "reload":
+            registry.load(data.get("file"))
+        elif action == "rollback":
+            registry.rollback()
+        elif action in ("shadow", "canary"):
+            if not data.get("file"):
+                return jsonify({"error": "Missing required field: file"}), 400
+            registry.set_candidate(data["file"], mode=action, fraction=float(data.get("fraction", 0.1)))
+        elif action == "promote":
+            registry.promote_candidate()
+        elif action == "clear":
+            registry.clear_candidate()
+        else:
+            return jsonify({"error": f"Unknown action: {action}"}), 400
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(router.status())
+
+@app.route("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     app.run(debug=True, port=5000)
@@ -0,0 +1,283 @@
+"""
+End-to-end benchmarks for the pipeline stages, training and serving.
+
+Every stage runs on synthetic tables sized like the real ones (scaled by
+--scale) inside a temporary directory, so the real data and model files are
+never touched. Results are written as JSON to benchmarks/results/ and can be
+compared with an earlier run via --compare.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--scale 1.0] [--repeats 3] [--compare results/<file>.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.abspath(os.path.dirname(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(BENCHMARKS_DIR, ".."))
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, "results")
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src", "models"))
+sys.path.insert(0, PROJECT_ROOT)
+
+import synthetic  # noqa: E402
+
+
+def measure(func, repeats):
+    """
+    Time `func` over `repeats` runs, then run it once more under tracemalloc
+    to record the peak Python/NumPy allocation.
+
+    Returns:
+        dict: Wall-time statistics in seconds and peak memory in MB.
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "repeats": repeats,
+        "min_s": min(times),
+        "median_s": float(np.median(times)),
+        "max_s": max(times),
+        "peak_mb": peak / 1e6,
+    }
+
+
+def bench_cleaner(workdir, scale, repeats):
+    import cleaner
+
+    raw_dir = os.path.join(workdir, "raw")
+    os.makedirs(raw_dir, exist_ok=True)
+    synthetic.nba_player_stats(int(synthetic.NBA_PLAYER_ROWS * scale)).to_csv(
+        os.path.join(raw_dir, "nba_stats_2000_2024.csv"), index=False)
+    synthetic.nba_team_scores(int(synthetic.NBA_SCORES_ROWS * scale)).to_csv(
+        os.path.join(raw_dir, "nba_2008-2024.csv"), index=False)
+    synthetic.nba_injuries().to_csv(os.path.join(raw_dir, "nba_injuries.csv"), index=False)
+    synthetic.nba_odds().to_csv(os.path.join(raw_dir, "basketball_nba_odds.csv"), index=False)
+
+    cleaner.DATA_DIR = raw_dir
+    cleaner.OUTPUT_DIR = os.path.join(workdir, "processed")
+    os.makedirs(cleaner.OUTPUT_DIR, exist_ok=True)
+    team_mapping = cleaner.create_team_mapping()
+    return {"cleaner.merge_nba_datasets": measure(lambda: cleaner.merge_nba_datasets(team_mapping), repeats)}
+
+
+def bench_combining(scale, repeats):
+    import data_combining
+
+    team_data = synthetic.nba_team_data(int(synthetic.NBA_SPLIT_ROWS * scale))
+    player_data = synthetic.nba_player_data(int(synthetic.NBA_PLAYER_ROWS * scale))
+    return {
+        "data_combining.combine_team_and_player_data": measure(
+            lambda: data_combining.combine_team_and_player_data(team_data.copy(), player_data, "NBA"), repeats
+        )
+    }
+
+
+def bench_splitting(dataset, repeats):
+    import data_splitting
+
+    return {
+        "data_splitting.split_data": measure(lambda: data_splitting.split_data(dataset, "score_diff_bin"), repeats)
+    }
+
+
+def bench_training(X, y, repeats):
+    import train_nn
+
+    weights = train_nn.initialize_weights(X.shape[1], train_nn.HIDDEN_SIZE_1, train_nn.HIDDEN_SIZE_2, train_nn.OUTPUT_SIZE)
+
+    def epoch():
+        y_pred, cache = train_nn.forward_propagation(X, weights)
+        gradients = train_nn.backward_propagation(X, y, weights, cache)
+        train_nn.update_weights(weights, gradients, train_nn.LEARNING_RATE)
+
+    return {"train_nn.epoch": dict(measure(epoch, repeats), rows=len(X), features=X.shape[1])}
+
+
+def prepare_splits(workdir, dataset):
+    """
+    Save `dataset` and a stratified manifest under `workdir` and point the
+    split loader at them.
+    """
+    import split_indices
+
+    split_indices.SPLITS_DIR = os.path.join(workdir, "splits")
+    split_indices.save_dataset(dataset, "nba")
+    indices = split_indices.stratified_split_indices(dataset["score_diff_bin"].to_numpy())
+    with contextlib.redirect_stdout(io.StringIO()):
+        split_indices.save_split_manifest(indices, "nba", len(dataset))
+
+
+def bench_evaluation(workdir, n_features, repeats):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    import evaluate_nn
+    import train_nn
+
+    evaluate_nn.MODEL_DIR = os.path.join(workdir, "models")
+    evaluate_nn.PLOTS_DIR = os.path.join(workdir, "plots")
+    os.makedirs(evaluate_nn.MODEL_DIR, exist_ok=True)
+    os.makedirs(evaluate_nn.PLOTS_DIR, exist_ok=True)
+    weights = train_nn.initialize_weights(n_features, train_nn.HIDDEN_SIZE_1, train_nn.HIDDEN_SIZE_2, train_nn.OUTPUT_SIZE)
+    np.save(os.path.join(evaluate_nn.MODEL_DIR, "nn_weights.npy"), weights)
+
+    def evaluate():
+        evaluate_nn.evaluate_model()
+        plt.close("all")
+
+    return {"evaluate_nn.evaluate_model": measure(evaluate, repeats)}
+
+
+def bench_predict(requests_total, concurrency):
+    """
+    Drive `/predict` through Flask's test client from `concurrency` threads.
+    """
+    import app as app_module
+
+    client_payloads = [
+        {"sport": "nba" if i % 2 else "nfl", "homeTeam": "Boston Celtics", "awayTeam": "Denver Nuggets",
+         "spread": -3.5 + (i % 10), "totalPoints": 210.5 + (i % 20)}
+        for i in range(requests_total)
+    ]
+
+    def worker(chunk):
+        client = app_module.app.test_client()
+        latencies = []
+        for payload in chunk:
+            start = time.perf_counter()
+            response = client.post("/predict", json=payload)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise RuntimeError(f"/predict returned {response.status_code}: {response.get_data(as_text=True)}")
+        return latencies
+
+    chunks = [client_payloads[i::concurrency] for i in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = np.concatenate([np.array(result) for result in pool.map(worker, chunks)]) * 1000
+    elapsed = time.perf_counter() - start
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {"app./predict": {
+        "requests": requests_total,
+        "concurrency": concurrency,
+        "throughput_rps": requests_total / elapsed,
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(latencies.max()),
+    }}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current, baseline_path):
+    """
+    Print the ratio of every timing between `baseline_path` and this run.
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nComparison against {baseline.get('commit')} ({baseline_path}):")
+    for stage, result in current["stages"].items():
+        previous = baseline["stages"].get(stage)
+        if not previous:
+            continue
+        for metric in ("median_s", "peak_mb", "p99_ms", "throughput_rps"):
+            if metric in result and metric in previous and previous[metric]:
+                ratio = result[metric] / previous[metric]
+                print(f"  {stage:48s} {metric:15s} {previous[metric]:10.4f} -> {result[metric]:10.4f}  (x{ratio:.2f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages, training and serving.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier on the real table sizes")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per stage")
+    parser.add_argument("--requests", type=int, default=2000, help="Total /predict requests")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent /predict clients")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    args = parser.parse_args()
+
+    import train_nn
+
+    stages = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        print("Benchmarking cleaner...")
+        stages.update(bench_cleaner(workdir, args.scale, args.repeats))
+        print("Benchmarking data combining...")
+        stages.update(bench_combining(args.scale, args.repeats))
+
+        dataset = synthetic.nba_split_dataset(int(synthetic.NBA_SPLIT_ROWS * args.scale))
+        print("Benchmarking data splitting...")
+        stages.update(bench_splitting(dataset, args.repeats))
+
+        prepare_splits(workdir, dataset)
+        with contextlib.redirect_stdout(io.StringIO()):
+            X, y = train_nn.load_data("nba", "train")
+            X_test, _ = train_nn.load_data("nba", "test")
+        print("Benchmarking a training epoch...")
+        stages.update(bench_training(X.astype(np.float64), y.astype(np.float64), args.repeats))
+        print("Benchmarking evaluation...")
+        stages.update(bench_evaluation(workdir, X_test.shape[1], args.repeats))
+
+    print("Benchmarking /predict...")
+    stages.update(bench_predict(args.requests, args.concurrency))
+
+    result = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "scale": args.scale,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "stages": stages,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{result['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+
+    for stage, metrics in stages.items():
+        summary = ", ".join(f"{k}={v:.4g}" if isinstance(v, float) else f"{k}={v}" for k, v in metrics.items())
+        print(f"{stage}: {summary}")
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+from split_indices import bin_score_diffs
+
+# Row counts of the real NBA tables in data/raw and data/splits
+NBA_SCORES_ROWS = 21797
+NBA_PLAYER_ROWS = 15183
+NBA_ODDS_ROWS = 258
+NBA_INJURY_ROWS = 5
+NBA_SPLIT_ROWS = 30010
+
+NBA_TEAMS = {
+    "atl": "Atlanta Hawks", "bkn": "Brooklyn Nets", "bos": "Boston Celtics", "cha": "Charlotte Hornets",
+    "chi": "Chicago Bulls", "cle": "Cleveland Cavaliers", "dal": "Dallas Mavericks", "den": "Denver Nuggets",
+    "det": "Detroit Pistons", "gs": "Golden State Warriors", "hou": "Houston Rockets", "ind": "Indiana Pacers",
+    "lac": "Los Angeles Clippers", "lal": "Los Angeles Lakers", "mem": "Memphis Grizzlies", "mia": "Miami Heat",
+    "mil": "Milwaukee Bucks", "min": "Minnesota Timberwolves", "no": "New Orleans Pelicans", "ny": "New York Knicks",
+    "okc": "Oklahoma City Thunder", "orl": "Orlando Magic", "phi": "Philadelphia 76ers", "phx": "Phoenix Suns",
+    "por": "Portland Trail Blazers", "sa": "San Antonio Spurs", "sac": "Sacramento Kings", "tor": "Toronto Raptors",
+    "utah": "Utah Jazz", "wsh": "Washington Wizards",
+}
+BOOKMAKERS = ["DraftKings", "FanDuel", "BetMGM", "Caesars", "BetRivers", "Bovada", "BetOnline.ag", "LowVig.ag", "MyBookie.ag"]
+
+
+def _rng(seed):
+    return np.random.default_rng(seed)
+
+
+def nba_team_scores(rows=NBA_SCORES_ROWS, seed=0):
+    """
+    Games shaped like data/raw/nba_2008-2024.csv, sorted by season and date.
+    """
+    rng = _rng(seed)
+    abbreviations = np.array(list(NBA_TEAMS))
+    home = rng.choice(abbreviations, rows)
+    away = rng.choice(abbreviations, rows)
+    dates = pd.Timestamp("2007-10-30") + pd.to_timedelta(np.sort(rng.integers(0, 16 * 365, rows)), unit="D")
+    quarters = {f"q{q}_{side}": rng.integers(15, 40, rows) for side in ("away", "home") for q in range(1, 5)}
+    df = pd.DataFrame({
+        "season": dates.year + (dates.month >= 10),
+        "date": dates.strftime("%Y-%m-%d"),
+        "regular": rng.random(rows) > 0.07,
+        "playoffs": rng.random(rows) < 0.07,
+        "away": away,
+        "home": home,
+        "score_away": sum(quarters[f"q{q}_away"] for q in range(1, 5)),
+        "score_home": sum(quarters[f"q{q}_home"] for q in range(1, 5)),
+        **quarters,
+        "ot_away": 0,
+        "ot_home": 0,
+        "whos_favored": rng.choice(["home", "away"], rows),
+        "spread": rng.normal(5, 3, rows).round(1),
+        "total": rng.normal(210, 12, rows).round(1),
+        "moneyline_away": rng.integers(-400, 400, rows),
+        "moneyline_home": rng.integers(-400, 400, rows),
+        "h2_spread": rng.normal(3, 2, rows).round(1),
+        "h2_total": rng.normal(105, 6, rows).round(1),
+        "id_spread": rng.integers(0, 2, rows),
+        "id_total": rng.integers(0, 2, rows),
+    })
+    return df.sort_values(["season", "date"], kind="stable").reset_index(drop=True)
+
+
+def nba_odds(rows=NBA_ODDS_ROWS, seed=1):
+    """
+    Lines shaped like data/raw/basketball_nba_odds.csv.
+    """
+    rng = _rng(seed)
+    names = np.array(list(NBA_TEAMS.values()))
+    games = max(rows // 36, 1)
+    home = rng.choice(names, games)
+    away = rng.choice(names, games)
+    game = rng.integers(0, games, rows)
+    market = rng.choice(["h2h", "spreads", "totals"], rows)
+    return pd.DataFrame({
+        "commence_time": [f"2024-12-25T{17 + g % 6}:00:00Z" for g in game],
+        "home_team": home[game],
+        "away_team": away[game],
+        "bookmaker": rng.choice(BOOKMAKERS, rows),
+        "market_type": market,
+        "name": np.where(market == "totals", rng.choice(["Over", "Under"], rows), home[game]),
+        "price": rng.uniform(1.2, 4.0, rows).round(2),
+        "point": np.where(market == "h2h", np.nan, rng.normal(0, 8, rows).round(1)),
+    })
+
+
+def nba_player_stats(rows=NBA_PLAYER_ROWS, seed=2):
+    """
+    Player totals shaped like data/raw/nba_stats_2000_2024.csv.
+    """
+    rng = _rng(seed)
+    return pd.DataFrame({
+        "Rk": np.arange(1, rows + 1, dtype=np.float64),
+        "Player": [f"Player {i % 4000} {'Jr.' if i % 17 == 0 else ''}".strip() for i in range(rows)],
+        "Age": rng.integers(19, 40, rows).astype(np.float64),
+        "Team": rng.choice([a.upper() for a in NBA_TEAMS], rows),
+        "Pos": rng.choice(["PG", "SG", "SF", "PF", "C"], rows),
+        "G": rng.integers(1, 83, rows).astype(np.float64),
+        "FG%": rng.uniform(0.3, 0.6, rows),
+        "3P%": rng.uniform(0.0, 0.45, rows),
+        "FT%": rng.uniform(0.5, 0.95, rows),
+        "TRB": rng.integers(0, 1000, rows).astype(np.float64),
+        "AST": rng.integers(0, 800, rows).astype(np.float64),
+        "PTS": rng.integers(0, 2500, rows).astype(np.float64),
+        "Year": rng.integers(2000, 2025, rows),
+    })
+
+
+def nba_injuries(rows=NBA_INJURY_ROWS, seed=3):
+    rng = _rng(seed)
+    return pd.DataFrame({
+        "NAME": [f"Player {i}" for i in rng.integers(0, 4000, rows)],
+        "POS": rng.choice(["G", "F", "C"], rows),
+        "EST. RETURN DATE": "Dec 26",
+        "STATUS": rng.choice(["Out", "Day-To-Day"], rows),
+        "COMMENT": "Synthetic injury note.",
+    })
+
+
+def nba_team_data(rows=NBA_SPLIT_ROWS, seed=4):
+    """
+    Merged team/odds rows shaped like data/processed/nba_team_data.csv.
+    """
+    rng = _rng(seed)
+    scores = nba_team_scores(rows, seed)
+    odds = nba_odds(rows, seed + 1)
+    team_names = {abbr: name.split()[-1].lower() for abbr, name in NBA_TEAMS.items()}
+    scores["home_team_combined"] = scores["home"].map(team_names)
+    scores["away_team_combined"] = scores["away"].map(team_names)
+    scores["spread"] = scores["spread"].where(rng.random(rows) > 0.02)
+    return pd.concat([scores, odds.reset_index(drop=True)], axis=1)
+
+
+def nba_player_data(rows=NBA_PLAYER_ROWS, seed=5):
+    """
+    Player rows shaped like data/processed/nba_player_data.csv, keyed by the
+    same team names as `nba_team_data`.
+    """
+    players = nba_player_stats(rows, seed)
+    team_names = {abbr.upper(): name.split()[-1].lower() for abbr, name in NBA_TEAMS.items()}
+    players["Team"] = players["Team"].map(team_names)
+    return players
+
+
+def nba_split_dataset(rows=NBA_SPLIT_ROWS, seed=6):
+    """
+    Feature-engineered rows with the columns of data/splits/nba_test.csv.
+    """
+    rng = _rng(seed)
+    df = nba_team_data(rows, seed)
+    df["score_diff"] = rng.normal(3, 13, rows)
+    df["total_points"] = rng.uniform(0, 1, rows)
+    df["spread_accuracy"] = rng.uniform(0, 1, rows)
+    df["home_win"] = df["score_diff"] > 0
+    df["is_regular_season"] = df["regular"].astype(int)
+    df["is_playoff"] = df["playoffs"].astype(int)
+    df["commence_time"] = rng.choice([f"2024-12-25T{h}:00:00Z" for h in range(17, 24)], rows)
+    df["score_diff_bin"] = bin_score_diffs(df["score_diff"])
+    return df
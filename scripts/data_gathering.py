@@ -5,32 +5,36 @@ import os
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
 sys.path.insert(0, project_root)
 
-from data_gathering.nba_scraper import scrape_nba_stats
-from data_gathering.nfl_scraper import scrape_nfl_stats
+from data_gathering.fetch_engine import FetchEngine, OFFLINE
+from data_gathering.http_cache import ResponseCache
+from data_gathering.nba_scraper import scrape_nba_seasons
+from data_gathering.nfl_scraper import scrape_nfl_seasons
 from data_gathering.api_fetcher import fetch_odds
 from data_gathering.injury_scraper import scrape_injury_data_with_headers
 
 def run_pipeline():
     print("Starting data gathering pipeline...")
 
-    # Scrape player statistics
-    for year in range(2020, 2025):
-        print(f"Scraping NBA stats for {year}...")
-        scrape_nba_stats(year)
-        print(f"Scraping NFL stats for {year}...")
-        scrape_nfl_stats(year)
+    engine = FetchEngine(cache=ResponseCache(), offline=OFFLINE)
+    years = range(2020, 2025)
+
+    # Scrape player statistics; the two sports hit different hosts, so they run side by side
+    print(f"Scraping NBA and NFL stats for {years.start}-{years.stop - 1}...")
+    engine.map(lambda scrape: scrape(years, engine), [scrape_nba_seasons, scrape_nfl_seasons])
 
     # Fetch betting odds
     print("Fetching NBA betting odds...")
-    fetch_odds(sport="basketball_nba")
+    fetch_odds(sport="basketball_nba", engine=engine)
     print("Fetching NFL betting odds...")
-    fetch_odds(sport="americanfootball_nfl")
+    fetch_odds(sport="americanfootball_nfl", engine=engine)
 
     # Scrape injury data
     print("Scraping NFL injuries...")
-    scrape_injury_data_with_headers("nfl")
+    scrape_injury_data_with_headers("nfl", engine)
     print("Scraping NBA injuries...")
-    scrape_injury_data_with_headers("nba")
+    scrape_injury_data_with_headers("nba", engine)
+
+    engine.close()
 
     print("Data gathering pipeline complete!")
 
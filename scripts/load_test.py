@@ -0,0 +1,238 @@
+"""
+Load generator for the Flask prediction API.
+
+Replays game payloads built from the odds boards in data/raw against a
+running server and reports latency percentiles, throughput and error rates.
+
+Closed loop (--concurrency clients, each sending its next request as soon as
+the previous one returns) measures capacity. Open loop (--rate requests/s on a
+fixed or Poisson schedule, regardless of how fast the server answers)
+measures latency under a given arrival rate; latency is taken from the
+scheduled send time so a stalled server is not hidden by the generator
+slowing down with it.
+
+Usage:
+    python scripts/load_test.py --mode closed --concurrency 16 --duration 30
+    python scripts/load_test.py --mode open --rate 200 --duration 30 --output results.json --samples samples.csv
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import requests
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(PROJECT_ROOT, "data", "raw")
+DEFAULT_URL = "http://127.0.0.1:5000/predict"
+
+ODDS_FILES = {"nba": "basketball_nba_odds.csv", "nfl": "americanfootball_nfl_odds.csv"}
+
+
+def load_payloads(data_dir=DATA_DIR):
+    """
+    Build /predict payloads from the odds boards: one per game and bookmaker
+    that quotes both a home spread and an Over total.
+
+    Returns:
+        list: Payload dicts with sport, homeTeam, awayTeam, spread and totalPoints.
+    """
+    payloads = []
+    for sport, filename in ODDS_FILES.items():
+        path = os.path.join(data_dir, filename)
+        if not os.path.exists(path):
+            print(f"Odds file not found, skipping {sport}: {path}")
+            continue
+        odds = pd.read_csv(path)
+        spreads = odds[(odds["market_type"] == "spreads") & (odds["name"] == odds["home_team"])]
+        totals = odds[(odds["market_type"] == "totals") & (odds["name"] == "Over")]
+        lines = spreads.merge(
+            totals[["home_team", "away_team", "bookmaker", "point"]],
+            on=["home_team", "away_team", "bookmaker"], suffixes=("_spread", "_total")
+        ).dropna(subset=["point_spread", "point_total"])
+        payloads.extend(
+            {"sport": sport, "homeTeam": home, "awayTeam": away, "spread": float(spread), "totalPoints": float(total)}
+            for home, away, spread, total in zip(
+                lines["home_team"], lines["away_team"], lines["point_spread"], lines["point_total"]
+            )
+        )
+    if not payloads:
+        raise FileNotFoundError(f"No odds boards with spreads and totals found in {data_dir}")
+    return payloads
+
+
+def send(session, url, payload, timeout):
+    """
+    POST one payload.
+
+    Returns:
+        tuple: (status code or None on connection error, error message or None)
+    """
+    try:
+        response = session.post(url, json=payload, timeout=timeout)
+    except requests.RequestException as e:
+        return None, type(e).__name__
+    if response.status_code != 200:
+        return response.status_code, response.text[:200]
+    return response.status_code, None
+
+
+def run_closed_loop(url, payloads, concurrency, duration, max_requests=None, timeout=10):
+    """
+    `concurrency` clients send back-to-back requests for `duration` seconds
+    (or until `max_requests` have been sent).
+
+    Returns:
+        tuple: (samples, elapsed seconds). Each sample is
+        (start offset s, latency s, status, error).
+    """
+    samples = []
+    lock = threading.Lock()
+    sent = iter(range(max_requests)) if max_requests else None
+    start = time.perf_counter()
+    deadline = start + duration
+
+    def client(worker_id):
+        rng = random.Random(worker_id)
+        local = []
+        with requests.Session() as session:
+            while time.perf_counter() < deadline:
+                if sent is not None:
+                    with lock:
+                        if next(sent, None) is None:
+                            break
+                sent_at = time.perf_counter()
+                status, error = send(session, url, rng.choice(payloads), timeout)
+                local.append((sent_at - start, time.perf_counter() - sent_at, status, error))
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - start
+
+
+def run_open_loop(url, payloads, rate, duration, max_workers=256, poisson=False, timeout=10, seed=0):
+    """
+    Send requests at `rate` per second for `duration` seconds, independent of
+    response times. Latency is measured from each request's scheduled time.
+
+    Returns:
+        tuple: (samples, elapsed seconds), as in `run_closed_loop`.
+    """
+    rng = random.Random(seed)
+    local = threading.local()
+    samples = []
+    lock = threading.Lock()
+
+    def fire(scheduled_at, payload):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        status, error = send(local.session, url, payload, timeout)
+        sample = (scheduled_at - start, time.perf_counter() - scheduled_at, status, error)
+        with lock:
+            samples.append(sample)
+
+    start = time.perf_counter()
+    next_at = start
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while next_at < start + duration:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, next_at, rng.choice(payloads))
+            next_at += rng.expovariate(rate) if poisson else 1.0 / rate
+    return samples, time.perf_counter() - start
+
+
+def summarize(samples, elapsed):
+    """
+    Latency percentiles (ms), throughput and error counts for a run.
+    """
+    latencies = np.array([sample[1] for sample in samples], dtype=np.float64) * 1000
+    errors = [sample for sample in samples if sample[3] is not None]
+    summary = {
+        "requests": len(samples),
+        "elapsed_s": elapsed,
+        "throughput_rps": len(samples) / elapsed if elapsed else 0.0,
+        "errors": len(errors),
+        "error_rate": len(errors) / len(samples) if samples else 0.0,
+        "status_codes": {str(code): count for code, count in Counter(sample[2] for sample in samples).items()},
+        "error_messages": dict(Counter(sample[3] for sample in errors).most_common(5)),
+    }
+    if latencies.size:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        summary.update(
+            p50_ms=float(p50), p95_ms=float(p95), p99_ms=float(p99),
+            max_ms=float(latencies.max()), mean_ms=float(latencies.mean()),
+        )
+    return summary
+
+
+def export_samples(samples, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["start_s", "latency_ms", "status", "error"])
+        for start, latency, status, error in sorted(samples):
+            writer.writerow([f"{start:.6f}", f"{latency * 1000:.3f}", status if status is not None else "", error or ""])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the /predict endpoint.")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clients in closed-loop mode")
+    parser.add_argument("--rate", type=float, default=100.0, help="Requests per second in open-loop mode")
+    parser.add_argument("--poisson", action="store_true", help="Poisson instead of evenly spaced arrivals")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to generate load")
+    parser.add_argument("--requests", type=int, help="Stop closed-loop mode after this many requests")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests sent first")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Directory with the odds boards")
+    parser.add_argument("--output", help="Write the summary as JSON")
+    parser.add_argument("--samples", help="Write every request as CSV")
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.data_dir)
+    print(f"Loaded {len(payloads)} game payloads.")
+
+    with requests.Session() as session:
+        for payload in payloads[:args.warmup]:
+            send(session, args.url, payload, args.timeout)
+
+    if args.mode == "closed":
+        print(f"Closed loop: {args.concurrency} clients for {args.duration}s against {args.url}...")
+        samples, elapsed = run_closed_loop(
+            args.url, payloads, args.concurrency, args.duration, args.requests, args.timeout
+        )
+    else:
+        print(f"Open loop: {args.rate} req/s for {args.duration}s against {args.url}...")
+        samples, elapsed = run_open_loop(
+            args.url, payloads, args.rate, args.duration, poisson=args.poisson, timeout=args.timeout
+        )
+
+    summary = summarize(samples, elapsed)
+    summary["config"] = {key: value for key, value in vars(args).items() if key not in ("output", "samples")}
+    print(json.dumps({key: value for key, value in summary.items() if key != "config"}, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"Summary saved to {args.output}")
+    if args.samples:
+        export_samples(samples, args.samples)
+        print(f"Samples saved to {args.samples}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+import threading
+from collections import namedtuple
+
+import pandas as pd
+
+# Columns of the odds board (`data_gathering.odds_store.ODDS_COLUMNS`) plus the game id
+LINE_COLUMNS = ["game_id", "commence_time", "home_team", "away_team", "bookmaker", "market_type", "name", "price", "point"]
+
+BestLine = namedtuple("BestLine", ["bookmaker", "price", "point"])
+Consensus = namedtuple("Consensus", ["point", "price", "books"])
+Arbitrage = namedtuple("Arbitrage", ["game_id", "market_type", "legs", "stakes", "profit"])
+
+
+def game_key(record):
+    """
+    Game id of a line: its TheOddsAPI id, or teams and start time for rows of
+    the `{sport}_odds.csv` board, which has no id column.
+    """
+    game_id = record.get("game_id")
+    if game_id is not None and game_id == game_id:
+        return game_id
+    return f"{record.get('away_team')}@{record.get('home_team')} {record.get('commence_time')}"
+
+
+def start_time(value):
+    """
+    Kick-off of a game as a UTC Timestamp, or None when it is missing or
+    unparseable.
+    """
+    start = pd.to_datetime(value, utc=True, errors="coerce")
+    return None if pd.isna(start) else start
+
+
+def _missing(value):
+    return value is None or value != value
+
+
+class _OutcomeLines:
+    """
+    Every book's line for one outcome, with the best price and the running
+    sums behind the consensus kept current on each update.
+    """
+    __slots__ = ("books", "best", "point_sum", "point_count", "price_sum")
+
+    def __init__(self):
+        self.books = {}
+        self.best = None
+        self.point_sum = 0.0
+        self.point_count = 0
+        self.price_sum = 0.0
+
+    def update(self, bookmaker, price, point):
+        """
+        Set one book's line.
+
+        Returns:
+            bool: True when the best line changed.
+        """
+        old = self.books.get(bookmaker)
+        if old is not None:
+            self.price_sum -= old[0]
+            if old[1] is not None:
+                self.point_sum -= old[1]
+                self.point_count -= 1
+        self.books[bookmaker] = (price, point)
+        self.price_sum += price
+        if point is not None:
+            self.point_sum += point
+            self.point_count += 1
+
+        best = self.best
+        if best is None or price > best.price:
+            self.best = BestLine(bookmaker, price, point)
+        elif best.bookmaker == bookmaker:
+            # The best book moved; only then are the other books rescanned
+            book = max(self.books, key=lambda name: self.books[name][0])
+            self.best = BestLine(book, *self.books[book])
+        return self.best is not best
+
+    def remove(self, bookmaker):
+        """
+        Drop one book's line.
+
+        Returns:
+            bool: True when the best line changed.
+        """
+        price, point = self.books.pop(bookmaker)
+        self.price_sum -= price
+        if point is not None:
+            self.point_sum -= point
+            self.point_count -= 1
+        if self.best.bookmaker != bookmaker:
+            return False
+        if self.books:
+            book = max(self.books, key=lambda name: self.books[name][0])
+            self.best = BestLine(book, *self.books[book])
+        else:
+            self.best = None
+        return True
+
+    def consensus(self):
+        return Consensus(
+            self.point_sum / self.point_count if self.point_count else None,
+            self.price_sum / len(self.books),
+            len(self.books),
+        )
+
+
+def points_compatible(market_type, legs):
+    """
+    Whether the best lines of a market cover every result together: the two
+    spreads must not leave a gap between them (home -3 with away +3 or
+    better) and the over must be at or below the under.
+    """
+    if market_type == "spreads":
+        points = [leg.point for leg in legs.values()]
+        return None not in points and sum(points) >= 0
+    if market_type == "totals":
+        over, under = legs.get("Over"), legs.get("Under")
+        return over is not None and under is not None and None not in (over.point, under.point) \
+            and over.point <= under.point
+    return True
+
+
+class LineIndex:
+    """
+    In-memory index of odds lines keyed by (game, market, outcome).
+
+    Each key keeps every book's (price, point), the best price and the
+    consensus (mean over books) up to date as change records arrive, and
+    every market keeps its arbitrage status, so best-line, consensus and
+    arbitrage queries are dictionary lookups instead of a groupby over the
+    board. An update costs O(1) except when the book holding the best price
+    moves it down, which rescans that outcome's books.
+
+    Change records only add or move lines; `apply_snapshot` also drops the
+    lines a book no longer quotes and `remove_started` the games that have
+    kicked off.
+    """
+
+    def __init__(self):
+        self.outcomes = {}
+        self.markets = {}
+        self.games = {}
+        self.starts = {}
+        self.game_markets = {}
+        self.arbitrages = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df):
+        index = cls()
+        index.apply(df.to_dict("records"))
+        return index
+
+    def apply(self, records):
+        """
+        Apply change records (`OddsStore.append_snapshot` rows or `{sport}_odds.csv`
+        rows, as dicts).
+
+        Returns:
+            list: (game id, market) of every market whose best line changed.
+        """
+        with self._lock:
+            changed = self._apply(records)
+            for game_id, market_type in changed:
+                self._update_arbitrage(game_id, market_type)
+        return list(changed)
+
+    def apply_snapshot(self, records):
+        """
+        Apply a full board snapshot (e.g. every row of one poll). The snapshot
+        is authoritative for the games it contains: lines of those games that
+        it no longer quotes, such as a market a book pulled, are dropped.
+
+        Returns:
+            list: (game id, market) of every market whose best line changed.
+        """
+        records = list(records)
+        quoted = {
+            (game_key(record), record.get("market_type"), record.get("name"), record.get("bookmaker"))
+            for record in records if not _missing(record.get("price"))
+        }
+        with self._lock:
+            changed = self._apply(records)
+            for game_id in {key[0] for key in quoted}:
+                for market_type in list(self.game_markets.get(game_id, ())):
+                    for name in list(self.markets[(game_id, market_type)]):
+                        lines = self.outcomes[(game_id, market_type, name)]
+                        pulled = [book for book in lines.books if (game_id, market_type, name, book) not in quoted]
+                        for bookmaker in pulled:
+                            if lines.remove(bookmaker):
+                                changed[(game_id, market_type)] = None
+                        if not lines.books:
+                            self._remove_outcome(game_id, market_type, name)
+            for game_id, market_type in changed:
+                if (game_id, market_type) in self.markets:
+                    self._update_arbitrage(game_id, market_type)
+        return list(changed)
+
+    def _apply(self, records):
+        changed = {}
+        for record in records:
+            price = record.get("price")
+            if _missing(price):
+                continue
+            game_id, market_type, name = game_key(record), record.get("market_type"), record.get("name")
+            if game_id not in self.games:
+                self.games[game_id] = {
+                    key: record.get(key) for key in ("commence_time", "home_team", "away_team")
+                }
+                self.starts[game_id] = start_time(record.get("commence_time"))
+                self.game_markets[game_id] = {}
+            self.game_markets[game_id][market_type] = None
+            names = self.markets.setdefault((game_id, market_type), {})
+            lines = self.outcomes.get((game_id, market_type, name))
+            if lines is None:
+                lines = self.outcomes[(game_id, market_type, name)] = _OutcomeLines()
+                names[name] = None
+            point = record.get("point")
+            point = None if _missing(point) else float(point)
+            if lines.update(record.get("bookmaker"), float(price), point):
+                changed[(game_id, market_type)] = None
+        return changed
+
+    def _remove_outcome(self, game_id, market_type, name):
+        # Empty markets and games go with their last outcome
+        del self.outcomes[(game_id, market_type, name)]
+        names = self.markets[(game_id, market_type)]
+        del names[name]
+        if names:
+            return
+        del self.markets[(game_id, market_type)]
+        del self.game_markets[game_id][market_type]
+        self.arbitrages.pop((game_id, market_type), None)
+        if not self.game_markets[game_id]:
+            del self.game_markets[game_id], self.games[game_id], self.starts[game_id]
+
+    def _update_arbitrage(self, game_id, market_type):
+        names = self.markets[(game_id, market_type)]
+        if len(names) < 2:
+            self.arbitrages.pop((game_id, market_type), None)
+            return
+        legs = {name: self.outcomes[(game_id, market_type, name)].best for name in names}
+        total = sum(1.0 / leg.price for leg in legs.values())
+        if total < 1.0 and points_compatible(market_type, legs):
+            stakes = {name: (1.0 / leg.price) / total for name, leg in legs.items()}
+            self.arbitrages[(game_id, market_type)] = Arbitrage(game_id, market_type, legs, stakes, 1.0 / total - 1.0)
+        else:
+            self.arbitrages.pop((game_id, market_type), None)
+
+    def best_line(self, game_id, market_type, name):
+        """
+        Highest price on offer for an outcome.
+
+        Returns:
+            BestLine: (bookmaker, price, point), or None for an unknown outcome.
+        """
+        lines = self.outcomes.get((game_id, market_type, name))
+        return lines.best if lines is not None else None
+
+    def consensus(self, game_id, market_type, name):
+        """
+        Mean point and price of an outcome over the books quoting it.
+        """
+        lines = self.outcomes.get((game_id, market_type, name))
+        return lines.consensus() if lines is not None else None
+
+    def book_lines(self, game_id, market_type, name):
+        """
+        Every book's (price, point) for an outcome.
+        """
+        lines = self.outcomes.get((game_id, market_type, name))
+        with self._lock:
+            return dict(lines.books) if lines is not None else {}
+
+    def arbitrage(self, game_id, market_type):
+        """
+        Current arbitrage on a market: best line, stake share and guaranteed
+        profit per unit staked, or None.
+        """
+        return self.arbitrages.get((game_id, market_type))
+
+    def all_arbitrages(self):
+        with self._lock:
+            return sorted(self.arbitrages.values(), key=lambda arbitrage: -arbitrage.profit)
+
+    def describe(self, game_id):
+        """
+        JSON-ready best line and consensus of every outcome of a game.
+        """
+        with self._lock:
+            if game_id not in self.games:
+                return None
+            markets = {}
+            for market_type in self.game_markets[game_id]:
+                names = self.markets[(game_id, market_type)]
+                arbitrage = self.arbitrages.get((game_id, market_type))
+                markets[market_type] = {
+                    "outcomes": {
+                        name: {
+                            "best": self.outcomes[(game_id, market_type, name)].best._asdict(),
+                            "consensus": self.outcomes[(game_id, market_type, name)].consensus()._asdict(),
+                        }
+                        for name in names
+                    },
+                    "arbitrage_profit": arbitrage.profit if arbitrage else None,
+                }
+            return dict(self.games[game_id], game_id=game_id, markets=markets)
+
+    def remove_game(self, game_id):
+        """
+        Drop a game (e.g. once it has started) and all its lines.
+        """
+        with self._lock:
+            self.games.pop(game_id, None)
+            self.starts.pop(game_id, None)
+            for market_type in self.game_markets.pop(game_id, ()):
+                for name in self.markets.pop((game_id, market_type)):
+                    self.outcomes.pop((game_id, market_type, name), None)
+                self.arbitrages.pop((game_id, market_type), None)
+
+    def remove_started(self, now=None):
+        """
+        Drop every game whose commence_time is at or before `now` (default:
+        the current UTC time).
+
+        Returns:
+            list: Ids of the removed games.
+        """
+        now = now or pd.Timestamp.now(tz="UTC")
+        with self._lock:
+            started = [game_id for game_id, start in self.starts.items() if start is not None and start <= now]
+        for game_id in started:
+            self.remove_game(game_id)
+        return started
+
+    def to_frame(self):
+        """
+        Current board in the odds layout, e.g. for `portfolio.evaluate_slate`.
+        """
+        with self._lock:
+            rows = [
+                (game_id, *self.games[game_id].values(), bookmaker, market_type, name, price, point)
+                for (game_id, market_type, name), lines in self.outcomes.items()
+                for bookmaker, (price, point) in lines.books.items()
+            ]
+        df = pd.DataFrame(rows, columns=LINE_COLUMNS)
+        df["point"] = pd.to_numeric(df["point"])
+        return df
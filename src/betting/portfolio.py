@@ -0,0 +1,260 @@
+"""
+Slate-wide bet evaluation and fractional-Kelly stake sizing.
+
+Every bookmaker line of a slate is one array element: the model's predicted
+home margin (and optionally the total) is turned into a win probability for
+the line's outcome, compared with the book's vig-free probability and
+price, and the best line of each game market is sized with fractional Kelly
+under per-bet, per-game, per-group and slate-wide exposure caps. All steps
+are array operations over the whole slate, so a full day across every book
+takes a few milliseconds.
+
+    python src/betting/portfolio.py predictions.csv --odds data/raw/basketball_nba_odds.csv --sport nba
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+
+MARKETS = ("spreads", "totals", "h2h")
+SPREADS, TOTALS, H2H = range(len(MARKETS))
+
+# Standard deviation of the actual result around the predicted one, in points
+MARGIN_SIGMA = {"nba": 12.0, "nfl": 13.5}
+TOTAL_SIGMA = {"nba": 18.0, "nfl": 10.0}
+
+# Stake sizing, as fractions of the bankroll
+KELLY_FRACTION = 0.25
+MAX_BET = 0.02
+MAX_GAME_EXPOSURE = 0.03
+MAX_GROUP_EXPOSURE = 0.06
+MAX_TOTAL_EXPOSURE = 0.20
+MIN_EDGE = 0.0
+
+
+def denormalize(score_diff, low, high):
+    """
+    Map a [0, 1]-normalized score_diff prediction (see
+    `data_combining.normalize_columns`) back to points.
+    """
+    return low + np.asarray(score_diff, dtype=np.float64) * (high - low)
+
+
+def group_sums(values, groups, n_groups=None):
+    return np.bincount(groups, weights=values, minlength=n_groups or 0)
+
+
+def group_codes(labels):
+    """
+    Integer id of each correlation group label; unlabeled (missing) entries
+    each get a group of their own instead of sharing one.
+    """
+    codes = pd.factorize(labels)[0]
+    missing = codes < 0
+    codes[missing] = codes.max(initial=-1) + 1 + np.arange(missing.sum())
+    return codes
+
+
+def fair_probabilities(price, market_group):
+    """
+    Implied and vig-free probability of each line.
+
+    The implied probabilities of one bookmaker's outcomes for a game market
+    add up to more than 1 by the vig; dividing by that sum removes it.
+
+    Args:
+        price (ndarray): Decimal odds per line.
+        market_group (ndarray): Integer id of the (game, bookmaker, market)
+            each line belongs to.
+
+    Returns:
+        tuple: (implied probability, fair probability), per line.
+    """
+    implied = 1.0 / price
+    overround = group_sums(implied, market_group)
+    return implied, implied / overround[market_group]
+
+
+def win_probabilities(market, side, point, margin, total=None, margin_sigma=12.0, total_sigma=18.0):
+    """
+    Probability that each line wins, treating the result as normally
+    distributed around the prediction. Pushes are ignored.
+
+        spreads: P(side * margin + point > 0)
+        h2h:     P(side * margin > 0)
+        totals:  P(side * (total - point) > 0)
+
+    Args:
+        market (ndarray): SPREADS, TOTALS or H2H per line.
+        side (ndarray): +1 for the home team or the over, -1 for the away
+            team or the under.
+        point (ndarray): Line point (the outcome's own spread, or the total).
+        margin (ndarray): Predicted home margin of the line's game.
+        total (ndarray, optional): Predicted total points of the line's
+            game; totals lines are NaN without it.
+        margin_sigma, total_sigma (float or ndarray): Result standard deviations.
+
+    Returns:
+        ndarray: Win probability per line.
+    """
+    point = np.nan_to_num(point)
+    z = np.where(market == SPREADS, side * margin + point, side * margin) / margin_sigma
+    if total is not None:
+        z = np.where(market == TOTALS, side * (total - point) / total_sigma, z)
+    else:
+        z = np.where(market == TOTALS, np.nan, z)
+    return ndtr(z)
+
+
+def kelly_fractions(probability, price, fraction=KELLY_FRACTION):
+    """
+    Fractional Kelly stake of each line on its own: fraction * edge / (price - 1),
+    zero for lines without an edge.
+    """
+    edge = probability * price - 1
+    return fraction * np.maximum(np.nan_to_num(edge, nan=0.0), 0) / (price - 1)
+
+
+def best_per_group(score, groups):
+    """
+    Mask of the highest-`score` element of each group (ties: first element).
+    """
+    order = np.lexsort((-np.nan_to_num(score, nan=-np.inf), groups))
+    first = np.r_[True, groups[order][1:] != groups[order][:-1]]
+    mask = np.zeros(len(groups), dtype=bool)
+    mask[order[first]] = True
+    return mask
+
+
+def cap_exposure(stakes, groups, cap):
+    """
+    Scale the stakes of every group whose total exceeds `cap` down to it,
+    keeping their Kelly proportions.
+    """
+    totals = group_sums(stakes, groups)
+    scale = np.minimum(1.0, cap / np.maximum(totals, 1e-300))
+    return stakes * scale[groups]
+
+
+def allocate(probability, price, game, group=None, fraction=KELLY_FRACTION, max_bet=MAX_BET,
+             max_game_exposure=MAX_GAME_EXPOSURE, max_group_exposure=MAX_GROUP_EXPOSURE,
+             max_total_exposure=MAX_TOTAL_EXPOSURE):
+    """
+    Size a set of bets as fractions of the bankroll.
+
+    Bets on one game move together, as do games in one correlation group
+    (e.g. the same team or time slot), so their combined stakes are capped
+    like a single position. Each cap scales its bets proportionally, from
+    the single bet out to the whole slate.
+
+    Args:
+        probability, price (ndarray): Win probability and decimal odds per bet.
+        game (ndarray): Integer game id per bet.
+        group (ndarray, optional): Integer correlation group per bet.
+
+    Returns:
+        ndarray: Stake per bet, as a fraction of the bankroll.
+    """
+    stakes = np.minimum(kelly_fractions(probability, price, fraction), max_bet)
+    stakes = cap_exposure(stakes, game, max_game_exposure)
+    if group is not None:
+        stakes = cap_exposure(stakes, group, max_group_exposure)
+    total = stakes.sum()
+    if total > max_total_exposure:
+        stakes *= max_total_exposure / total
+    return stakes
+
+
+def evaluate_slate(lines, predictions, sport="nba", bankroll=1.0, min_edge=MIN_EDGE, **caps):
+    """
+    Evaluate every line of a slate and size the bets.
+
+    Args:
+        lines (DataFrame): Odds board in the `fetch_odds` layout, e.g. `LineIndex.to_frame()`
+            (home_team, away_team, bookmaker, market_type, name, price, point).
+        predictions (DataFrame): One row per game with home_team, away_team,
+            margin (predicted home margin in points) and optionally total and
+            group (correlation group label; games without one are not
+            grouped with any other).
+        sport (str): Selects the default result standard deviations.
+        bankroll (float): Stakes are returned in these units.
+        min_edge (float): Only lines with a larger expected return are bet.
+        **caps: Overrides for `allocate` (fraction, max_bet, ...).
+
+    Returns:
+        DataFrame: `lines` (for predicted games and known markets) with implied_prob, fair_prob,
+        fair_price, model_prob, edge, kelly and stake columns; stake is zero
+        except for the best line of each game market.
+    """
+    games = predictions.reset_index(drop=True)
+    game_index = pd.Series(np.arange(len(games)), index=pd.MultiIndex.from_frame(games[["home_team", "away_team"]]))
+    game = game_index.reindex(pd.MultiIndex.from_frame(lines[["home_team", "away_team"]])).to_numpy()
+    known = ~np.isnan(game) & lines["market_type"].isin(MARKETS).to_numpy()
+    slate = lines[known].reset_index(drop=True)
+    game = game[known].astype(np.intp)
+
+    market = pd.Categorical(slate["market_type"], categories=MARKETS).codes
+    name = slate["name"].to_numpy()
+    side = np.where(
+        market == TOTALS,
+        np.where(name == "Over", 1, -1),
+        np.where(name == slate["home_team"].to_numpy(), 1, -1),
+    )
+    price = slate["price"].to_numpy(dtype=np.float64)
+    point = slate["point"].to_numpy(dtype=np.float64)
+
+    market_group = slate.groupby(["home_team", "away_team", "bookmaker", "market_type"], sort=False).ngroup().to_numpy()
+    implied, fair = fair_probabilities(price, market_group)
+    total = games["total"].to_numpy(dtype=np.float64)[game] if "total" in games else None
+    probability = win_probabilities(
+        market, side, point, games["margin"].to_numpy(dtype=np.float64)[game], total,
+        MARGIN_SIGMA.get(sport, 12.0), TOTAL_SIGMA.get(sport, 18.0),
+    )
+    edge = probability * price - 1
+
+    # One bet per game market: the line (book and side) with the largest edge
+    selected = best_per_group(edge, game * len(MARKETS) + market) & (edge > min_edge)
+    group = group_codes(games["group"])[game] if "group" in games else None
+    stakes = np.zeros(len(slate))
+    stakes[selected] = allocate(
+        probability[selected], price[selected], game[selected],
+        group[selected] if group is not None else None, **caps,
+    )
+
+    return slate.assign(
+        implied_prob=implied,
+        fair_prob=fair,
+        fair_price=1.0 / fair,
+        model_prob=probability,
+        edge=edge,
+        kelly=kelly_fractions(probability, price, caps.get("fraction", KELLY_FRACTION)),
+        stake=stakes * bankroll,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Size bets for a slate from model predictions and an odds board.")
+    parser.add_argument("predictions", help="CSV with home_team, away_team, margin[, total, group]")
+    parser.add_argument("--odds", default=os.path.join(PROJECT_ROOT, "data", "raw", "basketball_nba_odds.csv"))
+    parser.add_argument("--sport", default="nba", choices=sorted(MARGIN_SIGMA))
+    parser.add_argument("--bankroll", type=float, default=1000.0)
+    parser.add_argument("--kelly-fraction", type=float, default=KELLY_FRACTION)
+    args = parser.parse_args()
+
+    lines = pd.read_csv(args.odds)
+    predictions = pd.read_csv(args.predictions)
+    start = time.perf_counter()
+    result = evaluate_slate(lines, predictions, args.sport, args.bankroll, fraction=args.kelly_fraction)
+    elapsed = time.perf_counter() - start
+
+    bets = result[result["stake"] > 0].sort_values("stake", ascending=False)
+    columns = ["home_team", "away_team", "bookmaker", "market_type", "name", "price", "point",
+               "fair_price", "model_prob", "edge", "stake"]
+    print(bets[columns].to_string(index=False, float_format=lambda value: f"{value:.3f}"))
+    print(f"\n{len(result)} lines, {len(bets)} bets, {bets['stake'].sum():.2f} staked of {args.bankroll:.2f} "
+          f"({elapsed * 1000:.1f} ms)")
@@ -1,6 +1,8 @@
 import pandas as pd
 import os
 from rapidfuzz import process
+from profiling import profile_stage
+from player_index import PlayerIndex, injury_impact, matches_path, resolve_injuries
 
 # Define directories relative to the project root
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -8,6 +10,38 @@ DATA_DIR = os.path.join(PROJECT_ROOT, "data", "raw")
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, "data", "processed")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Rows read per chunk in streaming mode; unset keeps the in-memory merges
+CHUNK_SIZE = int(os.environ.get("PIPELINE_CHUNK_SIZE", 0)) or None
+
+def iter_partitions(file_path, partition_col, chunksize, **read_csv_kwargs):
+    """
+    Stream a CSV that is sorted by `partition_col` (e.g. season) and yield one
+    complete partition at a time.
+
+    Rows are read `chunksize` at a time; the trailing partition of each chunk is
+    held back until the next chunk shows it is complete, so memory is bounded
+    by one chunk plus one partition.
+    """
+    carry = None
+    for chunk in pd.read_csv(file_path, chunksize=chunksize, **read_csv_kwargs):
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        last_key = chunk[partition_col].iloc[-1]
+        is_last = (chunk[partition_col] == last_key).to_numpy()
+        carry = chunk[is_last]
+        complete = chunk[~is_last]
+        for _, partition in complete.groupby(partition_col, sort=False):
+            yield partition.reset_index(drop=True)
+    if carry is not None and len(carry) > 0:
+        yield carry.reset_index(drop=True)
+
+def append_to_csv(df, output_path, first):
+    """
+    Write `df` to `output_path`, replacing the file on the first call and
+    appending (without a header) afterwards.
+    """
+    df.to_csv(output_path, mode="w" if first else "a", header=first, index=False)
+
 def standardize_column(df, column_name):
     """
     Standardize a column by stripping whitespace, converting to lowercase, 
@@ -21,6 +55,7 @@ def standardize_column(df, column_name):
     )
     return df
 
+@profile_stage
 def standardize_team_names(df, column_name, team_mapping, valid_teams):
     """
     Standardize team names using a mapping dictionary and fuzzy matching.
@@ -46,6 +81,7 @@ def standardize_team_names(df, column_name, team_mapping, valid_teams):
 
     return df
 
+@profile_stage
 def preprocess_and_standardize_team_columns(df, home_cols, away_cols, team_mapping, valid_teams):
     """
     Preprocess and standardize home and away team columns for consistency.
@@ -88,6 +124,7 @@ def preprocess_and_standardize_team_columns(df, home_cols, away_cols, team_mappi
 
     return df
 
+@profile_stage
 def create_team_mapping():
     """
     Create a dictionary mapping team names and abbreviations to standardized versions.
@@ -188,75 +225,125 @@ def create_team_mapping():
     }
     return team_mapping
 
-def merge_nfl_datasets(team_mapping):
+@profile_stage
+def merge_team_data(scores_path, odds, home_cols, away_cols, team_mapping, valid_teams,
+                    output_path, partition_col, chunksize=None):
+    """
+    Standardize the team scores file and left-join it against the odds table.
+
+    Args:
+        scores_path (str): CSV of historical games, sorted by `partition_col`.
+        odds (DataFrame): Odds table with standardized team columns. It is small
+            and stays in memory as the dimension table for every partition.
+        home_cols (list): Home team column names in the scores file.
+        away_cols (list): Away team column names in the scores file.
+        team_mapping (dict): Mapping dictionary for team names.
+        valid_teams (set): Valid teams for fuzzy matching.
+        output_path (str): Destination CSV.
+        partition_col (str): Season/date column used to partition the stream.
+        chunksize (int, optional): Rows per read. When None the whole file is
+            merged in memory.
+    """
+    keys = ["home_team_combined", "away_team_combined"]
+
+    if chunksize is None:
+        partitions = [pd.read_csv(scores_path)]
+    else:
+        partitions = iter_partitions(scores_path, partition_col, chunksize)
+
+    first = True
+    for team_scores in partitions:
+        team_scores = preprocess_and_standardize_team_columns(
+            team_scores, home_cols=home_cols, away_cols=away_cols,
+            team_mapping=team_mapping, valid_teams=valid_teams
+        )
+        team_data = team_scores.merge(odds, left_on=keys, right_on=keys, how="left")
+        append_to_csv(team_data, output_path, first)
+        first = False
+
+@profile_stage
+def merge_player_data(player_stats, injuries, sport):
+    """
+    Match injury report names to the stats players with a `PlayerIndex`,
+    then write `{sport}_player_data.csv` (stats rows with their player's
+    injury, if any) and `{sport}_injury_impact.csv` (production each team is
+    missing). Earlier matches are reused from `{sport}_player_matches.csv`.
+    """
+    index = PlayerIndex(sport)
+    player_stats = player_stats.assign(player_id=index.add_players(player_stats))
+    index.load_matches(matches_path(sport, OUTPUT_DIR))
+    injuries = resolve_injuries(injuries, index)
+    index.save_matches(matches_path(sport, OUTPUT_DIR))
+    resolved = injuries["player_id"].notna()
+    print(f"Matched {resolved.sum()}/{len(injuries)} {sport.upper()} injury report names "
+          f"({(injuries['match_method'] == 'fuzzy').sum()} fuzzy)")
+
+    injury_impact(injuries, player_stats, sport).to_csv(
+        os.path.join(OUTPUT_DIR, f"{sport}_injury_impact.csv"), index=False
+    )
+
+    player_stats = standardize_column(player_stats, "Player")
+    injuries = standardize_column(injuries, "NAME")
+    injury_columns = injuries.columns.drop(["match_method", "match_score"])
+    injured = injuries.loc[resolved, injury_columns].drop_duplicates("player_id")
+    player_data = player_stats.merge(injured, on="player_id", how="left")
+    player_data.to_csv(os.path.join(OUTPUT_DIR, f"{sport}_player_data.csv"), index=False)
+
+@profile_stage
+def merge_nfl_datasets(team_mapping, chunksize=None):
     valid_nfl_teams = set(team_mapping.keys())
 
     # Load datasets
     player_stats = pd.read_csv(os.path.join(DATA_DIR, "nfl_stats_2000_2024.csv"))
-    team_scores = pd.read_csv(os.path.join(DATA_DIR, "nfl_spreadspoke_scores.csv"))
     injuries = pd.read_csv(os.path.join(DATA_DIR, "nfl_injuries.csv"))
     odds = pd.read_csv(os.path.join(DATA_DIR, "americanfootball_nfl_odds.csv"))
 
-    # Preprocess team columns for team_scores
-    team_scores = preprocess_and_standardize_team_columns(
-        team_scores, home_cols=["team_home"], away_cols=["team_away"], 
-        team_mapping=team_mapping, valid_teams=valid_nfl_teams
-    )
-
     # Preprocess team columns for odds
     odds = preprocess_and_standardize_team_columns(
         odds, home_cols=["home_team"], away_cols=["away_team"], 
         team_mapping=team_mapping, valid_teams=valid_nfl_teams
     )
 
-    # Merge team-level data
-    team_data = team_scores.merge(
-        odds, left_on=["home_team_combined", "away_team_combined"], 
-        right_on=["home_team_combined", "away_team_combined"], how="left"
+    # Standardize team_scores and merge team-level data
+    merge_team_data(
+        os.path.join(DATA_DIR, "nfl_spreadspoke_scores.csv"), odds,
+        home_cols=["team_home"], away_cols=["team_away"],
+        team_mapping=team_mapping, valid_teams=valid_nfl_teams,
+        output_path=os.path.join(OUTPUT_DIR, "nfl_team_data.csv"),
+        partition_col="schedule_season", chunksize=chunksize
     )
-    team_data.to_csv(os.path.join(OUTPUT_DIR, "nfl_team_data.csv"), index=False)
 
-    # Standardize and merge player-level data
-    player_stats = standardize_column(player_stats, "Player")
-    injuries = standardize_column(injuries, "NAME")
-    player_data = player_stats.merge(injuries, left_on="Player", right_on="NAME", how="left")
-    player_data.to_csv(os.path.join(OUTPUT_DIR, "nfl_player_data.csv"), index=False)
+    # Resolve injured players to the stats and merge player-level data
+    merge_player_data(player_stats, injuries, "nfl")
 
     print("NFL datasets merged and saved.")
 
-def merge_nba_datasets(team_mapping):
+@profile_stage
+def merge_nba_datasets(team_mapping, chunksize=None):
     valid_nba_teams = set(team_mapping.keys())
 
     # Load datasets
     player_stats = pd.read_csv(os.path.join(DATA_DIR, "nba_stats_2000_2024.csv"))
-    team_scores = pd.read_csv(os.path.join(DATA_DIR, "nba_2008-2024.csv"))
     injuries = pd.read_csv(os.path.join(DATA_DIR, "nba_injuries.csv"))
     odds = pd.read_csv(os.path.join(DATA_DIR, "basketball_nba_odds.csv"))
 
-    # Preprocess team columns for team_scores
-    team_scores = preprocess_and_standardize_team_columns(
-        team_scores, home_cols=["home"], away_cols=["away"], 
-        team_mapping=team_mapping, valid_teams=valid_nba_teams
-    )
-
     # Preprocess team columns for odds
     odds = preprocess_and_standardize_team_columns(
         odds, home_cols=["home_team"], away_cols=["away_team"], 
         team_mapping=team_mapping, valid_teams=valid_nba_teams
     )
 
-    # Merge team-level data
-    team_data = team_scores.merge(
-        odds, left_on=["home_team_combined", "away_team_combined"], 
-        right_on=["home_team_combined", "away_team_combined"], how="left"
+    # Standardize team_scores and merge team-level data
+    merge_team_data(
+        os.path.join(DATA_DIR, "nba_2008-2024.csv"), odds,
+        home_cols=["home"], away_cols=["away"],
+        team_mapping=team_mapping, valid_teams=valid_nba_teams,
+        output_path=os.path.join(OUTPUT_DIR, "nba_team_data.csv"),
+        partition_col="season", chunksize=chunksize
     )
-    team_data.to_csv(os.path.join(OUTPUT_DIR, "nba_team_data.csv"), index=False)
 
-    # Standardize and merge player-level data
-    player_stats = standardize_column(player_stats, "Player")
-    injuries = standardize_column(injuries, "NAME")
-    player_data = player_stats.merge(injuries, left_on="Player", right_on="NAME", how="left")
-    player_data.to_csv(os.path.join(OUTPUT_DIR, "nba_player_data.csv"), index=False)
+    # Resolve injured players to the stats and merge player-level data
+    merge_player_data(player_stats, injuries, "nba")
 
     print("NBA datasets merged and saved.")
 
@@ -265,7 +352,7 @@ if __name__ == "__main__":
     team_mapping = create_team_mapping()
 
     print("Merging NFL datasets...")
-    merge_nfl_datasets(team_mapping)
+    merge_nfl_datasets(team_mapping, chunksize=CHUNK_SIZE)
 
     print("Merging NBA datasets...")
-    merge_nba_datasets(team_mapping)
+    merge_nba_datasets(team_mapping, chunksize=CHUNK_SIZE)
@@ -1,5 +1,8 @@
 import pandas as pd
 import os
+from cleaner import iter_partitions, append_to_csv
+from profiling import profile_stage
+from ratings import add_rating_features, load_engine, load_rating_games, update_ratings
 
 # Define directories
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -7,6 +10,20 @@ DATA_DIR = os.path.join(PROJECT_ROOT, "data", "processed")
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, "data", "training_data")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Rows read per chunk in streaming mode; unset keeps the in-memory combine
+CHUNK_SIZE = int(os.environ.get("PIPELINE_CHUNK_SIZE", 0)) or None
+
+# Team-level columns imputed with their mean, per sport
+TEAM_FILL_COLUMNS = {
+    "NBA": ["score_home", "score_away", "spread", "total"],
+    "NFL": ["score_home", "score_away", "spread_favorite", "over_under_line"],
+}
+
+# Partition column of each sport's merged team data (see cleaner.merge_team_data)
+SEASON_COLUMNS = {"NBA": "season", "NFL": "schedule_season"}
+
+NORMALIZED_COLUMNS = ["score_home", "score_away", "score_diff"]
+
 def clean_mixed_type_columns(df, column_name):
     """
     Convert mixed type columns to numeric, handling non-numeric values.
@@ -14,18 +31,19 @@ def clean_mixed_type_columns(df, column_name):
     df[column_name] = pd.to_numeric(df[column_name], errors='coerce')
     return df
 
-def handle_missing_values(df, sport, is_team_data=False):
+@profile_stage
+def handle_missing_values(df, sport, is_team_data=False, team_means=None):
     """
     Handle missing values in the dataset.
+
+    `team_means` overrides the per-frame means used for team data, so that
+    chunks of a streamed file are all imputed with the same global values.
     """
     if sport == "NBA":
         if is_team_data:
             # Handle missing values in team data
-            df.fillna({
-                "score_home": df["score_home"].mean(),
-                "score_away": df["score_away"].mean(),
-                "spread": df["spread"].mean(),
-                "total": df["total"].mean(),
+            df.fillna(team_means or {
+                col: df[col].mean() for col in TEAM_FILL_COLUMNS[sport]
             }, inplace=True)
         else:
             # Handle missing values in player data
@@ -43,11 +61,8 @@ def handle_missing_values(df, sport, is_team_data=False):
             df = clean_mixed_type_columns(df, "over_under_line")
 
             # Handle missing values in team data
-            df.fillna({
-                "score_home": df["score_home"].mean(),
-                "score_away": df["score_away"].mean(),
-                "spread_favorite": df["spread_favorite"].mean(),
-                "over_under_line": df["over_under_line"].mean(),
+            df.fillna(team_means or {
+                col: df[col].mean() for col in TEAM_FILL_COLUMNS[sport]
             }, inplace=True)
         else:
             # Handle missing values in player data
@@ -62,15 +77,22 @@ def handle_missing_values(df, sport, is_team_data=False):
             }, inplace=True)
     return df
 
-def normalize_columns(df, columns):
+@profile_stage
+def normalize_columns(df, columns, bounds=None):
     """
     Normalize numerical columns to a range [0, 1].
+
+    `bounds` maps a column to a precomputed (min, max) pair; columns without
+    an entry use the min and max of `df` itself.
     """
+    bounds = bounds or {}
     for col in columns:
         if col in df.columns:
-            df[col] = (df[col] - df[col].min()) / (df[col].max() - df[col].min())
+            col_min, col_max = bounds.get(col, (df[col].min(), df[col].max()))
+            df[col] = (df[col] - col_min) / (col_max - col_min)
     return df
 
+@profile_stage
 def add_derived_features(df, sport):
     """
     Add derived features like score differences and aggregated player stats differences.
@@ -87,6 +109,7 @@ def add_derived_features(df, sport):
         df["Int_diff"] = df["Int"] - df["Int_away"]
     return df
 
+@profile_stage
 def aggregate_player_stats(player_data, sport):
     """
     Aggregate player stats to the team level.
@@ -114,6 +137,7 @@ def aggregate_player_stats(player_data, sport):
         raise ValueError("Sport must be 'NBA' or 'NFL'")
     return agg_stats
 
+@profile_stage
 def combine_team_and_player_data(team_data, player_data, sport):
     """
     Combine team-level and player-level data into one dataset.
@@ -130,33 +154,108 @@ def combine_team_and_player_data(team_data, player_data, sport):
     )
 
     combined_data = add_derived_features(combined_data, sport)
-    combined_data = normalize_columns(combined_data, ["score_home", "score_away", "score_diff"])
+    combined_data = add_rating_features(combined_data, sport.lower())
+    combined_data = normalize_columns(combined_data, NORMALIZED_COLUMNS)
     return combined_data
 
-def process_nba_data():
+@profile_stage
+def compute_team_means(team_data_path, sport, chunksize):
+    """
+    Compute the team-level imputation means in one streaming pass.
+    """
+    columns = TEAM_FILL_COLUMNS[sport]
+    sums = pd.Series(0.0, index=columns)
+    counts = pd.Series(0, index=columns)
+    for chunk in pd.read_csv(team_data_path, usecols=columns, chunksize=chunksize, low_memory=False):
+        chunk = chunk.apply(pd.to_numeric, errors="coerce")
+        sums += chunk.sum()
+        counts += chunk.count()
+    return (sums / counts).to_dict()
+
+@profile_stage
+def combine_team_and_player_data_chunked(team_data_path, player_data, sport, output_path, chunksize):
+    """
+    Streaming version of `combine_team_and_player_data` with bounded memory.
+
+    Map: each season partition of the team data is imputed with global means,
+    joined against the in-memory team aggregates and given derived features,
+    then appended to a partial file while min/max bounds are tracked.
+    Reduce: the partial file is streamed once more to apply the global
+    normalization and written to `output_path`.
+    """
+    team_means = compute_team_means(team_data_path, sport, chunksize)
+    player_stats = aggregate_player_stats(player_data, sport)
+    # Rated games and the engine are read once, not once per partition
+    rating_games = load_rating_games(sport.lower())
+    rating_engine = load_engine(sport.lower()) if rating_games is not None else None
+
+    partial_path = output_path + ".partial"
+    bounds = {}
+    first = True
+    for partition in iter_partitions(team_data_path, SEASON_COLUMNS[sport], chunksize, low_memory=False):
+        partition = handle_missing_values(partition, sport, is_team_data=True, team_means=team_means)
+        combined = partition.merge(
+            player_stats, left_on="home_team_combined", right_on="Team", how="left", suffixes=("", "_home")
+        ).merge(
+            player_stats, left_on="away_team_combined", right_on="Team", how="left", suffixes=("", "_away")
+        )
+        combined = add_derived_features(combined, sport)
+        if rating_games is not None:
+            combined = add_rating_features(combined, sport.lower(), games=rating_games, engine=rating_engine)
+        for col in NORMALIZED_COLUMNS:
+            col_min, col_max = combined[col].min(), combined[col].max()
+            if col in bounds:
+                col_min = min(col_min, bounds[col][0])
+                col_max = max(col_max, bounds[col][1])
+            bounds[col] = (col_min, col_max)
+        append_to_csv(combined, partial_path, first)
+        first = False
+
+    first = True
+    for chunk in pd.read_csv(partial_path, chunksize=chunksize, low_memory=False):
+        chunk = normalize_columns(chunk, NORMALIZED_COLUMNS, bounds)
+        append_to_csv(chunk, output_path, first)
+        first = False
+    os.remove(partial_path)
+
+@profile_stage
+def process_nba_data(chunksize=None):
     print("Processing NBA data...")
-    nba_team_data = pd.read_csv(os.path.join(DATA_DIR, "nba_team_data.csv"))
+    update_ratings("nba")  # Rates only games added since the last run
+    team_data_path = os.path.join(DATA_DIR, "nba_team_data.csv")
+    output_path = os.path.join(OUTPUT_DIR, "nba_training_data.csv")
     nba_player_data = pd.read_csv(os.path.join(DATA_DIR, "nba_player_data.csv"))
-
-    nba_team_data = handle_missing_values(nba_team_data, "NBA", is_team_data=True)
     nba_player_data = handle_missing_values(nba_player_data, "NBA", is_team_data=False)
 
-    training_data = combine_team_and_player_data(nba_team_data, nba_player_data, "NBA")
-    training_data.to_csv(os.path.join(OUTPUT_DIR, "nba_training_data.csv"), index=False)
+    if chunksize is None:
+        nba_team_data = pd.read_csv(team_data_path)
+        nba_team_data = handle_missing_values(nba_team_data, "NBA", is_team_data=True)
+
+        training_data = combine_team_and_player_data(nba_team_data, nba_player_data, "NBA")
+        training_data.to_csv(output_path, index=False)
+    else:
+        combine_team_and_player_data_chunked(team_data_path, nba_player_data, "NBA", output_path, chunksize)
     print(f"Training data saved to {os.path.join(OUTPUT_DIR, 'nba_training_data.csv')}")
 
-def process_nfl_data():
+@profile_stage
+def process_nfl_data(chunksize=None):
     print("Processing NFL data...")
-    nfl_team_data = pd.read_csv(os.path.join(DATA_DIR, "nfl_team_data.csv"))
+    update_ratings("nfl")  # Rates only games added since the last run
+    team_data_path = os.path.join(DATA_DIR, "nfl_team_data.csv")
+    output_path = os.path.join(OUTPUT_DIR, "nfl_training_data.csv")
     nfl_player_data = pd.read_csv(os.path.join(DATA_DIR, "nfl_player_data.csv"))
-
-    nfl_team_data = handle_missing_values(nfl_team_data, "NFL", is_team_data=True)
     nfl_player_data = handle_missing_values(nfl_player_data, "NFL", is_team_data=False)
 
-    training_data = combine_team_and_player_data(nfl_team_data, nfl_player_data, "NFL")
-    training_data.to_csv(os.path.join(OUTPUT_DIR, "nfl_training_data.csv"), index=False)
+    if chunksize is None:
+        nfl_team_data = pd.read_csv(team_data_path)
+        nfl_team_data = handle_missing_values(nfl_team_data, "NFL", is_team_data=True)
+
+        training_data = combine_team_and_player_data(nfl_team_data, nfl_player_data, "NFL")
+        training_data.to_csv(output_path, index=False)
+    else:
+        combine_team_and_player_data_chunked(team_data_path, nfl_player_data, "NFL", output_path, chunksize)
     print(f"Training data saved to {os.path.join(OUTPUT_DIR, 'nfl_training_data.csv')}")
 
 if __name__ == "__main__":
-    process_nba_data()
-    process_nfl_data()
+    process_nba_data(chunksize=CHUNK_SIZE)
+    process_nfl_data(chunksize=CHUNK_SIZE)
@@ -1,70 +1,89 @@
-import requests
+import json
 import pandas as pd
 import os
+import sys
+
+# Allow running this file directly as well as importing it from `src`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from data_gathering.fetch_engine import get_default_engine
+from data_gathering.odds_store import ODDS_COLUMNS, flatten_odds, get_default_store, odds_frame
 
 API_KEY = "cccdf24248e03db3e9d8dd1578a2fea3"
+ODDS_API_URL = os.environ.get("ODDS_API_URL", "https://api.the-odds-api.com")  # Point at a mock server for testing
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "../../data/raw")
 
 
-def fetch_odds(sport="basketball_nba", regions="us", markets=["spreads", "totals", "h2h"]):
+def request_odds(sport="basketball_nba", regions="us", markets=["spreads", "totals", "h2h"], engine=None):
     """
-    Fetch betting odds from TheOddsAPI for specified markets.
+    Request odds from TheOddsAPI through the shared fetch engine (pooled
+    connections, timeouts and retries).
 
-    Args:
-        sport (str): The sport key (e.g., 'basketball_nba' or 'americanfootball_nfl').
-        regions (str): Regions to include (default is 'us').
-        markets (list): List of markets to fetch (e.g., 'spreads', 'totals', 'h2h').
+    Returns:
+        FetchResult: Raw response; its headers carry the API quota counters.
     """
-    url = f"https://api.the-odds-api.com/v4/sports/{sport}/odds/"
+    engine = engine or get_default_engine()
+    url = f"{ODDS_API_URL}/v4/sports/{sport}/odds/"
     params = {
         "apiKey": API_KEY,
         "regions": regions,
         "markets": ",".join(markets),
         "oddsFormat": "decimal"
     }
+    return engine.get(url, params=params)
+
+
+def ingest_odds(sport, data, store=None, write_csv=True, fetched_at=None):
+    """
+    Flatten an odds response, append the changed lines to the history store
+    and optionally rewrite the current-board CSV.
+
+    Returns:
+        tuple: (full snapshot DataFrame, changed lines DataFrame)
+    """
+    fetched_at = fetched_at or pd.Timestamp.now(tz="UTC")
+    snapshot = odds_frame(flatten_odds(data))
+
+    store = store or get_default_store()
+    changes = store.append_snapshot(sport, snapshot, fetched_at)
+    print(f"{len(changes)} of {len(snapshot)} {sport} lines changed since the last poll")
 
-    response = requests.get(url, params=params)
+    if write_csv:
+        output_path = os.path.join(OUTPUT_DIR, f"{sport}_odds.csv")
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        snapshot[ODDS_COLUMNS].to_csv(output_path, index=False)
+        print(f"Odds data saved to {output_path}")
+    return snapshot, changes
+
+
+def fetch_odds(sport="basketball_nba", regions="us", markets=["spreads", "totals", "h2h"], store=None,
+               write_csv=True, engine=None):
+    """
+    Fetch betting odds from TheOddsAPI for specified markets.
+
+    Every call appends the lines that moved since the previous poll to the
+    odds history store; the full current board is also written to
+    `{sport}_odds.csv` for the cleaner unless `write_csv` is False.
+
+    Args:
+        sport (str): The sport key (e.g., 'basketball_nba' or 'americanfootball_nfl').
+        regions (str): Regions to include (default is 'us').
+        markets (list): List of markets to fetch (e.g., 'spreads', 'totals', 'h2h').
+        store (OddsStore, optional): History store; defaults to the process-wide
+            store over data/odds_history.
+        write_csv (bool): Whether to rewrite the current-board CSV.
+        engine (FetchEngine, optional): Engine to fetch with; defaults to the shared engine.
+
+    Returns:
+        DataFrame: Lines that changed since the last poll, or None on failure.
+    """
+    response = request_odds(sport, regions, markets, engine)
 
     if response.status_code != 200:
-        print("Failed to fetch odds:", response.json())
+        print("Failed to fetch odds:", response.content.decode("utf-8", errors="replace"))
         return
 
-    data = response.json()
-
-    # Process data into a structured format
-    results = []
-    for game in data:
-        home_team = game.get("home_team")
-        away_team = game.get("away_team")
-        commence_time = game.get("commence_time")
-        bookmakers = game.get("bookmakers", [])
-
-        for bookmaker in bookmakers:
-            bookmaker_name = bookmaker.get("title")
-            markets = bookmaker.get("markets", [])
-
-            for market in markets:
-                market_type = market.get("key")  # 'spreads', 'totals', 'h2h'
-                outcomes = market.get("outcomes", [])
-
-                for outcome in outcomes:
-                    results.append({
-                        "commence_time": commence_time,
-                        "home_team": home_team,
-                        "away_team": away_team,
-                        "bookmaker": bookmaker_name,
-                        "market_type": market_type,
-                        "name": outcome.get("name"),  # Team or total
-                        "price": outcome.get("price"),  # Decimal odds
-                        "point": outcome.get("point")  # Spread/total line (if applicable)
-                    })
-
-    # Convert to DataFrame and save
-    df = pd.DataFrame(results)
-    output_path = os.path.join(OUTPUT_DIR, f"{sport}_odds.csv")
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    df.to_csv(output_path, index=False)
-    print(f"Odds data saved to {output_path}")
+    _, changes = ingest_odds(sport, json.loads(response.content), store, write_csv)
+    return changes
 
 
 if __name__ == "__main__":
@@ -0,0 +1,204 @@
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from data_gathering.http_cache import ResponseCache
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+# Polite defaults for the reference sites; Sports Reference allows ~20 requests/minute
+DEFAULT_HOST_LIMITS = {
+    "www.basketball-reference.com": {"min_interval": 3.0, "max_concurrency": 2},
+    "www.pro-football-reference.com": {"min_interval": 3.0, "max_concurrency": 2},
+    "www.espn.com": {"min_interval": 1.0, "max_concurrency": 2},
+}
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Serve scraper requests from the response cache only, without touching the network
+OFFLINE = os.environ.get("SCRAPER_OFFLINE", "") not in ("", "0")
+
+FetchResult = namedtuple("FetchResult", ["url", "status_code", "content", "headers", "from_cache"])
+
+
+class HostLimiter:
+    """
+    Caps concurrent requests to one host and spaces request starts at least
+    `min_interval` seconds apart.
+    """
+
+    def __init__(self, min_interval=0.0, max_concurrency=4):
+        self.min_interval = min_interval
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def wait_turn(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+    def push_back(self, delay):
+        """
+        Delay every later request to this host, e.g. after a 429.
+        """
+        with self._lock:
+            self._next_start = max(self._next_start, time.monotonic() + delay)
+
+
+class FetchEngine:
+    """
+    Thread-pooled HTTP fetcher shared by the scrapers.
+
+    One `requests.Session` provides the connection pool; each host gets its
+    own rate limit and concurrency cap, and failed requests are retried with
+    exponential backoff.
+
+    Args:
+        max_workers (int): Threads used by `fetch_many`.
+        timeout (float or tuple): Connect/read timeout passed to requests.
+        retries (int): Retries after the first attempt for connection errors,
+            timeouts and retryable status codes.
+        backoff (float): Base delay in seconds; attempt n waits backoff * 2**n.
+        host_limits (dict): Host -> {'min_interval', 'max_concurrency'}.
+        default_limit (dict): Limit for hosts missing from `host_limits`.
+        headers (dict): Headers sent with every request.
+        cache (ResponseCache, optional): Response cache consulted by requests
+            that pass a cache policy.
+        offline (bool): Answer cached requests from the cache only; misses
+            return a 504 result instead of going to the network.
+    """
+
+    def __init__(self, max_workers=8, timeout=(5, 30), retries=3, backoff=1.0,
+                 host_limits=None, default_limit=None, headers=None, cache=None, offline=False):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.host_limits = DEFAULT_HOST_LIMITS if host_limits is None else host_limits
+        self.default_limit = default_limit or {"min_interval": 0.0, "max_concurrency": 4}
+        self.cache = cache
+        self.offline = offline
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS if headers is None else headers)
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._limiters = {}
+        self._limiters_lock = threading.Lock()
+
+    def _limiter(self, host):
+        with self._limiters_lock:
+            if host not in self._limiters:
+                self._limiters[host] = HostLimiter(**self.host_limits.get(host, self.default_limit))
+            return self._limiters[host]
+
+    def get(self, url, params=None, headers=None, cache_policy=None):
+        """
+        GET `url`, honouring the host limits and retrying transient failures.
+
+        With a `cache_policy` and a configured cache, fresh entries are served
+        from disk, stale ones are revalidated with a conditional request, and
+        successful responses are stored.
+
+        Returns:
+            FetchResult: The final response. Connection errors that persist past
+            the last retry are re-raised.
+        """
+        if self.cache is None or cache_policy is None:
+            return self._fetch(url, params, headers)
+
+        full_url = requests.Request("GET", url, params=params).prepare().url
+        cached = self.cache.lookup(full_url)
+        if cached is not None:
+            meta, content = cached
+            if self.offline or self.cache.is_fresh(meta, cache_policy):
+                return FetchResult(full_url, 200, content, {"Content-Type": meta.get("content_type")}, True)
+            headers = dict(headers or {}, **self.cache.conditional_headers(meta))
+        elif self.offline:
+            print(f"Offline and {full_url} is not cached")
+            return FetchResult(full_url, 504, b"", {}, True)
+
+        result = self._fetch(full_url, None, headers)
+        if result.status_code == 304 and cached is not None:
+            self.cache.mark_validated(meta, cache_policy, result.headers)
+            return FetchResult(full_url, 200, content, result.headers, True)
+        if result.status_code == 200:
+            self.cache.store(full_url, result.content, result.headers, cache_policy)
+        return result
+
+    def _fetch(self, url, params=None, headers=None):
+        limiter = self._limiter(urlsplit(url).netloc)
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            error = None
+            with limiter.semaphore:
+                limiter.wait_turn()
+                try:
+                    response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    if last_attempt:
+                        raise
+                    error = e
+
+            if error is not None:
+                # Back off outside the semaphore so other requests to the host can use the slot
+                print(f"Request to {url} failed ({error}); retrying...")
+                time.sleep(self.backoff * 2 ** attempt)
+                continue
+
+            if response.status_code in RETRY_STATUS_CODES and not last_attempt:
+                retry_after = response.headers.get("Retry-After", "")
+                delay = float(retry_after) if retry_after.isdigit() else self.backoff * 2 ** attempt
+                print(f"Request to {url} returned {response.status_code}; retrying in {delay:.1f}s...")
+                limiter.push_back(delay)
+                continue
+
+            return FetchResult(url, response.status_code, response.content, response.headers, False)
+
+    def map(self, func, items):
+        """
+        Apply `func` to every item on the engine's thread pool, preserving order.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(func, items))
+
+    def fetch_many(self, urls):
+        return self.map(self.get, urls)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_default_engine = None
+_default_engine_lock = threading.Lock()
+
+
+def get_default_engine():
+    """
+    Engine shared by scraper calls that do not pass one explicitly.
+    """
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is None:
+            _default_engine = FetchEngine(cache=ResponseCache(), offline=OFFLINE)
+        return _default_engine
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import namedtuple
+from datetime import datetime
+
+CACHE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../data/cache/http"))
+
+# Seconds before a current-season or injury page is revalidated with the origin
+CURRENT_SEASON_TTL = float(os.environ.get("SCRAPER_CURRENT_SEASON_TTL", 6 * 3600))
+INJURY_TTL = float(os.environ.get("SCRAPER_INJURY_TTL", 3600))
+
+# since: immutable entries are only trusted if the origin confirmed them after
+# this epoch time (e.g. the end of the season); None trusts every entry
+CachePolicy = namedtuple("CachePolicy", ["ttl", "immutable", "since"], defaults=[None])
+
+# Pages that never change are served from disk forever
+IMMUTABLE = CachePolicy(ttl=None, immutable=True)
+
+
+def ttl_policy(ttl):
+    return CachePolicy(ttl=ttl, immutable=False)
+
+
+def season_policy(season_end):
+    """
+    Cache policy for a season page: revalidated after `CURRENT_SEASON_TTL`
+    while the season is being played, and kept forever once it is over.
+    A copy cached before `season_end` is a mid-season snapshot, so it is
+    revalidated once before it is kept.
+
+    Args:
+        season_end (date): Day after which the season's pages stop changing.
+    """
+    end = datetime.combine(season_end, datetime.min.time()).timestamp()
+    if time.time() <= end:
+        return ttl_policy(CURRENT_SEASON_TTL)
+    return CachePolicy(ttl=None, immutable=True, since=end)
+
+
+class ResponseCache:
+    """
+    On-disk store of successful GET responses keyed by the full request URL.
+
+    Each entry is a body file plus a small JSON file holding the validators
+    (ETag, Last-Modified) and timestamps used for freshness checks.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return base + ".body", base + ".json"
+
+    def lookup(self, url):
+        """
+        Returns:
+            tuple: (metadata dict, body bytes), or None on a miss.
+        """
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                content = f.read()
+        except (OSError, ValueError):
+            return None
+        return meta, content
+
+    def is_fresh(self, meta, policy):
+        if policy.immutable:
+            return policy.since is None or meta["validated_at"] > policy.since
+        if policy.ttl is None:
+            return False
+        return time.time() - meta["validated_at"] < policy.ttl
+
+    def conditional_headers(self, meta):
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def store(self, url, content, headers, policy):
+        now = time.time()
+        meta = {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "content_type": headers.get("Content-Type"),
+            "fetched_at": now,
+            "validated_at": now,
+            "immutable": policy.immutable,
+        }
+        body_path, meta_path = self._paths(url)
+        self._write_atomic(body_path, content)
+        self._write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def mark_validated(self, meta, policy, headers=None):
+        """
+        Record a 304 revalidation so the entry is fresh for another TTL,
+        taking any new validators the 304 carries.
+        """
+        meta = dict(meta, validated_at=time.time(), immutable=policy.immutable)
+        for key, header in (("etag", "ETag"), ("last_modified", "Last-Modified")):
+            if headers and headers.get(header):
+                meta[key] = headers[header]
+        _, meta_path = self._paths(meta["url"])
+        self._write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def _write_atomic(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
@@ -1,37 +1,38 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
 import os
+import sys
+
+# Allow running this file directly as well as importing it from `src`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from data_gathering.fetch_engine import get_default_engine
+from data_gathering.http_cache import INJURY_TTL, ttl_policy
+from data_gathering.table_extractor import extract_table
 
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "../../data/raw")
+BASE_URL = "https://www.espn.com"
 
-def scrape_injury_data_with_headers(sport):
+def scrape_injury_data_with_headers(sport, engine=None, base_url=BASE_URL):
     """
     Scrape injury data for NFL or NBA using headers to mimic a browser.
 
     Args:
         sport (str): 'nfl' or 'nba'
+        engine (FetchEngine, optional): Engine to fetch with; its session sends
+            the browser User-Agent. Defaults to the shared engine.
+        base_url (str): Site root, overridable to point at a stub server.
     """
-    base_url = f"https://www.espn.com/{sport}/injuries"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
-
-    response = requests.get(base_url, headers=headers)
+    engine = engine or get_default_engine()
+    response = engine.get(f"{base_url}/{sport}/injuries", cache_policy=ttl_policy(INJURY_TTL))
     if response.status_code != 200:
         print(f"Failed to retrieve injury data for {sport}. Status Code: {response.status_code}")
         return
 
-    soup = BeautifulSoup(response.content, "html.parser")
-    injury_table = soup.find("table", {"class": "Table"})
+    # Extract table data into a DataFrame
+    df = extract_table(response.content, css_class="Table")
 
-    if not injury_table:
+    if df is None:
         print(f"No injury table found for {sport}.")
         return
 
-    # Extract table data into a DataFrame
-    df = pd.read_html(str(injury_table))[0]
-
     # Save the DataFrame to CSV
     output_path = os.path.join(OUTPUT_DIR, f"{sport}_injuries.csv")
     os.makedirs(OUTPUT_DIR, exist_ok=True)
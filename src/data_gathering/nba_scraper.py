@@ -1,25 +1,31 @@
-import requests
-from bs4 import BeautifulSoup
 import pandas as pd
 import os
+import sys
+from datetime import date
+
+# Allow running this file directly as well as importing it from `src`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from data_gathering.fetch_engine import get_default_engine
+from data_gathering.http_cache import season_policy
+from data_gathering.table_extractor import extract_table
 
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "../../data/raw")
+BASE_URL = "https://www.basketball-reference.com"
 
-def scrape_nba_stats(year):
+def scrape_nba_stats(year, engine=None, base_url=BASE_URL):
     """Scrape NBA player statistics from Basketball Reference for a given year."""
-    url = f"https://www.basketball-reference.com/leagues/NBA_{year}_totals.html"
-    response = requests.get(url)
+    engine = engine or get_default_engine()
+    url = f"{base_url}/leagues/NBA_{year}_totals.html"
+    season_end = date(year, 7, 1)  # Finals end in June
+    response = engine.get(url, cache_policy=season_policy(season_end))
 
     if response.status_code != 200:
         print(f"Failed to retrieve data for {year}")
         return None
 
-    soup = BeautifulSoup(response.content, "lxml")
-    table = soup.find("table", {"id": "totals_stats"})
-
-    # Convert the table to a pandas DataFrame
-    if table:
-        df = pd.read_html(str(table))[0]
+    # Parse the table straight into a DataFrame
+    df = extract_table(response.content, table_id="totals_stats")
+    if df is not None:
         df = df.dropna(subset=["Player"])  # Drop rows without player names
         df = df[df["Player"] != "Player"]  # Filter out repeated headers
         df["Year"] = year  # Add a year column to distinguish data
@@ -28,15 +34,20 @@ def scrape_nba_stats(year):
         print(f"No data table found for {year}")
         return None
 
-if __name__ == "__main__":
-    combined_data = []
+def scrape_nba_seasons(years, engine=None, base_url=BASE_URL):
+    """
+    Scrape several seasons concurrently on the engine's thread pool.
 
-    for year in range(2000, 2025):  # Scrape data from 2000 to 2024
-        print(f"Scraping data for {year}...")
-        yearly_data = scrape_nba_stats(year)
+    Returns:
+        list: One DataFrame per successfully scraped season, in `years` order.
+    """
+    engine = engine or get_default_engine()
+    results = engine.map(lambda year: scrape_nba_stats(year, engine, base_url), years)
+    return [df for df in results if df is not None]
 
-        if yearly_data is not None:
-            combined_data.append(yearly_data)
+if __name__ == "__main__":
+    print("Scraping NBA data for 2000-2024...")
+    combined_data = scrape_nba_seasons(range(2000, 2025))  # Scrape data from 2000 to 2024
 
     if combined_data:
         # Concatenate all yearly DataFrames into one
@@ -0,0 +1,184 @@
+import asyncio
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+# Allow running this file directly as well as importing it from `src`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from data_gathering.api_fetcher import ingest_odds, request_odds
+from data_gathering.fetch_engine import FetchEngine
+from data_gathering.odds_store import get_default_store
+
+# (seconds until the next game starts, poll interval in seconds), checked in order
+POLL_SCHEDULE = [
+    (30 * 60, 60),
+    (3 * 3600, 5 * 60),
+    (24 * 3600, 30 * 60),
+]
+DISTANT_INTERVAL = 3 * 3600  # No game within a day
+RETRY_INTERVAL = 60  # After a failed poll
+
+# Below this many remaining requests, intervals are stretched to save quota
+QUOTA_LOW_WATER = 50
+QUOTA_BACKOFF = 4
+
+
+def poll_interval(commence_times, now=None):
+    """
+    Seconds to wait before polling a board whose upcoming games start at
+    `commence_times` (ISO strings). Games already under way are ignored.
+    """
+    now = now or pd.Timestamp.now(tz="UTC")
+    starts = pd.to_datetime(pd.Series(commence_times, dtype=object), utc=True, errors="coerce")
+    seconds_ahead = (starts - now).dt.total_seconds()
+    seconds_ahead = seconds_ahead[seconds_ahead > 0]
+    if seconds_ahead.empty:
+        return DISTANT_INTERVAL
+    nearest = seconds_ahead.min()
+    for horizon, interval in POLL_SCHEDULE:
+        if nearest <= horizon:
+            return interval
+    return DISTANT_INTERVAL
+
+
+class QuotaTracker:
+    """
+    Tracks TheOddsAPI usage from the x-requests-* response headers, which are
+    shared by every sport polled with the same key. Responses without the
+    headers (e.g. errors from a proxy) keep the last known values.
+    """
+
+    def __init__(self):
+        self.remaining = None
+        self.used = None
+        self.last_cost = None
+
+    def update(self, headers):
+        def header_number(name):
+            value = headers.get(name)
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return None
+
+        for attribute, name in (("remaining", "x-requests-remaining"), ("used", "x-requests-used"),
+                                ("last_cost", "x-requests-last")):
+            value = header_number(name)
+            if value is not None:
+                setattr(self, attribute, value)
+
+    @property
+    def exhausted(self):
+        if self.remaining is None:
+            return False
+        return self.remaining < (self.last_cost or 1)
+
+    def scale(self, interval):
+        if self.remaining is not None and self.remaining < QUOTA_LOW_WATER:
+            return interval * QUOTA_BACKOFF
+        return interval
+
+
+class OddsPoller:
+    """
+    Long-running asyncio poller for several sports.
+
+    All sports share one FetchEngine (one connection pool) and one quota
+    tracker. Each sport is polled on its own schedule: every minute when a
+    game is about to start, rarely when the next game is days away.
+
+    Args:
+        sports (list): Sport keys, e.g. ['basketball_nba', 'americanfootball_nfl'].
+        regions (str): Regions to include.
+        markets (list): Markets to fetch.
+        engine (FetchEngine, optional): Shared engine; one is created if omitted.
+        store (OddsStore, optional): History store for the ingested lines;
+            defaults to the process-wide store.
+        on_changes (callable, optional): Called as on_changes(sport, changes)
+            with the DataFrame of moved lines after every poll that has any.
+        on_snapshot (callable, optional): Called as on_snapshot(sport, snapshot)
+            with the full board after every successful poll, so consumers can
+            drop the lines it no longer quotes.
+        write_csv (bool): Whether each poll rewrites the current-board CSV.
+    """
+
+    def __init__(self, sports, regions="us", markets=["spreads", "totals", "h2h"], engine=None,
+                 store=None, on_changes=None, on_snapshot=None, write_csv=False):
+        self.sports = list(sports)
+        self.regions = regions
+        self.markets = markets
+        self.engine = engine or FetchEngine()
+        self.store = store or get_default_store()
+        self.on_changes = on_changes
+        self.on_snapshot = on_snapshot
+        self.write_csv = write_csv
+        self.quota = QuotaTracker()
+        self.polls = {sport: 0 for sport in self.sports}
+        self._stop = None
+
+    async def poll_once(self, sport):
+        """
+        Poll one sport and return the number of seconds until its next poll.
+        """
+        response = await asyncio.to_thread(request_odds, sport, self.regions, self.markets, self.engine)
+        self.polls[sport] += 1
+        self.quota.update(response.headers)
+
+        if response.status_code != 200:
+            print(f"Failed to fetch {sport} odds: status {response.status_code}")
+            return self.quota.scale(RETRY_INTERVAL)
+
+        data = json.loads(response.content)
+        snapshot, changes = await asyncio.to_thread(ingest_odds, sport, data, self.store, self.write_csv)
+        if self.on_changes is not None and not changes.empty:
+            self.on_changes(sport, changes)
+        if self.on_snapshot is not None:
+            self.on_snapshot(sport, snapshot)
+
+        interval = poll_interval([game.get("commence_time") for game in data])
+        return self.quota.scale(interval)
+
+    async def _run_sport(self, sport, max_polls):
+        while not self._stop.is_set():
+            if self.quota.exhausted:
+                print(f"Odds API quota exhausted ({self.quota.remaining} left); stopping {sport} poller.")
+                return
+            started = time.monotonic()
+            try:
+                interval = await self.poll_once(sport)
+            except Exception as e:
+                print(f"Error polling {sport} odds: {e}")
+                interval = RETRY_INTERVAL
+            if max_polls is not None and self.polls[sport] >= max_polls:
+                return
+            if self.quota.exhausted:
+                continue  # Stop now rather than after one more interval
+            print(f"Next {sport} poll in {interval:.0f}s (quota remaining: {self.quota.remaining})")
+            delay = max(0.0, interval - (time.monotonic() - started))
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self, max_polls=None):
+        """
+        Poll every sport until `stop` is called, the quota runs out or each
+        sport has been polled `max_polls` times.
+        """
+        self._stop = asyncio.Event()
+        await asyncio.gather(*(self._run_sport(sport, max_polls) for sport in self.sports))
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+
+
+if __name__ == "__main__":
+    poller = OddsPoller(["basketball_nba", "americanfootball_nfl"], write_csv=True)
+    try:
+        asyncio.run(poller.run())
+    except KeyboardInterrupt:
+        print("Odds poller stopped.")
@@ -0,0 +1,196 @@
+import glob
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+STORE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../data/odds_history"))
+
+# Columns of the `{sport}_odds.csv` board the cleaner reads
+ODDS_COLUMNS = ["commence_time", "home_team", "away_team", "bookmaker", "market_type", "name", "price", "point"]
+
+# One line is identified by (game, bookmaker, market, outcome)
+KEY_COLUMNS = ["game_id", "bookmaker", "market_type", "name"]
+VALUE_COLUMNS = ["price", "point"]
+
+
+def flatten_odds(data):
+    """
+    Flatten a TheOddsAPI response into column arrays in one pass.
+
+    Args:
+        data (list): Parsed JSON list of games.
+
+    Returns:
+        dict: Column name -> list, one entry per outcome.
+    """
+    columns = {name: [] for name in ["game_id"] + ODDS_COLUMNS}
+    game_id, commence_time, home_team, away_team = (
+        columns["game_id"], columns["commence_time"], columns["home_team"], columns["away_team"]
+    )
+    bookmaker_col, market_col, name_col, price_col, point_col = (
+        columns["bookmaker"], columns["market_type"], columns["name"], columns["price"], columns["point"]
+    )
+
+    for game in data:
+        game_fields = (game.get("id"), game.get("commence_time"), game.get("home_team"), game.get("away_team"))
+        for bookmaker in game.get("bookmakers", []):
+            bookmaker_name = bookmaker.get("title")
+            for market in bookmaker.get("markets", []):
+                market_type = market.get("key")  # 'spreads', 'totals', 'h2h'
+                outcomes = market.get("outcomes", [])
+                n = len(outcomes)
+                game_id.extend([game_fields[0]] * n)
+                commence_time.extend([game_fields[1]] * n)
+                home_team.extend([game_fields[2]] * n)
+                away_team.extend([game_fields[3]] * n)
+                bookmaker_col.extend([bookmaker_name] * n)
+                market_col.extend([market_type] * n)
+                for outcome in outcomes:
+                    name_col.append(outcome.get("name"))  # Team or total
+                    price_col.append(outcome.get("price"))  # Decimal odds
+                    point_col.append(outcome.get("point"))  # Spread/total line (if applicable)
+    return columns
+
+
+def odds_frame(columns):
+    """
+    Build a typed DataFrame from `flatten_odds` output.
+    """
+    df = pd.DataFrame(columns)
+    df["price"] = pd.to_numeric(df["price"], errors="coerce")
+    df["point"] = pd.to_numeric(df["point"], errors="coerce")
+    return df
+
+
+def started(df, now):
+    """
+    Boolean mask of the rows whose game has started by `now`; rows without a
+    parseable commence_time count as not started.
+    """
+    starts = pd.to_datetime(df["commence_time"], utc=True, errors="coerce")
+    return (starts <= now).to_numpy()
+
+
+class OddsStore:
+    """
+    Append-only history of odds lines, partitioned by sport and fetch date.
+
+    Each snapshot is compared against the last-seen (price, point) of every
+    line and only new or moved lines are written, so frequent polling of an
+    unchanged board costs almost nothing. Only pre-game lines are kept: games
+    that have started are left out of the history and pruned from the
+    last-seen lines, which therefore stay the size of the upcoming board.
+
+    Layout:
+        {root}/sport={sport}/date={YYYY-MM-DD}/snapshot-{timestamp}.parquet
+        {root}/sport={sport}/latest.parquet   (last-seen value of every upcoming line)
+    """
+
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        self._latest = {}
+
+    def _sport_dir(self, sport):
+        return os.path.join(self.root, f"sport={sport}")
+
+    def latest_lines(self, sport):
+        """
+        Last-seen value of every line for `sport`.
+        """
+        if sport not in self._latest:
+            path = os.path.join(self._sport_dir(sport), "latest.parquet")
+            if os.path.exists(path):
+                self._latest[sport] = pd.read_parquet(path)
+            else:
+                self._latest[sport] = pd.DataFrame(columns=["game_id"] + ODDS_COLUMNS + ["fetched_at"])
+        return self._latest[sport]
+
+    def changed_lines(self, sport, snapshot):
+        """
+        Rows of `snapshot` that are new or whose price/point moved.
+        """
+        latest = self.latest_lines(sport)
+        if latest.empty:
+            return snapshot
+        merged = snapshot.merge(
+            latest[KEY_COLUMNS + VALUE_COLUMNS], on=KEY_COLUMNS, how="left",
+            suffixes=("", "_last"), indicator=True
+        )
+        is_new = (merged["_merge"] == "left_only").to_numpy()
+        moved = np.zeros(len(merged), dtype=bool)
+        for col in VALUE_COLUMNS:
+            current = merged[col].to_numpy(dtype=np.float64)
+            last = merged[f"{col}_last"].to_numpy(dtype=np.float64)
+            both_nan = np.isnan(current) & np.isnan(last)
+            moved |= (current != last) & ~both_nan
+        return snapshot[is_new | moved]
+
+    def append_snapshot(self, sport, snapshot, fetched_at=None):
+        """
+        Store the lines of `snapshot` that changed since the last poll, and
+        forget the lines of games that have started by `fetched_at`.
+
+        Args:
+            sport (str): Sport key, e.g. 'basketball_nba'.
+            snapshot (DataFrame): Output of `odds_frame`.
+            fetched_at (Timestamp, optional): Poll time; defaults to now (UTC).
+
+        Returns:
+            DataFrame: The changed rows that were written.
+        """
+        fetched_at = fetched_at or pd.Timestamp.now(tz="UTC")
+        snapshot = snapshot.drop_duplicates(KEY_COLUMNS, keep="last")
+        snapshot = snapshot[~started(snapshot, fetched_at)]
+        changes = self.changed_lines(sport, snapshot).assign(fetched_at=fetched_at)
+
+        latest = self.latest_lines(sport)
+        expired = started(latest, fetched_at)
+        if changes.empty and not expired.any():
+            return changes
+
+        if not changes.empty:
+            partition_dir = os.path.join(self._sport_dir(sport), f"date={fetched_at:%Y-%m-%d}")
+            os.makedirs(partition_dir, exist_ok=True)
+            changes.to_parquet(
+                os.path.join(partition_dir, f"snapshot-{fetched_at:%Y%m%dT%H%M%S%f}.parquet"), index=False
+            )
+
+        latest = pd.concat([latest[~expired], changes], ignore_index=True)
+        latest = latest.drop_duplicates(KEY_COLUMNS, keep="last").reset_index(drop=True)
+        os.makedirs(self._sport_dir(sport), exist_ok=True)
+        latest.to_parquet(os.path.join(self._sport_dir(sport), "latest.parquet"), index=False)
+        self._latest[sport] = latest
+        return changes
+
+    def load_history(self, sport, start_date=None, end_date=None):
+        """
+        Load every stored line change for `sport`, optionally limited to fetch
+        dates between `start_date` and `end_date` ('YYYY-MM-DD', inclusive).
+        """
+        frames = []
+        for partition_dir in sorted(glob.glob(os.path.join(self._sport_dir(sport), "date=*"))):
+            day = os.path.basename(partition_dir)[len("date="):]
+            if (start_date and day < start_date) or (end_date and day > end_date):
+                continue
+            frames.extend(pd.read_parquet(path) for path in sorted(glob.glob(os.path.join(partition_dir, "*.parquet"))))
+        if not frames:
+            return pd.DataFrame(columns=["game_id"] + ODDS_COLUMNS + ["fetched_at"])
+        return pd.concat(frames, ignore_index=True)
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_store():
+    """
+    Store shared by the pollers and `fetch_odds` calls that do not pass one,
+    so every poll reuses the in-memory last-seen lines.
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = OddsStore()
+        return _default_store
@@ -0,0 +1,117 @@
+import lxml.html
+import numpy as np
+import pandas as pd
+
+# Body rows Sports Reference uses to repeat the header or group columns
+SKIPPED_ROW_CLASSES = ("thead", "over_header")
+
+
+def _find_table(doc, table_id=None, css_class=None):
+    if table_id is not None:
+        matches = doc.xpath("//table[@id=$table_id]", table_id=table_id)
+    else:
+        matches = doc.xpath(
+            "//table[contains(concat(' ', normalize-space(@class), ' '), $css_class)]",
+            css_class=f" {css_class} ",
+        )
+    return matches[0] if matches else None
+
+
+def _find_commented_table(doc, table_id):
+    """
+    Sports Reference ships secondary tables inside HTML comments and unhides
+    them with JavaScript; parse only the comment that holds the table.
+    """
+    for comment in doc.xpath("//comment()[contains(., $needle)]", needle=f'id="{table_id}"'):
+        table = _find_table(lxml.html.fromstring(comment.text), table_id=table_id)
+        if table is not None:
+            return table
+    return None
+
+
+def _unique_names(names):
+    """
+    Disambiguate repeated header names the way `pd.read_html` does (Yds, Yds.1).
+    """
+    seen = {}
+    unique = []
+    for name in names:
+        if name in seen:
+            seen[name] += 1
+            unique.append(f"{name}.{seen[name]}")
+        else:
+            seen[name] = 0
+            unique.append(name)
+    return unique
+
+
+def _cell_texts(cells):
+    """
+    Text of each cell, repeated over the columns it spans (`colspan`), so
+    cells line up with the header columns the way `pd.read_html` lines them up.
+    """
+    texts = []
+    for cell in cells:
+        span = cell.get("colspan", "1")
+        texts.extend([cell.text_content().strip()] * (int(span) if span.isdigit() and int(span) > 0 else 1))
+    return texts
+
+
+def _typed_column(values):
+    """
+    Convert a column of cell strings to float when every non-empty cell is
+    numeric, otherwise keep it as objects. Empty cells become NaN.
+    """
+    column = np.array(values, dtype=object)
+    empty = column == ""
+    column[empty] = None
+    numeric = pd.to_numeric(column, errors="coerce")
+    if np.isnan(numeric[~empty]).any():
+        return column
+    return numeric
+
+
+def extract_table(content, table_id=None, css_class=None):
+    """
+    Extract an HTML table into a DataFrame with a single lxml parse.
+
+    The header is the last row of the table's <thead>; body rows that repeat
+    the header are skipped and cells are collected straight into per-column
+    arrays before being converted to numbers where possible. A cell spanning
+    several columns fills each of them.
+
+    Args:
+        content (bytes or str): Page HTML.
+        table_id (str, optional): `id` of the table, also searched for inside
+            HTML comments.
+        css_class (str, optional): Class of the table, used when `table_id` is
+            not given. The first matching table is returned.
+
+    Returns:
+        DataFrame or None: None when the table is not on the page.
+    """
+    doc = lxml.html.fromstring(content)
+    table = _find_table(doc, table_id, css_class)
+    if table is None and table_id is not None:
+        table = _find_commented_table(doc, table_id)
+    if table is None:
+        return None
+
+    header_rows = table.xpath("./thead/tr")
+    if not header_rows:
+        return None
+    names = _unique_names(_cell_texts(header_rows[-1].xpath("./th|./td")))
+    columns = [[] for _ in names]
+
+    body_rows = table.xpath("./tbody/tr") or table.xpath("./tr")
+    for row in body_rows:
+        row_classes = (row.get("class") or "").split()
+        if any(cls in SKIPPED_ROW_CLASSES for cls in row_classes):
+            continue
+        cells = _cell_texts(row.xpath("./th|./td"))
+        if not cells:
+            continue
+        for i, column in enumerate(columns):
+            column.append(cells[i] if i < len(cells) else "")
+
+    return pd.DataFrame({name: _typed_column(values) for name, values in zip(names, columns)})
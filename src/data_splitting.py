@@ -1,6 +1,8 @@
 import pandas as pd
 import os
 from sklearn.model_selection import train_test_split
+from split_indices import bin_score_diffs, stratified_split_indices, save_dataset, save_split_manifest
+from profiling import profile_stage
 
 # Define directories
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -33,7 +35,7 @@ def ensure_minimum_class_size(df, column, min_size=2):
 
     if len(rare_classes) > 0:
         print(f"Rare classes detected in '{column}': {rare_classes.tolist()}.")
-        df[column] = df[column].apply(lambda x: 'Other' if x in rare_classes else x)
+        df[column] = df[column].mask(df[column].isin(rare_classes), 'Other')
 
     # Check if "Other" is still too small and merge it into a meaningful class
     class_counts = df[column].value_counts()
@@ -45,6 +47,7 @@ def ensure_minimum_class_size(df, column, min_size=2):
 
     return df
 
+@profile_stage
 def impute_and_remove_missing_columns(df):
     """
     Impute partially missing columns and remove entirely missing columns.
@@ -66,6 +69,7 @@ def impute_and_remove_missing_columns(df):
 
     return df
 
+@profile_stage
 def split_data(df, target_col, test_size=0.2, val_size=0.1, random_state=42):
     """
     Split the dataset into training, validation, and testing sets.
@@ -76,6 +80,18 @@ def split_data(df, target_col, test_size=0.2, val_size=0.1, random_state=42):
     )
     return train, val, test
 
+@profile_stage
+def save_split_indices(df, target_col, prefix):
+    """
+    Save the dataset once plus a manifest of train/validation/test row indices.
+    """
+    indices = stratified_split_indices(df[target_col].to_numpy())
+    save_dataset(df, prefix)
+    save_split_manifest(indices, prefix, len(df))
+    print(f"Data splits saved for {prefix}: " + ", ".join(f"{k}={len(v)}" for k, v in indices.items()))
+    return indices
+
+@profile_stage
 def save_splits(train, val, test, prefix):
     """
     Save the split datasets to CSV files.
@@ -85,6 +101,7 @@ def save_splits(train, val, test, prefix):
     test.to_csv(os.path.join(OUTPUT_DIR, f"{prefix}_test.csv"), index=False)
     print(f"Data splits saved for {prefix}: train, validation, and test.")
 
+@profile_stage
 def process_nba_splits():
     print("Processing NBA data splits...")
     nba_file = os.path.join(FEATURE_ENGINEERED_DIR, "nba_feature_engineered.csv")
@@ -99,16 +116,16 @@ def process_nba_splits():
     nba_data = impute_and_remove_missing_columns(nba_data)
 
     # Bin the score_diff column for stratification
-    nba_data["score_diff_bin"] = nba_data["score_diff"].apply(bin_score_diff)
+    nba_data["score_diff_bin"] = bin_score_diffs(nba_data["score_diff"])
 
     # Ensure minimum class size for stratification
     nba_data = ensure_minimum_class_size(nba_data, "score_diff_bin")
 
     # Use the binned column as the target for stratification
     target_col = "score_diff_bin"
-    train, val, test = split_data(nba_data, target_col)
-    save_splits(train, val, test, "nba")
+    save_split_indices(nba_data, target_col, "nba")
 
+@profile_stage
 def process_nfl_splits():
     print("Processing NFL data splits...")
     nfl_file = os.path.join(FEATURE_ENGINEERED_DIR, "nfl_feature_engineered.csv")
@@ -123,15 +140,14 @@ def process_nfl_splits():
     nfl_data = impute_and_remove_missing_columns(nfl_data)
 
     # Bin the score_diff column for stratification
-    nfl_data["score_diff_bin"] = nfl_data["score_diff"].apply(bin_score_diff)
+    nfl_data["score_diff_bin"] = bin_score_diffs(nfl_data["score_diff"])
 
     # Ensure minimum class size for stratification
     nfl_data = ensure_minimum_class_size(nfl_data, "score_diff_bin")
 
     # Use the binned column as the target for stratification
     target_col = "score_diff_bin"
-    train, val, test = split_data(nfl_data, target_col)
-    save_splits(train, val, test, "nfl")
+    save_split_indices(nfl_data, target_col, "nfl")
 
 if __name__ == "__main__":
     process_nba_splits()
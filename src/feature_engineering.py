@@ -1,5 +1,6 @@
 import pandas as pd
 import os
+from profiling import profile_stage
 
 # Define directories
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -7,6 +8,7 @@ DATA_DIR = os.path.join(PROJECT_ROOT, "data", "feature_engineered_data")
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, "data", "cleaned")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+@profile_stage
 def clean_dataset(df, drop_threshold=0.9):
     """
     Impute numerical values and drop features with excessive missing values.
@@ -27,6 +29,7 @@ def clean_dataset(df, drop_threshold=0.9):
 
     return df
 
+@profile_stage
 def process_nba_data():
     print("Processing NBA feature-engineered data...")
     nba_file_path = os.path.join(DATA_DIR, "nba_feature_engineered.csv")
@@ -37,6 +40,7 @@ def process_nba_data():
     nba_cleaned.to_csv(output_path, index=False)
     print(f"Cleaned NBA data saved to {output_path}")
 
+@profile_stage
 def process_nfl_data():
     print("Processing NFL feature-engineered data...")
     nfl_file_path = os.path.join(DATA_DIR, "nfl_feature_engineered.csv")
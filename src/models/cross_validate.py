@@ -0,0 +1,226 @@
+"""
+K-fold cross-validation of the score-difference network.
+
+The canonical dataset is encoded once and copied into one shared-memory
+block. Worker processes attach to it by name and see each fold as index
+arrays, so memory holds one copy of the data plus the training rows of the
+folds being fitted at that moment, whatever K is. Folds come from a K-fold
+split manifest when one exists, else they are stratified by score_diff_bin.
+
+    python src/split_indices.py nba stratified --folds 5   # optional: persist the folds
+    python src/models/cross_validate.py nba --folds 5 --workers 4
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# Define directories
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src"))
+from split_indices import (
+    dataset_path, fold_indices, load_dataset, load_split_manifest, manifest_path, stratified_kfold_indices,
+)
+from train_nn import DROP_COLUMNS, EPOCHS, PRECISION, PRECISIONS, SPORTS, cast_weights, fit, forward_propagation
+
+REPORTS_DIR = os.path.join(PROJECT_ROOT, "reports")
+
+FOLDS = 5
+STRATEGIES = ("stratified", "season", "team")
+
+# Arrays, folds and training settings of the current process (see _init_worker)
+_worker = {}
+
+
+def load_matrix(sport):
+    """
+    Encoded features, score_diff target and score_diff_bin labels of the
+    whole canonical dataset, encoded as in `train_nn.load_data`.
+    """
+    if not os.path.exists(dataset_path(sport)):
+        raise FileNotFoundError(f"No canonical dataset at {dataset_path(sport)}; run src/data_splitting.py first")
+    dataset = load_dataset(sport)
+    labels = dataset["score_diff_bin"].to_numpy()
+    data = pd.get_dummies(dataset.drop(columns=DROP_COLUMNS[sport], errors="ignore"), drop_first=True)
+    X = data.drop(columns=["score_diff"]).to_numpy(dtype=np.float64)
+    y = data["score_diff"].to_numpy(dtype=np.float64).reshape(-1, 1)
+    return X, y, labels
+
+
+def make_folds(sport, strategy, n_splits, labels):
+    """
+    Test rows of every fold: from the `strategy` manifest when it exists,
+    else stratified by score_diff_bin.
+
+    Returns:
+        dict: 'fold{k}' -> sorted test indices, as `split_indices.group_kfold_indices`.
+    """
+    if os.path.exists(manifest_path(sport, strategy)):
+        indices, n_rows = load_split_manifest(sport, strategy)
+        if n_rows != len(labels):
+            raise ValueError(f"Manifest was built for {n_rows} rows but the dataset has {len(labels)}; re-run the splitter.")
+        print(f"Using the {len(indices)} folds of {manifest_path(sport, strategy)}")
+        return indices
+    if strategy != "stratified":
+        raise FileNotFoundError(f"No {strategy} fold manifest; run src/split_indices.py {sport} {strategy}")
+    return stratified_kfold_indices(labels, n_splits)
+
+
+def share(arrays):
+    """
+    Copy arrays into one new shared-memory block.
+
+    Returns:
+        tuple: (SharedMemory, [(offset, shape, dtype), ...]) to pass to `attach`.
+    """
+    specs, offset = [], 0
+    for array in arrays:
+        specs.append((offset, array.shape, array.dtype.str))
+        offset += -(-array.nbytes // 64) * 64  # Keep every array 64-byte aligned
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for array, view in zip(arrays, attach(shm, specs)):
+        view[...] = array
+    return shm, specs
+
+
+def attach(shm, specs):
+    """
+    Array views into a shared-memory block laid out by `share`.
+    """
+    return [np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset) for offset, shape, dtype in specs]
+
+
+def _init_worker(X, y, indices, precision, epochs):
+    _worker.update(X=X, y=y, indices=indices, precision=precision, epochs=epochs)
+
+
+def _attach_worker(name, specs, indices, precision, epochs, threads):
+    # Workers share the parent's resource tracker, which unlinks the block if the parent dies
+    shm = shared_memory.SharedMemory(name=name)
+    X, y = attach(shm, specs)
+    _init_worker(X, y, indices, precision, epochs)
+    _worker["shm"] = shm
+    try:
+        from threadpoolctl import threadpool_limits
+        # Workers share the cores; each BLAS call gets its share instead of all of them
+        _worker["threads"] = threadpool_limits(threads)
+    except ImportError:
+        pass
+
+
+def _fit_fold(k):
+    """
+    Train on every fold but `k` and predict fold `k`.
+
+    Returns:
+        tuple: (k, test indices, predictions, seconds)
+    """
+    X, y = _worker["X"], _worker["y"]
+    train, test = fold_indices(_worker["indices"], k, len(X))
+    start = time.perf_counter()
+    weights, _ = fit(X[train], y[train], X[test], y[test], _worker["precision"], _worker["epochs"], verbose=False)
+    predictions, _ = forward_propagation(X[test], cast_weights(weights, np.float64))
+    return k, test, predictions[:, 0], time.perf_counter() - start
+
+
+def cross_validate(sport, n_splits=FOLDS, strategy="stratified", workers=1, precision=PRECISION, epochs=EPOCHS):
+    """
+    Train one network per fold, `workers` folds at a time, and collect the
+    out-of-fold predictions.
+
+    Returns:
+        dict: Per-fold metrics (DataFrame), out-of-fold predictions
+        (DataFrame with row, fold, score_diff and prediction), and the
+        out-of-fold MSE and MAE over every row.
+    """
+    X, y, labels = load_matrix(sport)
+    target = y[:, 0].copy()
+    indices = make_folds(sport, strategy, n_splits, labels)
+    folds = range(len(indices))
+    workers = max(1, min(workers, len(indices)))
+    print(f"Cross-validating {sport.upper()} on {len(X)} rows, {len(indices)} {strategy} folds, {workers} workers...")
+
+    start = time.perf_counter()
+    if workers == 1:
+        _init_worker(X, y, indices, precision, epochs)
+        results = [_fit_fold(k) for k in folds]
+    else:
+        shm, specs = share([X, y])
+        del X, y  # Workers and the parent now read the shared copy only
+        try:
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach_worker,
+                                     initargs=(shm.name, specs, indices, precision, epochs, threads)) as pool:
+                results = list(pool.map(_fit_fold, folds))
+        finally:
+            shm.close()
+            shm.unlink()
+    seconds = time.perf_counter() - start
+
+    oof = np.full(len(target), np.nan)
+    fold_of_row = np.full(len(target), -1)
+    rows = []
+    for k, test, predictions, fold_seconds in results:
+        oof[test], fold_of_row[test] = predictions, k
+        errors = predictions - target[test]
+        rows.append((k, len(target) - len(test), len(test), float(np.mean(errors ** 2)),
+                     float(np.mean(np.abs(errors))), fold_seconds))
+    fold_metrics = pd.DataFrame(rows, columns=["fold", "train_rows", "test_rows", "mse", "mae", "seconds"])
+
+    covered = fold_of_row >= 0
+    errors = oof[covered] - target[covered]
+    return {
+        "sport": sport,
+        "strategy": strategy,
+        "workers": workers,
+        "precision": precision,
+        "epochs": epochs,
+        "folds": fold_metrics,
+        "oof": pd.DataFrame({"row": np.flatnonzero(covered), "fold": fold_of_row[covered],
+                             "score_diff": target[covered], "prediction": oof[covered]}),
+        "oof_mse": float(np.mean(errors ** 2)),
+        "oof_mae": float(np.mean(np.abs(errors))),
+        "seconds": seconds,
+    }
+
+
+def save_report(report, reports_dir=REPORTS_DIR):
+    os.makedirs(reports_dir, exist_ok=True)
+    prefix = os.path.join(reports_dir, f"{report['sport']}_{report['strategy']}_cv")
+    report["folds"].to_csv(f"{prefix}_folds.csv", index=False)
+    report["oof"].to_csv(f"{prefix}_oof.csv", index=False)
+    summary = {key: value for key, value in report.items() if key not in ("folds", "oof")}
+    summary["fold_mse_mean"] = float(report["folds"]["mse"].mean())
+    summary["fold_mse_std"] = float(report["folds"]["mse"].std(ddof=1))
+    with open(f"{prefix}_summary.json", "w") as f:
+        json.dump(summary, f, indent=2)
+    print(f"Cross-validation reports saved at {prefix}_*")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="K-fold cross-validation of the score-difference network.")
+    parser.add_argument("sports", nargs="*", default=SPORTS, help="Leagues to cross-validate (default: all)")
+    parser.add_argument("--folds", type=int, default=FOLDS, help="Folds when no manifest exists")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="stratified",
+                        help="K-fold manifest to use (season and team need src/split_indices.py first)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Folds trained at once (default: CPUs)")
+    parser.add_argument("--precision", choices=list(PRECISIONS), default=PRECISION)
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    args = parser.parse_args()
+
+    for sport in args.sports:
+        try:
+            report = cross_validate(sport, args.folds, args.strategy, args.workers, args.precision, args.epochs)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"Skipping {sport}: {e}")
+            continue
+        print(report["folds"].to_string(index=False, float_format=lambda value: f"{value:.5f}"))
+        print(f"Out-of-fold MSE {report['oof_mse']:.5f}, MAE {report['oof_mae']:.5f} "
+              f"({report['seconds']:.2f} s, {report['folds']['seconds'].sum():.2f} s of fold training)")
+        save_report(report)
@@ -1,11 +1,15 @@
 import numpy as np
 import pandas as pd
 import os
+import sys
 import matplotlib.pyplot as plt
 
 # Define directories
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-SPLITS_DIR = os.path.join(PROJECT_ROOT, "data", "splits")
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src"))
+from split_indices import read_split
+from train_nn import DROP_COLUMNS, SPORTS
+
 MODEL_DIR = os.path.join(PROJECT_ROOT, "models")
 PLOTS_DIR = os.path.join(PROJECT_ROOT, "plots")
 os.makedirs(PLOTS_DIR, exist_ok=True)  # Create plots directory if it doesn't exist
@@ -13,7 +17,8 @@ os.makedirs(PLOTS_DIR, exist_ok=True)  # Create plots directory if it doesn't ex
 # Activation function
 def sigmoid(x):
     try:
-        return 1 / (1 + np.exp(-x))
+        # Overflow-free form of 1 / (1 + exp(-x)) that keeps the dtype of x
+        return 0.5 * (1 + np.tanh(0.5 * x))
     except Exception as e:
         print(f"Error in sigmoid function: {e}")
         print(f"Input type: {type(x)}, input value: {x}")
@@ -25,44 +30,39 @@ def forward_propagation(X, weights):
     print(f"Input X type: {type(X)}, dtype: {getattr(X, 'dtype', 'N/A')}, shape: {getattr(X, 'shape', 'N/A')}")
     print(f"Weights w1 shape: {weights['w1'].shape}, dtype: {weights['w1'].dtype}")
     
-    X = np.array(X, dtype=np.float64)
+    # Evaluate in the precision the model was trained in
+    X = np.asarray(X, dtype=weights["w1"].dtype)
 
-    z1 = np.dot(X, weights["w1"]) + weights["b1"]
-    z1 = np.array(z1, dtype=np.float64)
+    # matmul also evaluates stacked ensemble weights, giving one output per member
+    z1 = np.matmul(X, weights["w1"]) + weights["b1"]
     a1 = sigmoid(z1)
     print(f"Layer 1: z1 shape: {z1.shape}, a1 shape: {a1.shape}")
 
-    z2 = np.dot(a1, weights["w2"]) + weights["b2"]
-    z2 = np.array(z2, dtype=np.float64)
+    z2 = np.matmul(a1, weights["w2"]) + weights["b2"]
     a2 = sigmoid(z2)
     print(f"Layer 2: z2 shape: {z2.shape}, a2 shape: {a2.shape}")
 
-    z3 = np.dot(a2, weights["w3"]) + weights["b3"]
-    z3 = np.array(z3, dtype=np.float64)
-    a3 = z3
+    z3 = np.matmul(a2, weights["w3"]) + weights["b3"]
+    a3 = z3.mean(axis=0) if z3.ndim == 3 else z3  # Ensemble mean
     print(f"Output layer: z3 shape: {z3.shape}, a3 shape: {a3.shape}")
 
     return a3
 
 # Load dataset
-def load_data(file_name):
-    file_path = os.path.join(SPLITS_DIR, file_name)
-    data = pd.read_csv(file_path)
+def load_data(prefix, split):
+    data = read_split(prefix, split)
     
-    print(f"Loading data from {file_name}...")
+    print(f"Loading {prefix} {split} split...")
     print("Dataset sample:")
     print(data.head())
     print("Dataset column types:")
     print(data.dtypes)
     
-    drop_cols = ["date", "score_diff_bin", "away", "home", "whos_favored", 
-                 "home_team_combined", "away_team_combined", "home_team", 
-                 "away_team", "bookmaker", "market_type", "name"]
-    data = data.drop(columns=drop_cols)
+    data = data.drop(columns=DROP_COLUMNS[prefix], errors="ignore")
     data = pd.get_dummies(data, drop_first=True)
     
-    X = data.drop(columns=["score_diff"]).values
-    y = data["score_diff"].values.reshape(-1, 1)
+    X = data.drop(columns=["score_diff"]).to_numpy(dtype=np.float64)
+    y = data["score_diff"].to_numpy(dtype=np.float64).reshape(-1, 1)
     
     print("Transformed Dataset sample (after encoding and dropping):")
     print(data.head())
@@ -72,8 +72,11 @@ def load_data(file_name):
     return X, y
 
 # Load model weights
-def load_model():
-    model_path = os.path.join(MODEL_DIR, "nn_weights.npy")
+def load_model(sport="nba"):
+    # Per-sport artifact, falling back to the shared one trained before per-sport models
+    model_path = os.path.join(MODEL_DIR, f"nn_weights_{sport}.npy")
+    if not os.path.exists(model_path):
+        model_path = os.path.join(MODEL_DIR, "nn_weights.npy")
     if not os.path.exists(model_path):
         raise FileNotFoundError(f"Model weights file not found at {model_path}")
     weights = np.load(model_path, allow_pickle=True).item()
@@ -81,12 +84,12 @@ def load_model():
     return weights
 
 # Evaluate the model
-def evaluate_model():
-    print("Loading test data...")
-    X_test, y_test = load_data("nba_test.csv")
+def evaluate_model(sport="nba"):
+    print(f"Loading {sport.upper()} test data...")
+    X_test, y_test = load_data(sport, "test")
 
     print("Loading saved model weights...")
-    weights = load_model()
+    weights = load_model(sport)
 
     print("Performing forward propagation...")
     y_pred = forward_propagation(X_test, weights)
@@ -106,7 +109,7 @@ def evaluate_model():
     plt.ylabel("Residuals (y_test - y_pred)")
     plt.grid(True)
     
-    residual_plot_path = os.path.join(PLOTS_DIR, "residual_plot.png")
+    residual_plot_path = os.path.join(PLOTS_DIR, f"{sport}_residual_plot.png")
     plt.savefig(residual_plot_path, dpi=300)
     print(f"Residual plot saved at {residual_plot_path}")
 
@@ -119,9 +122,10 @@ def evaluate_model():
     plt.ylabel("Frequency")
     plt.grid(True)
     
-    histogram_path = os.path.join(PLOTS_DIR, "residual_histogram.png")
+    histogram_path = os.path.join(PLOTS_DIR, f"{sport}_residual_histogram.png")
     plt.savefig(histogram_path, dpi=300)
     print(f"Histogram of residuals saved at {histogram_path}")
 
 if __name__ == "__main__":
-    evaluate_model()
+    for sport in sys.argv[1:] or SPORTS:
+        evaluate_model(sport)
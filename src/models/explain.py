@@ -0,0 +1,291 @@
+"""
+Permutation importance and partial dependence of the score-difference network.
+
+The split is loaded and encoded once and shipped to each worker process when
+the pool starts. Every task then evaluates all repeats (or grid points) of
+one feature as a single batched forward pass over stacked copies of the
+matrix. One-hot columns of a categorical feature are permuted and set
+together, so importance is reported per input column of the split rather
+than per dummy.
+
+    python src/models/explain.py nba --repeats 10 --workers 4
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Define directories
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src"))
+from serving.ensemble import member_predictions
+from serving.registry import load_version, model_filename
+from sparse_features import OneHotLayout
+from split_indices import read_split
+from train_nn import DROP_COLUMNS, MODEL_DIR, SPORTS
+
+REPORTS_DIR = os.path.join(PROJECT_ROOT, "reports")
+
+REPEATS = 10
+GRID_POINTS = 20
+PD_FEATURES = 5  # Partial dependence is computed for this many top-ranked features
+MAX_BATCH_ROWS = 1 << 17  # Rows per stacked forward pass
+
+# Matrix, target and weights of the current process (see _init_worker)
+_shared = {}
+
+
+def load_features(sport, split="test"):
+    """
+    Encoded features of a split in the training split's one-hot layout (see
+    `sparse_features.OneHotLayout`), so every column lines up with the `w1`
+    row the model learned for it, with the input column each encoded column
+    came from.
+
+    Returns:
+        tuple: (X, y, columns, features), where `features` maps each input
+        column to the positions of its encoded columns in X.
+    """
+    train = read_split(sport, "train").drop(columns=DROP_COLUMNS[sport], errors="ignore")
+    layout = OneHotLayout.fit(train.drop(columns=["score_diff"]))
+    data = train if split == "train" else read_split(sport, split).drop(columns=DROP_COLUMNS[sport], errors="ignore")
+
+    features = {column: [position] for position, column in enumerate(layout.numeric_columns)}
+    position = len(layout.numeric_columns)
+    for column, values in layout.categories.items():
+        # One encoded column per category after the dropped baseline
+        if len(values) > 1:
+            features[column] = list(range(position, position + len(values) - 1))
+            position += len(values) - 1
+
+    X = layout.transform(data).toarray()
+    y = data["score_diff"].to_numpy(dtype=np.float64)
+    return X, y, layout.feature_names, features
+
+
+def load_model(sport):
+    """
+    The artifact serving `sport`: its own, else the shared one.
+
+    Returns:
+        tuple: (file name, weights)
+    """
+    for name in (model_filename(sport), "nn_weights.npy"):
+        path = os.path.join(MODEL_DIR, name)
+        if os.path.exists(path):
+            return name, load_version(path, feature_count=None).weights
+    raise FileNotFoundError(f"No model weights found for {sport} in {MODEL_DIR}")
+
+
+def predict(X, weights):
+    # Mean over members for ensembles; single and int8 networks pass through
+    return member_predictions(X, weights).mean(axis=0)
+
+
+def _init_worker(X, y, weights):
+    _shared.update(X=X, y=y, weights=weights)
+
+
+def _chunks(count, n_rows):
+    """
+    Split `count` stacked copies of an n_rows matrix into batches of at most
+    MAX_BATCH_ROWS rows.
+    """
+    per_batch = max(1, MAX_BATCH_ROWS // max(n_rows, 1))
+    return [range(start, min(start + per_batch, count)) for start in range(0, count, per_batch)]
+
+
+def _permutation_losses(task):
+    """
+    MSE of the shared model with the columns of one feature permuted, once
+    per repeat.
+    """
+    columns, repeats, seed = task
+    X, y, weights = _shared["X"], _shared["y"], _shared["weights"]
+    n = len(X)
+    rng = np.random.default_rng(seed)
+    losses = np.empty(repeats)
+    for chunk in _chunks(repeats, n):
+        batch = np.tile(X, (len(chunk), 1))
+        for i in range(len(chunk)):
+            # One permutation for all columns keeps one-hot rows valid
+            batch[i * n:(i + 1) * n, columns] = X[rng.permutation(n)][:, columns]
+        predictions = predict(batch, weights).reshape(len(chunk), n)
+        losses[chunk.start:chunk.stop] = np.mean((predictions - y) ** 2, axis=1)
+    return losses
+
+
+def _partial_dependence(task):
+    """
+    Mean and spread over rows of the prediction with the columns of one
+    feature set to each grid row.
+    """
+    columns, grid = task
+    X, weights = _shared["X"], _shared["weights"]
+    n = len(X)
+    means, stds = np.empty(len(grid)), np.empty(len(grid))
+    for chunk in _chunks(len(grid), n):
+        batch = np.tile(X, (len(chunk), 1))
+        for i, point in enumerate(chunk):
+            batch[i * n:(i + 1) * n, columns] = grid[point]
+        predictions = predict(batch, weights).reshape(len(chunk), n)
+        means[chunk.start:chunk.stop] = predictions.mean(axis=1)
+        stds[chunk.start:chunk.stop] = predictions.std(axis=1)
+    return means, stds
+
+
+def feature_grid(X, columns, grid_points=GRID_POINTS):
+    """
+    Values a feature is set to for partial dependence: quantiles of a
+    numeric column, or the reference category and each dummy of a
+    categorical one (most frequent first).
+
+    Returns:
+        tuple: (labels, grid), grid being (points, len(columns)).
+    """
+    values = X[:, columns]
+    if len(columns) == 1 and not np.isin(values, (0.0, 1.0)).all():
+        grid = np.unique(np.quantile(values, np.linspace(0.05, 0.95, grid_points)))[:, None]
+        return [float(value) for value in grid[:, 0]], grid
+    if len(columns) == 1:
+        return [0.0, 1.0], np.array([[0.0], [1.0]])
+    order = np.argsort(-values.sum(axis=0), kind="stable")[:grid_points - 1]
+    grid = np.vstack([np.zeros(len(columns)), np.eye(len(columns))[order]])
+    return ["<reference>", *[int(i) for i in order]], grid
+
+
+def run_tasks(func, tasks, X, y, weights, workers):
+    """
+    Map `func` over `tasks` in a pool of `workers` processes that each
+    receive the matrix once, or in this process when workers is 1.
+    """
+    if workers <= 1:
+        _init_worker(X, y, weights)
+        return [func(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X, y, weights)) as pool:
+        return list(pool.map(func, tasks))
+
+
+def permutation_importance(X, y, weights, features, repeats=REPEATS, workers=1, seed=42):
+    """
+    Increase in MSE when each feature is shuffled across rows.
+
+    Each feature gets its own random stream, so results do not depend on
+    the number of workers. Features are also ranked within every repeat;
+    rank_min and rank_max show how stable a feature's place is.
+
+    Returns:
+        tuple: (baseline MSE, DataFrame with one row per feature, sorted by importance)
+    """
+    baseline = float(np.mean((predict(X, weights) - y) ** 2))
+    names = list(features)
+    tasks = [(features[name], repeats, [seed, i]) for i, name in enumerate(names)]
+    losses = np.array(run_tasks(_permutation_losses, tasks, X, y, weights, workers))  # (features, repeats)
+
+    increase = losses - baseline
+    ranks = (-increase).argsort(axis=0).argsort(axis=0) + 1
+    report = pd.DataFrame({
+        "feature": names,
+        "columns": [len(features[name]) for name in names],
+        "importance": increase.mean(axis=1),
+        "importance_std": increase.std(axis=1, ddof=1) if repeats > 1 else 0.0,
+        "relative_increase": increase.mean(axis=1) / baseline,
+        "rank_min": ranks.min(axis=1),
+        "rank_max": ranks.max(axis=1),
+    })
+    report = report.sort_values("importance", ascending=False, kind="stable").reset_index(drop=True)
+    report.insert(0, "rank", np.arange(1, len(report) + 1))
+    return baseline, report
+
+
+def partial_dependence(X, y, weights, features, names, columns, grid_points=GRID_POINTS, workers=1):
+    """
+    Partial-dependence curve of each feature in `names`.
+
+    Returns:
+        dict: feature -> {values, mean, std}; categorical values name the
+        encoded column set to 1.
+    """
+    grids = [feature_grid(X, features[name], grid_points) for name in names]
+    tasks = [(features[name], grid) for name, (_, grid) in zip(names, grids)]
+    results = run_tasks(_partial_dependence, tasks, X, y, weights, workers)
+
+    curves = {}
+    for name, (labels, _), (means, stds) in zip(names, grids, results):
+        if labels and labels[0] == "<reference>":
+            labels = ["<reference>", *[columns[features[name][i]] for i in labels[1:]]]
+        curves[name] = {"values": labels, "mean": means.tolist(), "std": stds.tolist()}
+    return curves
+
+
+def explain(sport, split="test", repeats=REPEATS, workers=1, pd_features=PD_FEATURES,
+            grid_points=GRID_POINTS, seed=42):
+    """
+    Permutation importance of every feature and partial dependence of the
+    top `pd_features`, on `split`.
+    """
+    name, weights = load_model(sport)
+    X, y, columns, features = load_features(sport, split)
+    if X.shape[1] != np.shape(weights["w1"])[-2]:
+        raise ValueError(f"{name} expects {np.shape(weights['w1'])[-2]} features, the {sport} {split} split has {X.shape[1]}")
+
+    start = time.perf_counter()
+    baseline, importance = permutation_importance(X, y, weights, features, repeats, workers, seed)
+    importance_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    top = importance["feature"].head(pd_features).tolist()
+    curves = partial_dependence(X, y, weights, features, top, columns, grid_points, workers)
+    pd_seconds = time.perf_counter() - start
+
+    return {
+        "sport": sport,
+        "model": name,
+        "split": split,
+        "rows": len(X),
+        "repeats": repeats,
+        "workers": workers,
+        "baseline_mse": baseline,
+        "importance": importance,
+        "partial_dependence": curves,
+        "seconds": {"importance": importance_seconds, "partial_dependence": pd_seconds},
+    }
+
+
+def save_report(report, reports_dir=REPORTS_DIR):
+    os.makedirs(reports_dir, exist_ok=True)
+    prefix = os.path.join(reports_dir, f"{report['sport']}_{report['split']}")
+    report["importance"].to_csv(f"{prefix}_importance.csv", index=False)
+    with open(f"{prefix}_partial_dependence.json", "w") as f:
+        json.dump(report["partial_dependence"], f, indent=2)
+    print(f"Reports saved at {prefix}_importance.csv and {prefix}_partial_dependence.json")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Permutation importance and partial dependence of the network.")
+    parser.add_argument("sports", nargs="*", default=SPORTS, help="Leagues to explain (default: all)")
+    parser.add_argument("--split", default="test")
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="Permutations per feature")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (default: CPUs)")
+    parser.add_argument("--pd-features", type=int, default=PD_FEATURES, help="Top features to draw partial dependence for")
+    parser.add_argument("--grid-points", type=int, default=GRID_POINTS)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for sport in args.sports:
+        try:
+            report = explain(sport, args.split, args.repeats, args.workers, args.pd_features, args.grid_points, args.seed)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"Skipping {sport}: {e}")
+            continue
+        print(f"\n{sport.upper()} {report['model']} on {report['rows']} {args.split} rows "
+              f"(baseline MSE {report['baseline_mse']:.5f}, {args.repeats} repeats, {args.workers} workers)")
+        print(report["importance"].to_string(index=False, float_format=lambda value: f"{value:.3g}"))
+        print(f"Importance {report['seconds']['importance']:.2f} s, "
+              f"partial dependence {report['seconds']['partial_dependence']:.2f} s")
+        save_report(report)
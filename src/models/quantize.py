@@ -0,0 +1,184 @@
+import argparse
+import json
+import numpy as np
+import os
+import sys
+import time
+
+# Define directories
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src"))
+from serving.ensemble import is_ensemble, member_predictions
+from serving.quantized import INT8_MAX, LAYERS, quantized_forward
+from serving.registry import quantized_filename, validate_weights
+from train_nn import MODEL_DIR, SPORTS, load_data, model_path_for
+
+# Calibration: scales cover this percentile of each column's absolute values
+PERCENTILE = 100.0
+THROUGHPUT_BATCH_SIZES = (1, 256, 4096)
+
+
+def load_float_model(sport):
+    """
+    The float artifact serving `sport`: its own, else the shared one.
+
+    Returns:
+        tuple: (file name, weights)
+    """
+    for name in (os.path.basename(model_path_for(sport)), "nn_weights.npy"):
+        path = os.path.join(MODEL_DIR, name)
+        if os.path.exists(path):
+            weights = np.load(path, allow_pickle=True).item()
+            validate_weights(weights, feature_count=None)
+            if is_ensemble(weights):
+                raise ValueError(f"{name} is an ensemble; only single networks can be quantized")
+            return name, {key: np.asarray(value, dtype=np.float64) for key, value in weights.items()}
+    raise FileNotFoundError(f"No model weights found for {sport} in {MODEL_DIR}")
+
+
+def layer_inputs(X, weights):
+    """
+    Inputs of each layer in a float64 forward pass.
+    """
+    inputs = []
+    a = np.asarray(X, dtype=np.float64)
+    for layer in LAYERS:
+        inputs.append(a)
+        z = a @ weights[f"w{layer}"] + weights[f"b{layer}"]
+        a = 0.5 * (1 + np.tanh(0.5 * z))
+    return inputs
+
+
+def calibrate(X, weights, percentile=PERCENTILE):
+    """
+    Per-column input scale of every layer, from the activations the float
+    network produces on calibration rows `X`.
+
+    Columns that are always zero get the scale of a 0/1 column, so one-hot
+    categories missing from the calibration rows still round-trip exactly.
+
+    Returns:
+        dict: x1_scale, x2_scale, x3_scale, each (1, layer inputs).
+    """
+    scales = {}
+    for layer, a in zip(LAYERS, layer_inputs(X, weights)):
+        bound = np.percentile(np.abs(a), percentile, axis=0, keepdims=True)
+        scales[f"x{layer}_scale"] = np.where(bound > 0, bound, 1.0) / INT8_MAX
+    return scales
+
+
+def quantize_weights(weights, scales):
+    """
+    Fold each layer's input scales into its weight rows and quantize the
+    result symmetrically per output column:
+        x @ w == (x / x_scale) @ (x_scale.T * w) ~= q(x) @ w_q * w_scale
+
+    Returns:
+        dict: int8 w1..w3, float32 biases, input scales and weight scales.
+    """
+    quantized = {}
+    for layer in LAYERS:
+        folded = scales[f"x{layer}_scale"].T * weights[f"w{layer}"]
+        bound = np.abs(folded).max(axis=0, keepdims=True)
+        w_scale = np.where(bound > 0, bound, 1.0) / INT8_MAX
+        quantized[f"w{layer}"] = np.clip(np.rint(folded / w_scale), -INT8_MAX, INT8_MAX).astype(np.int8)
+        quantized[f"b{layer}"] = weights[f"b{layer}"].astype(np.float32)
+        quantized[f"x{layer}_scale"] = scales[f"x{layer}_scale"].astype(np.float32)
+        quantized[f"w{layer}_scale"] = w_scale.astype(np.float32)
+    return quantized
+
+
+def accuracy_delta(X, y, weights, quantized):
+    """
+    Compare int8 predictions on `X` with the float64 network's.
+
+    Returns:
+        dict: Prediction differences and both networks' MSE against `y`.
+    """
+    reference = member_predictions(X, weights).T
+    predictions = quantized_forward(X, quantized).astype(np.float64)
+    diff = np.abs(predictions - reference)
+    return {
+        "rows": len(X),
+        "max_abs_prediction_diff": float(diff.max()),
+        "mean_abs_prediction_diff": float(diff.mean()),
+        "max_relative_prediction_diff": float(diff.max()) / max(float(np.std(reference)), 1e-12),
+        "float64_mse": float(np.mean((reference - y) ** 2)),
+        "int8_mse": float(np.mean((predictions - y) ** 2)),
+    }
+
+
+def throughput(X, weights, quantized, batch_sizes=THROUGHPUT_BATCH_SIZES, min_seconds=0.2):
+    """
+    Rows per second of the serving forward pass, float64 against int8, at
+    each batch size (rows drawn from `X`).
+    """
+    def rate(model, batch):
+        runs, start = 0, time.perf_counter()
+        while time.perf_counter() - start < min_seconds:
+            member_predictions(batch, model)
+            runs += 1
+        return runs * len(batch) / (time.perf_counter() - start)
+
+    results = {}
+    for size in batch_sizes:
+        batch = X[np.arange(size) % len(X)]
+        float_rate, int8_rate = rate(weights, batch), rate(quantized, batch)
+        results[str(size)] = {"float64_rows_per_s": round(float_rate), "int8_rows_per_s": round(int8_rate),
+                              "speedup": round(int8_rate / float_rate, 2)}
+    return results
+
+
+def save_quantized(quantized, path):
+    # Write then rename, like train_nn.save_model, for servers watching the file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, quantized)
+    os.replace(tmp_path, path)
+    print(f"Quantized model saved at {path}")
+
+
+def quantize_model(sport, percentile=PERCENTILE, eval_split="test", save=True):
+    """
+    Calibrate on the validation split, quantize, report the accuracy delta on
+    `eval_split` and write `<artifact>.int8.npy` next to the float artifact.
+    """
+    name, weights = load_float_model(sport)
+    X_val, _ = load_data(sport, "val")
+    if X_val.shape[1] != weights["w1"].shape[0]:
+        raise ValueError(f"{name} expects {weights['w1'].shape[0]} features, the {sport} val split has {X_val.shape[1]}")
+    print(f"Calibrating {name} on {len(X_val)} {sport} val rows...")
+    quantized = quantize_weights(weights, calibrate(X_val, weights, percentile))
+    validate_weights(quantized, feature_count=None)
+
+    X_eval, y_eval = load_data(sport, eval_split)
+    report = {
+        "sport": sport,
+        "source": name,
+        "percentile": percentile,
+        "weight_bytes": {
+            "float64": sum(value.nbytes for value in weights.values()),
+            "int8": sum(value.nbytes for value in quantized.values()),
+        },
+        f"{eval_split}_accuracy": accuracy_delta(X_eval, y_eval, weights, quantized),
+        "throughput": throughput(X_eval, weights, quantized),
+    }
+    if save:
+        save_quantized(quantized, os.path.join(MODEL_DIR, quantized_filename(name)))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Post-training int8 quantization of the score-difference network.")
+    parser.add_argument("sports", nargs="*", default=SPORTS, help="Leagues to quantize (default: all)")
+    parser.add_argument("--percentile", type=float, default=PERCENTILE,
+                        help="Calibrate scales to this percentile of |activation| (default: max)")
+    parser.add_argument("--eval-split", default="test", help="Split the accuracy delta is reported on")
+    parser.add_argument("--dry-run", action="store_true", help="Report without writing the int8 artifact")
+    args = parser.parse_args()
+
+    for sport in args.sports:
+        try:
+            print(json.dumps(quantize_model(sport, args.percentile, args.eval_split, not args.dry_run), indent=2))
+        except (FileNotFoundError, ValueError) as e:
+            print(f"Skipping {sport}: {e}")
@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+
+
+class OneHotMatrix:
+    """
+    Feature matrix whose one-hot blocks are kept as category indices.
+
+    It stands for the dense matrix `pd.get_dummies(df, drop_first=True)`
+    would build (same column order, so the same `w1` layout), but stores the
+    numeric columns densely and each categorical column as the `w1` row its
+    category activates (-1 for the dropped baseline or a missing value). The
+    first layer then becomes a dense matmul plus one row gather per
+    categorical column, and its gradient a segment sum, so cost grows with
+    the number of rows and categorical columns rather than the number of
+    categories.
+
+    Args:
+        dense (ndarray): (n, d) numeric block.
+        dense_rows (ndarray): `w1` row of each numeric column.
+        codes (ndarray): (n, c) `w1` row per categorical column, -1 for none.
+        n_features (int): Width of the equivalent dense matrix.
+    """
+    ndim = 2
+
+    def __init__(self, dense, dense_rows, codes, n_features, _groups=None):
+        self.dense = dense
+        self.dense_rows = np.asarray(dense_rows, dtype=np.intp)
+        self.codes = np.asarray(codes, dtype=np.intp)
+        self.n_features = n_features
+        self.layout = None
+        # Rows sorted by category, per categorical column, for the segment sums
+        # of the backward pass; computed once since the codes never change
+        self._groups = _groups if _groups is not None else [self._group(column) for column in self.codes.T]
+
+    @staticmethod
+    def _group(column):
+        rows = np.flatnonzero(column >= 0)
+        order = rows[np.argsort(column[rows], kind="stable")]
+        sorted_codes = column[order]
+        if sorted_codes.size == 0:
+            return order, np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        return order, starts, sorted_codes[starts]
+
+    @property
+    def shape(self):
+        return (self.dense.shape[0], self.n_features)
+
+    @property
+    def dtype(self):
+        return self.dense.dtype
+
+    def __len__(self):
+        return self.dense.shape[0]
+
+    def astype(self, dtype, copy=True):
+        if self.dense.dtype == dtype and not copy:
+            return self
+        matrix = OneHotMatrix(self.dense.astype(dtype), self.dense_rows, self.codes, self.n_features, self._groups)
+        matrix.layout = self.layout
+        return matrix
+
+    def take(self, rows):
+        """
+        The matrix restricted to `rows` (e.g. a bootstrap sample).
+        """
+        matrix = OneHotMatrix(self.dense[rows], self.dense_rows, self.codes[rows], self.n_features)
+        matrix.layout = self.layout
+        return matrix
+
+    def dot(self, w):
+        """
+        X @ w, gathering one row of `w` per categorical column instead of
+        multiplying by the one-hot block.
+        """
+        out = self.dense @ w[self.dense_rows]
+        if self.codes.shape[1]:
+            # Row -1 of the padded matrix is zero, for baseline/missing categories
+            w_padded = np.vstack([w, np.zeros((1, w.shape[1]), dtype=w.dtype)])
+            for column in self.codes.T:
+                out += w_padded[column]
+        return out
+
+    def gradient(self, dz):
+        """
+        X.T @ dz: the dense block's product plus, for each categorical
+        column, the sum of `dz` over the rows of each category.
+        """
+        grad = np.zeros((self.n_features, dz.shape[1]), dtype=dz.dtype)
+        grad[self.dense_rows] = self.dense.T @ dz
+        for order, starts, rows in self._groups:
+            if starts.size:
+                grad[rows] += np.add.reduceat(dz[order], starts, axis=0)
+        return grad
+
+    def toarray(self):
+        X = np.zeros(self.shape, dtype=self.dtype)
+        X[:, self.dense_rows] = self.dense
+        for column in self.codes.T:
+            rows = np.flatnonzero(column >= 0)
+            X[rows, column[rows]] = 1
+        return X
+
+
+class OneHotLayout:
+    """
+    Column layout of `pd.get_dummies(df, drop_first=True)`, fitted on one
+    frame (the training split) and applied to others so every split maps to
+    the same `w1` rows.
+    """
+
+    def __init__(self, numeric_columns, categories):
+        self.numeric_columns = list(numeric_columns)
+        self.categories = categories
+
+    @classmethod
+    def fit(cls, df):
+        categorical = df.select_dtypes(include=["object", "string", "category"]).columns
+        numeric = [column for column in df.columns if column not in categorical]
+        categories = {column: list(pd.Categorical(df[column]).categories) for column in categorical}
+        return cls(numeric, categories)
+
+    @property
+    def feature_names(self):
+        names = list(self.numeric_columns)
+        for column, values in self.categories.items():
+            names.extend(f"{column}_{value}" for value in values[1:])
+        return names
+
+    def transform(self, df):
+        """
+        Returns:
+            OneHotMatrix: `df` in this layout. Categories not seen when fitting
+            are treated like the baseline.
+        """
+        dense = df[self.numeric_columns].to_numpy(dtype=np.float64)
+        codes = np.empty((len(df), len(self.categories)), dtype=np.intp)
+        offset = len(self.numeric_columns)
+        for k, (column, values) in enumerate(self.categories.items()):
+            # -1 for missing values and categories not seen when fitting
+            category_codes = pd.Index(values).get_indexer(df[column]).astype(np.intp)
+            # Code 0 is the dropped baseline; code i > 0 is w1 row offset + i - 1
+            codes[:, k] = np.where(category_codes > 0, offset + category_codes - 1, -1)
+            offset += max(len(values) - 1, 0)
+        matrix = OneHotMatrix(dense, np.arange(len(self.numeric_columns)), codes, offset)
+        matrix.layout = self
+        return matrix
@@ -1,10 +1,18 @@
+import argparse
+import json
 import numpy as np
 import pandas as pd
 import os
+import sys
 
 # Define directories
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-SPLITS_DIR = os.path.join(PROJECT_ROOT, "data", "splits")
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "src"))
+from profiling import profile_stage
+from serving.ensemble import stack_members
+from split_indices import read_split
+from sparse_features import OneHotLayout, OneHotMatrix
+
 MODEL_DIR = os.path.join(PROJECT_ROOT, "models")
 os.makedirs(MODEL_DIR, exist_ok=True)
 
@@ -16,47 +24,99 @@ OUTPUT_SIZE = 1  # For regression (e.g., score_diff), set to 1
 LEARNING_RATE = 0.01
 EPOCHS = 100
 
+# Numeric precision: "float64", "float32", or "mixed" (float32 compute, float64 master weights)
+PRECISION = os.environ.get("NN_PRECISION", "float64")
+PRECISIONS = {"float64": (np.float64, np.float64), "float32": (np.float32, np.float32), "mixed": (np.float32, np.float64)}
+
+# Keep one-hot columns as category indices (see sparse_features.OneHotMatrix)
+SPARSE_INPUT = os.environ.get("NN_SPARSE_INPUT", "") not in ("", "0")
+
+# Bootstrap ensemble members trained per sport; 1 trains a single network
+ENSEMBLE_SIZE = int(os.environ.get("NN_ENSEMBLE_SIZE", "1"))
+
+# Leagues trained by default; each gets its own models/nn_weights_{sport}.npy
+SPORTS = ["nba", "nfl"]
+
+# Identifier and free-text columns dropped before one-hot encoding
+DROP_COLUMNS = {
+    "nba": ["date", "score_diff_bin", "away", "home", "whos_favored",
+            "home_team_combined", "away_team_combined", "home_team",
+            "away_team", "bookmaker", "market_type", "name"],
+    "nfl": ["schedule_date", "score_diff_bin", "team_home", "team_away", "team_favorite_id",
+            "stadium", "weather_detail", "home_team_combined", "away_team_combined", "home_team",
+            "away_team", "bookmaker", "market_type", "name"],
+}
+
+def precision_dtypes(precision):
+    """
+    (compute dtype, master weight dtype) for a precision name.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision} (expected one of {', '.join(PRECISIONS)})")
+    return PRECISIONS[precision]
+
 # Initialize weights and biases
-def initialize_weights(input_size, hidden_size_1, hidden_size_2, output_size):
-    np.random.seed(42)
+def initialize_weights(input_size, hidden_size_1, hidden_size_2, output_size, dtype=np.float64, seed=42):
+    np.random.seed(seed)
+    # Drawn in float64 and cast, so every precision starts from the same values
     weights = {
-        "w1": np.random.randn(input_size, hidden_size_1).astype(np.float64) * 0.01,
-        "b1": np.zeros((1, hidden_size_1), dtype=np.float64),
-        "w2": np.random.randn(hidden_size_1, hidden_size_2).astype(np.float64) * 0.01,
-        "b2": np.zeros((1, hidden_size_2), dtype=np.float64),
-        "w3": np.random.randn(hidden_size_2, output_size).astype(np.float64) * 0.01,
-        "b3": np.zeros((1, output_size), dtype=np.float64),
+        "w1": (np.random.randn(input_size, hidden_size_1) * 0.01).astype(dtype),
+        "b1": np.zeros((1, hidden_size_1), dtype=dtype),
+        "w2": (np.random.randn(hidden_size_1, hidden_size_2) * 0.01).astype(dtype),
+        "b2": np.zeros((1, hidden_size_2), dtype=dtype),
+        "w3": (np.random.randn(hidden_size_2, output_size) * 0.01).astype(dtype),
+        "b3": np.zeros((1, output_size), dtype=dtype),
     }
     return weights
 
+def as_dtype(X, dtype):
+    """
+    Dense array or OneHotMatrix in `dtype`, without copying when it already is.
+    """
+    if isinstance(X, OneHotMatrix):
+        return X.astype(dtype, copy=False)
+    return np.asarray(X, dtype=dtype)
+
+def cast_weights(weights, dtype):
+    """
+    Weights in `dtype`; arrays already in it are reused, not copied.
+    """
+    return {key: value.astype(dtype, copy=False) for key, value in weights.items()}
+
 # Activation function
 def sigmoid(x):
-    x = np.array(x, dtype=np.float64)  # Ensure x is a NumPy array with float64 dtype
-    x_clipped = np.clip(x, -500, 500)  # Clip values to prevent overflow in np.exp
-    return 1 / (1 + np.exp(-x_clipped))
+    # 1 / (1 + exp(-x)) == 0.5 * (1 + tanh(x / 2)), which cannot overflow, so no
+    # clipped copy is needed; computed in place and in the dtype of x
+    out = np.multiply(x, 0.5)
+    np.tanh(out, out=out)
+    out += 1
+    out *= 0.5
+    return out
 
 def sigmoid_derivative(x):
     return x * (1 - x)
 
 # Forward pass
 def forward_propagation(X, weights):
-    X = np.array(X, dtype=np.float64)  # Ensure X is a NumPy array of floats
-    z1 = np.dot(X, weights["w1"]) + weights["b1"]
-    print(f"Debug: z1 type={type(z1)}, dtype={z1.dtype}, shape={z1.shape}")
+    X = as_dtype(X, weights["w1"].dtype)  # No copy when X is already in the weights' dtype
+    if isinstance(X, OneHotMatrix):
+        z1 = X.dot(weights["w1"]) + weights["b1"]  # Gathers w1 rows for the one-hot columns
+    else:
+        z1 = np.dot(X, weights["w1"]) + weights["b1"]
     a1 = sigmoid(z1)
     z2 = np.dot(a1, weights["w2"]) + weights["b2"]
-    print(f"Debug: z2 type={type(z2)}, dtype={z2.dtype}, shape={z2.shape}")
     a2 = sigmoid(z2)
     z3 = np.dot(a2, weights["w3"]) + weights["b3"]
-    print(f"Debug: z3 type={type(z3)}, dtype={z3.dtype}, shape={z3.shape}")
     a3 = z3  # Output layer (no activation for regression)
     cache = {"z1": z1, "a1": a1, "z2": z2, "a2": a2, "z3": z3, "a3": a3}
     return a3, cache
 
 # Backward pass
 def backward_propagation(X, y, weights, cache):
-    X = np.array(X, dtype=np.float64)  # Ensure X is float64
-    y = np.array(y, dtype=np.float64)  # Ensure y is float64
+    # Gradients are computed in the dtype of the forward pass
+    dtype = cache["a3"].dtype
+    X = as_dtype(X, dtype)
+    y = np.asarray(y, dtype=dtype)
     m = X.shape[0]
 
     dz3 = cache["a3"] - y
@@ -68,17 +128,13 @@ def backward_propagation(X, y, weights, cache):
     db2 = np.sum(dz2, axis=0, keepdims=True) / m
 
     dz1 = np.dot(dz2, weights["w2"].T) * sigmoid_derivative(cache["a1"])
-    dw1 = np.dot(X.T, dz1) / m
+    if isinstance(X, OneHotMatrix):
+        dw1 = X.gradient(dz1) / m  # Segment sums over each category's rows
+    else:
+        dw1 = np.dot(X.T, dz1) / m
     db1 = np.sum(dz1, axis=0, keepdims=True) / m
 
-    gradients = {
-        "dw1": np.array(dw1, dtype=np.float64),
-        "db1": np.array(db1, dtype=np.float64),
-        "dw2": np.array(dw2, dtype=np.float64),
-        "db2": np.array(db2, dtype=np.float64),
-        "dw3": np.array(dw3, dtype=np.float64),
-        "db3": np.array(db3, dtype=np.float64),
-    }
+    gradients = {"dw1": dw1, "db1": db1, "dw2": dw2, "db2": db2, "dw3": dw3, "db3": db3}
 
     return gradients
 
@@ -93,45 +149,146 @@ def compute_loss(y_pred, y):
     return np.mean((y_pred - y) ** 2)
 
 # Load dataset
-def load_data(file_name):
-    file_path = os.path.join(SPLITS_DIR, file_name)
-    data = pd.read_csv(file_path)
-    print(f"Loading data from {file_name}...")
-    drop_cols = ["date", "score_diff_bin", "away", "home", "whos_favored", 
-                 "home_team_combined", "away_team_combined", "home_team", 
-                 "away_team", "bookmaker", "market_type", "name"]
-    data = data.drop(columns=drop_cols)
+@profile_stage
+def load_data(prefix, split, sparse=False, layout=None):
+    """
+    Features and score_diff target of a split.
+
+    With `sparse`, X is a OneHotMatrix in `layout` (fitted on this split when
+    not given; pass the training split's `X.layout` for the others). It has
+    the same columns as the dense get_dummies matrix.
+    """
+    data = read_split(prefix, split)
+    print(f"Loading {prefix} {split} split...")
+    data = data.drop(columns=DROP_COLUMNS[prefix], errors="ignore")
+    if sparse:
+        features = data.drop(columns=["score_diff"])
+        layout = layout or OneHotLayout.fit(features)
+        return layout.transform(features), data["score_diff"].to_numpy(dtype=np.float64).reshape(-1, 1)
     data = pd.get_dummies(data, drop_first=True)
-    X = data.drop(columns=["score_diff"]).values
-    y = data["score_diff"].values.reshape(-1, 1)
+    X = data.drop(columns=["score_diff"]).to_numpy(dtype=np.float64)
+    y = data["score_diff"].to_numpy(dtype=np.float64).reshape(-1, 1)
     return X, y
 
+def fit(X_train, y_train, X_val, y_val, precision=PRECISION, epochs=EPOCHS, verbose=True, seed=42):
+    """
+    Train the network with full-batch gradient descent.
+
+    With "mixed" precision the forward and backward passes run on a float32
+    copy of the float64 master weights, and updates are applied to the master.
+
+    Returns:
+        tuple: (weights in the master dtype, final validation loss)
+    """
+    compute_dtype, master_dtype = precision_dtypes(precision)
+    X_train = as_dtype(X_train, compute_dtype)
+    y_train = np.asarray(y_train, dtype=compute_dtype)
+    X_val = as_dtype(X_val, compute_dtype)
+    y_val = np.asarray(y_val, dtype=compute_dtype)
+    weights = initialize_weights(
+        X_train.shape[1], HIDDEN_SIZE_1, HIDDEN_SIZE_2, OUTPUT_SIZE, dtype=master_dtype, seed=seed
+    )
+    val_loss = None
+    for epoch in range(epochs):
+        compute_weights = cast_weights(weights, compute_dtype)
+        y_pred, cache = forward_propagation(X_train, compute_weights)
+        train_loss = compute_loss(y_pred, y_train)
+        gradients = backward_propagation(X_train, y_train, compute_weights, cache)
+        weights = update_weights(weights, gradients, LEARNING_RATE)
+        y_val_pred, _ = forward_propagation(X_val, cast_weights(weights, compute_dtype))
+        val_loss = compute_loss(y_val_pred, y_val)
+        if verbose and epoch % 10 == 0:
+            print(f"Epoch {epoch}/{epochs} - Train Loss: {train_loss:.4f}, Val Loss: {val_loss:.4f}")
+    return weights, float(val_loss)
+
+def fit_ensemble(X_train, y_train, X_val, y_val, members, precision=PRECISION, epochs=EPOCHS):
+    """
+    Train `members` networks, each on a bootstrap resample of the training
+    rows and from its own initial weights, and stack them for vectorized
+    inference (see `serving.ensemble.stack_members`).
+
+    Returns:
+        tuple: (stacked weights, validation loss of each member)
+    """
+    trained, losses = [], []
+    n_rows = X_train.shape[0]
+    for k in range(members):
+        rows = np.random.default_rng(k).integers(0, n_rows, n_rows)
+        X_sample = X_train.take(rows) if isinstance(X_train, OneHotMatrix) else X_train[rows]
+        weights, val_loss = fit(X_sample, y_train[rows], X_val, y_val, precision, epochs, verbose=False, seed=42 + k)
+        print(f"Ensemble member {k + 1}/{members} - Val Loss: {val_loss:.4f}")
+        trained.append(weights)
+        losses.append(val_loss)
+    return stack_members(trained), losses
+
+def precision_parity(X_train, y_train, X_val, y_val, precision, epochs=EPOCHS):
+    """
+    Train with float64 and with `precision` from the same initial weights and
+    compare their validation predictions.
+
+    Returns:
+        dict: Validation losses, the largest absolute prediction difference and
+        the largest difference relative to the spread of the float64 predictions.
+    """
+    baseline, baseline_loss = fit(X_train, y_train, X_val, y_val, "float64", epochs, verbose=False)
+    candidate, candidate_loss = fit(X_train, y_train, X_val, y_val, precision, epochs, verbose=False)
+    baseline_pred, _ = forward_propagation(X_val, baseline)
+    candidate_pred, _ = forward_propagation(X_val, cast_weights(candidate, np.float64))
+    max_abs_diff = float(np.max(np.abs(baseline_pred - candidate_pred)))
+    return {
+        "precision": precision,
+        "float64_val_loss": baseline_loss,
+        f"{precision}_val_loss": candidate_loss,
+        "max_abs_prediction_diff": max_abs_diff,
+        "max_relative_prediction_diff": max_abs_diff / max(float(np.std(baseline_pred)), 1e-12),
+    }
+
 # Training the model
-def train_neural_network():
-    print("Loading training data...")
-    X_train, y_train = load_data("nba_train.csv")
-    X_val, y_val = load_data("nba_val.csv")
+@profile_stage
+def train_neural_network(sport="nba", precision=PRECISION, sparse=SPARSE_INPUT, members=ENSEMBLE_SIZE):
+    print(f"Loading {sport.upper()} training data...")
+    X_train, y_train = load_data(sport, "train", sparse)
+    X_val, y_val = load_data(sport, "val", sparse, X_train.layout if sparse else None)
     global INPUT_SIZE
     INPUT_SIZE = X_train.shape[1]
     print(f"Detected INPUT_SIZE: {INPUT_SIZE}")
-    print("Initializing weights...")
-    weights = initialize_weights(INPUT_SIZE, HIDDEN_SIZE_1, HIDDEN_SIZE_2, OUTPUT_SIZE)
-    for epoch in range(EPOCHS):
-        y_pred, cache = forward_propagation(X_train, weights)
-        train_loss = compute_loss(y_pred, y_train)
-        gradients = backward_propagation(X_train, y_train, weights, cache)
-        weights = update_weights(weights, gradients, LEARNING_RATE)
-        y_val_pred, _ = forward_propagation(X_val, weights)
-        val_loss = compute_loss(y_val_pred, y_val)
-        if epoch % 10 == 0:
-            print(f"Epoch {epoch}/{EPOCHS} - Train Loss: {train_loss:.4f}, Val Loss: {val_loss:.4f}")
-    save_model(weights)
+    print(f"Training in {precision} precision...")
+    if members > 1:
+        print(f"Training an ensemble of {members} bootstrap members...")
+        weights, _ = fit_ensemble(X_train, y_train, X_val, y_val, members, precision)
+    else:
+        weights, _ = fit(X_train, y_train, X_val, y_val, precision)
+    save_model(weights, sport)
+
+def model_path_for(sport):
+    return os.path.join(MODEL_DIR, f"nn_weights_{sport}.npy")
 
 # Save model weights
-def save_model(weights):
-    model_path = os.path.join(MODEL_DIR, "nn_weights.npy")
-    np.save(model_path, weights)
+def save_model(weights, sport="nba"):
+    model_path = model_path_for(sport)
+    # Write then rename, so a serving process watching the file never reads it half-written
+    tmp_path = f"{model_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, weights)
+    os.replace(tmp_path, model_path)
     print(f"Model saved at {model_path}")
 
 if __name__ == "__main__":
-    train_neural_network()
+    parser = argparse.ArgumentParser(description="Train the score-difference network.")
+    parser.add_argument("sports", nargs="*", default=SPORTS, help="Leagues to train (default: all)")
+    parser.add_argument("--precision", choices=list(PRECISIONS), default=PRECISION)
+    parser.add_argument("--sparse", action="store_true", default=SPARSE_INPUT,
+                        help="Keep one-hot columns as category indices")
+    parser.add_argument("--ensemble", type=int, default=ENSEMBLE_SIZE, metavar="K",
+                        help="Train K bootstrap members into one stacked artifact")
+    parser.add_argument("--parity", action="store_true",
+                        help="Compare --precision against float64 instead of saving a model")
+    args = parser.parse_args()
+
+    for sport in args.sports:
+        if args.parity:
+            X_train, y_train = load_data(sport, "train", args.sparse)
+            X_val, y_val = load_data(sport, "val", args.sparse, X_train.layout if args.sparse else None)
+            print(json.dumps(dict(precision_parity(X_train, y_train, X_val, y_val, args.precision), sport=sport), indent=2))
+        else:
+            train_neural_network(sport, args.precision, args.sparse, args.ensemble)
@@ -0,0 +1,332 @@
+"""
+Player identity index for matching free-text player names (the injury
+reports) to the players of the stats tables.
+
+Names are normalized (accents, punctuation and initials removed) into a
+stable player id. Jr./Sr./II suffixes stay in the id, so a father and son
+sharing a name remain two players, but are ignored for blocking and fuzzy
+scoring. A name without an exact match is compared only against the players
+in its block (same Soundex code of the surname and same first initial),
+filtered by team and position, so resolving a report is a few dictionary
+lookups and a handful of fuzzy comparisons per name.
+"""
+import os
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+from profiling import profile_stage
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PROCESSED_DIR = os.path.join(PROJECT_ROOT, "data", "processed")
+
+NAME_SUFFIXES = {"jr", "sr", "ii", "iii", "iv", "v"}
+MATCH_THRESHOLD = 85  # rapidfuzz token_sort_ratio for a fuzzy match within a block
+
+# Roles each listed position can play, per sport; two listings can be the
+# same player when their roles overlap (an NBA 'PF' may be listed as 'C')
+POSITION_ROLES = {
+    "nba": {
+        "PG": {"G"}, "G": {"G", "W"}, "SG": {"G", "W"}, "SF": {"W", "B"}, "F": {"W", "B"}, "PF": {"B"}, "C": {"B"},
+    },
+    "nfl": {
+        "QB": {"QB"}, "RB": {"RB"}, "HB": {"RB"}, "FB": {"RB"}, "WR": {"WR"}, "TE": {"TE"},
+        "OT": {"OL"}, "T": {"OL"}, "G": {"OL"}, "OG": {"OL"}, "C": {"OL"}, "OL": {"OL"},
+        "DT": {"DL"}, "DE": {"DL"}, "NT": {"DL"}, "DL": {"DL"}, "LB": {"LB"}, "ILB": {"LB"}, "OLB": {"LB"}, "MLB": {"LB"},
+        "CB": {"DB"}, "S": {"DB"}, "FS": {"DB"}, "SS": {"DB"}, "DB": {"DB"}, "K": {"K"}, "PK": {"K"}, "P": {"P"}, "LS": {"LS"},
+    },
+}
+
+MATCH_COLUMNS = ["name", "team", "position", "player_id", "match_method", "match_score"]
+
+# Share of a player's production missing, by injury status
+STATUS_WEIGHTS = {
+    "out": 1.0, "injured reserve": 1.0, "suspension": 1.0, "doubtful": 0.75,
+    "day-to-day": 0.5, "questionable": 0.5, "probable": 0.1,
+}
+
+# Season totals of players traded mid-season ('2TM', 'TOT'), listed before their per-team rows
+COMBINED_TEAMS = r"^(?:\dTM|TOT)$"
+
+# Counting stats of `data_combining.aggregate_player_stats` summed into injury impact
+IMPACT_METRICS = {"nba": ["PTS", "TRB", "AST"], "nfl": ["Yds", "TD", "Int", "4QC", "GWD"]}
+
+
+def normalize_name(name):
+    """
+    Comparable form of a player name: 'Luka Dončić' -> 'luka doncic',
+    'C.J. McCollum' -> 'cj mccollum', 'Paris Johnson Jr.' -> 'paris johnson jr'.
+    """
+    if not isinstance(name, str):
+        return ""
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii").lower()
+    name = re.sub(r"[-_]", " ", name)
+    tokens = re.sub(r"[^\w\s]", "", name).split()
+    suffixes = [token for token in tokens[1:] if token in NAME_SUFFIXES]
+    tokens = [token for token in tokens if token not in NAME_SUFFIXES] or tokens
+    # Spaced initials ('c j mccollum') join into one token like 'cj'
+    joined = []
+    for token in tokens:
+        if len(token) == 1 and joined and joined[-1].isalpha() and len(joined[-1]) < 3 and len(tokens) > 2:
+            joined[-1] += token
+        else:
+            joined.append(token)
+    return " ".join(joined + suffixes)
+
+
+def base_name(normalized):
+    """
+    Normalized name without its Jr./Sr./II suffix: 'gary trent jr' -> 'gary trent'.
+    """
+    tokens = normalized.split()
+    return " ".join(tokens[:1] + [token for token in tokens[1:] if token not in NAME_SUFFIXES])
+
+
+def name_suffix(normalized):
+    """
+    Suffix of a normalized name ('jr', 'ii', ...), or '' without one.
+    """
+    return " ".join(token for token in normalized.split()[1:] if token in NAME_SUFFIXES)
+
+
+def soundex(word):
+    """
+    American Soundex code of `word`, e.g. 'robert' -> 'R163'.
+    """
+    codes = {**dict.fromkeys("bfpv", "1"), **dict.fromkeys("cgjkqsxz", "2"), **dict.fromkeys("dt", "3"),
+             "l": "4", **dict.fromkeys("mn", "5"), "r": "6"}
+    word = re.sub(r"[^a-z]", "", word.lower())
+    if not word:
+        return ""
+    encoded, previous = [], codes.get(word[0], "")
+    for char in word[1:]:
+        code = codes.get(char, "")
+        if code and code != previous:
+            encoded.append(code)
+        if char not in "hw":
+            previous = code
+    return (word[0].upper() + "".join(encoded) + "000")[:4]
+
+
+def block_key(normalized):
+    """
+    Blocking key of a normalized name: Soundex of the surname plus the first
+    initial, so 'jonathan kuminga' and 'jonathon kuminga' share a block, as
+    do 'gary trent' and 'gary trent jr'.
+    """
+    tokens = base_name(normalized).split()
+    if not tokens:
+        return ""
+    return f"{soundex(tokens[-1])}{tokens[0][0]}"
+
+
+def primary_position(position):
+    """
+    First position of a listing such as 'SF-PF', or None.
+    """
+    if not isinstance(position, str) or not position.strip():
+        return None
+    return re.split(r"[-/,]", position.strip().upper())[0]
+
+
+class PlayerIndex:
+    """
+    Players of one sport's stats tables, indexed by normalized name and by
+    block.
+
+    Each player keeps the team, position and year of their latest
+    stats row. `add_players` only processes names it has not seen, and
+    `resolve` caches every query, so both can be called again as the stats
+    and the injury reports update.
+
+    Args:
+        sport (str): 'nba' or 'nfl'.
+    """
+
+    def __init__(self, sport):
+        self.sport = sport
+        self.players = {}  # player id -> (team, position, year)
+        self.blocks = {}  # block key -> [player id, ...]
+        self._ids = {}  # raw name -> player id
+        self._resolved = {}
+
+    def __len__(self):
+        return len(self.players)
+
+    @profile_stage
+    def add_players(self, stats, name_col="Player", team_col="Team", position_col="Pos", year_col="Year"):
+        """
+        Add the players of a stats table.
+
+        Returns:
+            Series: Player id of every row of `stats`.
+        """
+        names = stats[name_col]
+        for name in names.drop_duplicates():
+            if name not in self._ids:
+                self._ids[name] = normalize_name(name)
+        ids = names.map(self._ids)
+
+        # Latest row per player: its team and position describe the player now
+        latest = pd.DataFrame({
+            "player_id": ids,
+            "team": stats[team_col],
+            "position": stats[position_col].map(primary_position),
+            "year": stats[year_col] if year_col in stats else 0,
+        }).sort_values("year", kind="stable").drop_duplicates("player_id", keep="last")
+        added = 0
+        for player_id, team, position, year in latest.itertuples(index=False):
+            if not player_id:
+                continue
+            known = self.players.get(player_id)
+            if known is None:
+                self.blocks.setdefault(block_key(player_id), []).append(player_id)
+                added += 1
+            if known is None or year >= known[2]:
+                self.players[player_id] = (team, position, year)
+        if added:
+            # New players can turn earlier misses into matches; matches stay valid
+            self._resolved = {key: result for key, result in self._resolved.items() if result[0] is not None}
+        return ids
+
+    def _compatible(self, player_id, team, position):
+        known_team, known_position, _ = self.players[player_id]
+        if team is not None and known_team is not None and team != known_team:
+            return False
+        roles = POSITION_ROLES[self.sport]
+        if position not in roles or known_position not in roles:
+            return True
+        return not roles[position].isdisjoint(roles[known_position])
+
+    def resolve_one(self, name, team=None, position=None):
+        """
+        Player id of `name`, the match method ('exact' or 'fuzzy') and score,
+        or (None, None, 0) when no player in its block is close enough.
+
+        Fuzzy scores compare names without suffixes, so 'Gary Trent' finds
+        'gary trent jr'; players tied on score go to the one with the latest
+        stats, the father and son of a shared name usually being years apart.
+        A name given with a suffix only matches that suffix, or a listing
+        without one when no player has the exact name.
+        """
+        position = primary_position(position)
+        cache_key = (name, team, position)
+        if cache_key in self._resolved:
+            return self._resolved[cache_key]
+
+        normalized = normalize_name(name)
+        if normalized in self.players and self._compatible(normalized, team, position):
+            result = (normalized, "exact", 100.0)
+        else:
+            suffix = name_suffix(normalized)
+            candidates = {
+                player_id: base_name(player_id) for player_id in self.blocks.get(block_key(normalized), ())
+                if self._compatible(player_id, team, position)
+                and (not suffix or name_suffix(player_id) == suffix
+                     or (not name_suffix(player_id) and normalized not in self.players))
+            }
+            matches = process.extract(base_name(normalized), candidates, scorer=fuzz.token_sort_ratio,
+                                      score_cutoff=MATCH_THRESHOLD, limit=None)
+            if matches:
+                best = max(score for _, score, _ in matches)
+                player_id = max((key for _, score, key in matches if score == best), key=lambda key: self.players[key][2])
+                result = (player_id, "fuzzy", float(best))
+            else:
+                result = (None, None, 0.0)
+        self._resolved[cache_key] = result
+        return result
+
+    @profile_stage
+    def resolve(self, names, teams=None, positions=None):
+        """
+        Resolve many names at once; repeated (name, team, position) triples
+        are resolved once.
+
+        Returns:
+            DataFrame: player_id, match_method and match_score per name.
+        """
+        names = pd.Series(names).reset_index(drop=True)
+        teams = pd.Series(teams if teams is not None else [None] * len(names)).reset_index(drop=True)
+        positions = pd.Series(positions if positions is not None else [None] * len(names)).reset_index(drop=True)
+        results = [
+            self.resolve_one(name, None if pd.isna(team) else team, position)
+            for name, team, position in zip(names, teams, positions)
+        ]
+        return pd.DataFrame(results, columns=["player_id", "match_method", "match_score"])
+
+    def save_matches(self, path):
+        """
+        Write the resolved names to `path`, so the next scrape only resolves
+        names it has not seen. Player ids are normalized names, so saved
+        matches stay valid as the stats grow.
+        """
+        rows = [(*key, *result) for key, result in self._resolved.items() if result[0] is not None]
+        pd.DataFrame(rows, columns=MATCH_COLUMNS).to_csv(path, index=False)
+
+    def load_matches(self, path):
+        """
+        Reuse the matches saved by `save_matches` whose player is still in
+        the index.
+        """
+        if not os.path.exists(path):
+            return
+        matches = pd.read_csv(path, keep_default_na=False, na_values={"match_score": [""]})
+        for name, team, position, player_id, method, score in matches[MATCH_COLUMNS].itertuples(index=False):
+            if player_id in self.players:
+                self._resolved[(name, team or None, position or None)] = (player_id, method, float(score))
+
+
+def matches_path(sport, processed_dir=PROCESSED_DIR):
+    return os.path.join(processed_dir, f"{sport}_player_matches.csv")
+
+
+def resolve_injuries(injuries, index, name_col="NAME", team_col="TEAM", position_col="POS"):
+    """
+    `injuries` with player_id, match_method and match_score columns. The
+    report's team column is used for blocking when it has one.
+    """
+    matches = index.resolve(
+        injuries[name_col],
+        injuries[team_col] if team_col in injuries else None,
+        injuries[position_col] if position_col in injuries else None,
+    )
+    return pd.concat([injuries.reset_index(drop=True), matches], axis=1)
+
+
+@profile_stage
+def injury_impact(injuries, player_stats, sport, status_col="STATUS"):
+    """
+    Per-team production missing to injury, from each resolved injured
+    player's latest season, weighted by status (see STATUS_WEIGHTS).
+
+    Args:
+        injuries (DataFrame): `resolve_injuries` output.
+        player_stats (DataFrame): Stats with a player_id column.
+
+    Returns:
+        DataFrame: Team, injured_players and, per IMPACT_METRICS column,
+        injured_<metric> and its share of the team's total that season.
+    """
+    metrics = IMPACT_METRICS[sport]
+    player_stats = player_stats[~player_stats["Team"].astype(str).str.match(COMBINED_TEAMS)]
+    latest_year = player_stats.groupby("player_id")["Year"].transform("max")
+    latest = player_stats[player_stats["Year"] == latest_year]
+    # Traded players have one row per team, in trade order; only the latest team's row counts,
+    # so a player's production is never credited to a team it was not produced for
+    per_player = latest.drop_duplicates("player_id", keep="last").set_index("player_id")[["Team", "Year", *metrics]]
+
+    resolved = injuries.dropna(subset=["player_id"])
+    weights = resolved[status_col].astype(str).str.strip().str.lower().map(STATUS_WEIGHTS).fillna(1.0).to_numpy()
+    injured = per_player.loc[resolved["player_id"]].reset_index()
+    injured[metrics] = injured[metrics].to_numpy(dtype=np.float64) * weights[:, None]
+    impact = injured.groupby(["Team", "Year"]).agg(
+        injured_players=("player_id", "nunique"), **{f"injured_{m}": (m, "sum") for m in metrics}
+    ).reset_index()
+
+    team_totals = player_stats.groupby(["Team", "Year"])[metrics].sum().add_prefix("team_").reset_index()
+    impact = impact.merge(team_totals, on=["Team", "Year"], how="left")
+    for metric in metrics:
+        impact[f"injured_{metric}_share"] = impact[f"injured_{metric}"] / impact[f"team_{metric}"].replace(0, np.nan)
+    return impact.drop(columns=[f"team_{m}" for m in metrics])
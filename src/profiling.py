@@ -0,0 +1,247 @@
+"""
+Per-stage timing and memory instrumentation for the data pipeline.
+
+Stages are marked with the `profile_stage` decorator or the `stage` context
+manager. Nothing is recorded unless PIPELINE_PROFILE is set:
+
+    PIPELINE_PROFILE=1             wall time, CPU time, peak memory and row counts
+    PIPELINE_PROFILE=cprofile      the above plus a cProfile capture of each top-level stage
+    PIPELINE_PROFILE=pyinstrument  the above plus a pyinstrument capture (falls back to cProfile)
+
+A JSON and an HTML report are written to reports/profiling/ when the process
+exits.
+"""
+import atexit
+import cProfile
+import functools
+import html
+import io
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+REPORT_DIR = os.path.join(PROJECT_ROOT, "reports", "profiling")
+
+PROFILE_MODE = os.environ.get("PIPELINE_PROFILE", "").strip().lower()
+if PROFILE_MODE in ("0", "false", "off"):
+    PROFILE_MODE = ""
+
+# Stage name -> aggregated record, in first-call order
+records = {}
+_stack = []
+
+
+def enabled():
+    return bool(PROFILE_MODE)
+
+
+def count_rows(obj):
+    """
+    Rows in a DataFrame/array, or the total over a tuple/list of them.
+    """
+    if hasattr(obj, "shape") and getattr(obj, "ndim", 0) >= 1:
+        return int(obj.shape[0])
+    if isinstance(obj, (tuple, list)) and obj and all(hasattr(item, "shape") for item in obj):
+        return sum(int(item.shape[0]) for item in obj)
+    return None
+
+
+class StageTimer:
+    """
+    Measurement of one stage call. Row counts can be filled in by the caller
+    of `stage` when they are not the function's input/output.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.rows_in = None
+        self.rows_out = None
+        self.child_peak = 0
+
+
+def _record(timer, wall, cpu, peak, profile_file):
+    record = records.setdefault(timer.name, {
+        "calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "peak_mb": 0.0,
+        "rows_in": 0, "rows_out": 0, "depth": len(_stack), "profiles": [],
+    })
+    record["calls"] += 1
+    record["wall_s"] += wall
+    record["cpu_s"] += cpu
+    record["peak_mb"] = max(record["peak_mb"], peak / 1e6)
+    record["rows_in"] += timer.rows_in or 0
+    record["rows_out"] += timer.rows_out or 0
+    if profile_file:
+        record["profiles"].append(profile_file)
+
+
+def _start_profiler(name):
+    if PROFILE_MODE == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("pyinstrument is not installed; using cProfile instead.")
+        else:
+            profiler = Profiler()
+            profiler.start()
+            return profiler
+    if PROFILE_MODE in ("cprofile", "pyinstrument"):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+    return None
+
+
+def _stop_profiler(profiler, name):
+    """
+    Stop `profiler` and save its output next to the report.
+
+    Returns:
+        str: Path of the saved profile.
+    """
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    stem = os.path.join(REPORT_DIR, f"{name.replace('.', '_')}-{time.strftime('%Y%m%d-%H%M%S')}")
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        profiler.dump_stats(f"{stem}.prof")
+        return f"{stem}.prof"
+    profiler.stop()
+    with open(f"{stem}.html", "w", encoding="utf-8") as f:
+        f.write(profiler.output_html())
+    return f"{stem}.html"
+
+
+@contextmanager
+def stage(name):
+    """
+    Measure the enclosed block as pipeline stage `name`.
+
+    Yields:
+        StageTimer: Set `rows_in`/`rows_out` on it to report row counts.
+    """
+    timer = StageTimer(name)
+    if not PROFILE_MODE:
+        yield timer
+        return
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    # Peaks are tracked per stage by resetting the tracemalloc peak; the
+    # enclosing stage keeps what it had reached so far in `child_peak`
+    current, peak_before = tracemalloc.get_traced_memory()
+    if _stack:
+        _stack[-1].child_peak = max(_stack[-1].child_peak, peak_before)
+    tracemalloc.reset_peak()
+    profiler = _start_profiler(name) if not _stack else None
+    _stack.append(timer)
+
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        yield timer
+    finally:
+        wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+        _stack.pop()
+        profile_file = _stop_profiler(profiler, name) if profiler else None
+        peak = max(tracemalloc.get_traced_memory()[1], timer.child_peak)
+        if _stack:
+            _stack[-1].child_peak = max(_stack[-1].child_peak, peak)
+        _record(timer, wall, cpu, peak - current, profile_file)
+
+
+def profile_stage(func=None, name=None):
+    """
+    Decorator form of `stage`. Rows in are counted from the first positional
+    argument and rows out from the return value when they are DataFrames or
+    arrays.
+
+    Usage:
+        @profile_stage
+        def clean(df): ...
+
+        @profile_stage(name="cleaner.merge")
+        def merge(...): ...
+    """
+    if func is None:
+        return functools.partial(profile_stage, name=name)
+    # Named after the file rather than __module__, which is "__main__" for scripts
+    module = os.path.splitext(os.path.basename(func.__code__.co_filename))[0]
+    stage_name = name or f"{module}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not PROFILE_MODE:
+            return func(*args, **kwargs)
+        with stage(stage_name) as timer:
+            timer.rows_in = count_rows(args[0]) if args else None
+            result = func(*args, **kwargs)
+            timer.rows_out = count_rows(result)
+        return result
+
+    return wrapper
+
+
+def report():
+    """
+    Recorded stages, slowest first, with the top functions of the first
+    cProfile capture of each top-level stage.
+    """
+    stages = []
+    for name, record in sorted(records.items(), key=lambda item: item[1]["wall_s"], reverse=True):
+        captures = [path for path in record["profiles"] if path.endswith(".prof")]
+        stages.append(dict(record, name=name, top_functions=_top_functions(captures[0]) if captures else []))
+    return {"mode": PROFILE_MODE, "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "stages": stages}
+
+
+def _top_functions(path, limit=15):
+    stream = io.StringIO()
+    stats = pstats.Stats(path, stream=stream)
+    stats.sort_stats("cumulative")
+    return [
+        {"function": f"{func[0]}:{func[1]}({func[2]})", "calls": values[1], "cumtime_s": values[3]}
+        for func, values in sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    ]
+
+
+def _render_html(data):
+    rows = "\n".join(
+        f"<tr><td style='padding-left:{8 + 16 * entry['depth']}px'>{html.escape(entry['name'])}</td>"
+        f"<td>{entry['calls']}</td><td>{entry['wall_s']:.3f}</td><td>{entry['cpu_s']:.3f}</td>"
+        f"<td>{entry['peak_mb']:.1f}</td><td>{entry['rows_in']}</td><td>{entry['rows_out']}</td>"
+        f"<td>{'<br>'.join(html.escape(os.path.basename(p)) for p in entry['profiles'])}</td></tr>"
+        for entry in data["stages"]
+    )
+    return (
+        "<html><head><meta charset='utf-8'><title>Pipeline profile</title>"
+        "<style>body{font-family:sans-serif}table{border-collapse:collapse}"
+        "td,th{border:1px solid #ccc;padding:4px 8px;text-align:right}td:first-child{text-align:left}</style>"
+        f"</head><body><h1>Pipeline profile</h1><p>Mode: {html.escape(data['mode'])}, {data['created']}</p>"
+        "<table><tr><th>Stage</th><th>Calls</th><th>Wall (s)</th><th>CPU (s)</th><th>Peak (MB)</th>"
+        f"<th>Rows in</th><th>Rows out</th><th>Profiles</th></tr>{rows}</table></body></html>"
+    )
+
+
+def write_report(path_stem=None):
+    """
+    Write the JSON and HTML reports.
+
+    Returns:
+        str: Path of the JSON report, or None when nothing was recorded.
+    """
+    if not records:
+        return None
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    path_stem = path_stem or os.path.join(REPORT_DIR, f"profile-{time.strftime('%Y%m%d-%H%M%S')}")
+    data = report()
+    with open(f"{path_stem}.json", "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    with open(f"{path_stem}.html", "w", encoding="utf-8") as f:
+        f.write(_render_html(data))
+    print(f"Profiling report saved to {path_stem}.json and {path_stem}.html")
+    return f"{path_stem}.json"
+
+
+if PROFILE_MODE:
+    atexit.register(write_report)
@@ -0,0 +1,386 @@
+"""
+Incremental Elo team ratings, used as pre-game features.
+
+Games are rated in date order with home advantage, a margin-of-victory
+multiplier and regression toward the mean between seasons. Every game
+stores the ratings both teams had *before* it, so the features never see
+the game's own result. The engine's state (current rating and last season
+per team) is saved next to the per-game table, so a new result costs one
+O(1) update and one appended row instead of a full replay.
+
+    python src/ratings.py            # rate games not yet in data/ratings
+    python src/ratings.py --rebuild  # replay every game from the raw files
+"""
+import argparse
+import json
+import math
+import os
+import re
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from cleaner import append_to_csv, create_team_mapping
+from profiling import profile_stage
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RAW_DIR = os.path.join(PROJECT_ROOT, "data", "raw")
+RATINGS_DIR = os.path.join(PROJECT_ROOT, "data", "ratings")
+
+# Raw results file and its columns, per sport
+GameSource = namedtuple("GameSource", ["file", "date", "season", "home", "away", "home_score", "away_score", "neutral"])
+SOURCES = {
+    "nba": GameSource("nba_2008-2024.csv", "date", "season", "home", "away", "score_home", "score_away", None),
+    "nfl": GameSource(
+        "nfl_spreadspoke_scores.csv", "schedule_date", "schedule_season", "team_home", "team_away",
+        "score_home", "score_away", "stadium_neutral",
+    ),
+}
+
+# k: update size; home_advantage: Elo points; carryover: share of a team's
+# distance from the mean kept into the next season
+EloParams = namedtuple("EloParams", ["k", "home_advantage", "carryover"])
+ELO_PARAMS = {
+    "nba": EloParams(20.0, 100.0, 0.75),
+    "nfl": EloParams(20.0, 55.0, 2 / 3),
+}
+INITIAL_RATING = 1500.0
+
+RATING_FEATURES = ["home_elo", "away_elo", "elo_diff", "elo_home_prob"]
+
+
+def team_ids():
+    """
+    Lookup from any spelling of a team (raw abbreviation, full name) to its
+    franchise name in `cleaner.create_team_mapping`, so relocated and renamed
+    teams keep their rating.
+    """
+    mapping = create_team_mapping()
+    # Longest names first, so 'trail blazers' wins over a shorter suffix
+    franchises = sorted(set(mapping.values()), key=len, reverse=True)
+    cache = {}
+
+    def team_id(name):
+        if name not in cache:
+            key = re.sub(r"[^\w\s]", "", str(name).strip().lower())
+            if key not in mapping:
+                key = next((franchise for franchise in franchises if key.endswith(franchise)), key)
+            cache[name] = mapping.get(key, key)
+        return cache[name]
+
+    return team_id
+
+
+def margin_multiplier(sport, margin, winner_elo_diff):
+    """
+    Scale of an update for a `margin`-point win by a team that was rated
+    `winner_elo_diff` above its opponent; favourites' blowouts count less so
+    ratings do not inflate.
+    """
+    margin = max(abs(margin), 1)
+    if sport == "nfl":
+        return math.log(margin + 1) * 2.2 / (winner_elo_diff * 0.001 + 2.2)
+    return (margin + 3) ** 0.8 / (7.5 + 0.006 * winner_elo_diff)
+
+
+class EloRatings:
+    """
+    Current Elo rating of every team of one sport.
+
+    Args:
+        sport (str): 'nba' or 'nfl'.
+        params (EloParams, optional): Overrides the sport's defaults.
+    """
+
+    def __init__(self, sport, params=None):
+        self.sport = sport
+        self.params = params or ELO_PARAMS[sport]
+        self.team_id = team_ids()
+        self.ratings = {}
+        self.seasons = {}
+        self.last_date = None
+        self.last_date_games = set()
+        self.games = 0
+
+    def rating(self, team, season=None):
+        """
+        Rating `team` takes into a game of `season`, including the
+        between-season regression it has not played a game to trigger yet.
+        """
+        team = self.team_id(team)
+        rating = self.ratings.get(team, INITIAL_RATING)
+        last_season = self.seasons.get(team)
+        if season is not None and last_season is not None and season != last_season:
+            rating = INITIAL_RATING + self.params.carryover * (rating - INITIAL_RATING)
+        return rating
+
+    def pregame(self, home, away, season=None, neutral=False):
+        """
+        Rating features of a game before it is played.
+
+        Returns:
+            dict: home_elo, away_elo, elo_diff (home minus away, including
+            home advantage) and elo_home_prob.
+        """
+        home_elo, away_elo = self.rating(home, season), self.rating(away, season)
+        elo_diff = home_elo - away_elo + (0.0 if neutral else self.params.home_advantage)
+        return {
+            "home_elo": home_elo,
+            "away_elo": away_elo,
+            "elo_diff": elo_diff,
+            "elo_home_prob": 1.0 / (1.0 + 10 ** (-elo_diff / 400)),
+        }
+
+    def update(self, home, away, home_score, away_score, season=None, neutral=False):
+        """
+        Apply one result in O(1).
+
+        Returns:
+            dict: The game's pre-game features (see `pregame`).
+        """
+        features = self.pregame(home, away, season, neutral)
+        margin = home_score - away_score
+        result = 1.0 if margin > 0 else 0.0 if margin < 0 else 0.5
+        winner_elo_diff = features["elo_diff"] if margin >= 0 else -features["elo_diff"]
+        shift = self.params.k * margin_multiplier(self.sport, margin, winner_elo_diff) * (result - features["elo_home_prob"])
+
+        home_id, away_id = self.team_id(home), self.team_id(away)
+        self.ratings[home_id] = features["home_elo"] + shift
+        self.ratings[away_id] = features["away_elo"] - shift
+        if season is not None:
+            self.seasons[home_id] = self.seasons[away_id] = season
+        self.games += 1
+        return features
+
+    def is_new(self, date, key):
+        """
+        Whether the game `key` on `date` has not been rated yet.
+        """
+        return self.last_date is None or date > self.last_date or (date == self.last_date and key not in self.last_date_games)
+
+    def mark_rated(self, date, key):
+        if date != self.last_date:
+            self.last_date, self.last_date_games = date, set()
+        self.last_date_games.add(key)
+
+    @profile_stage
+    def process(self, games):
+        """
+        Rate completed games in date order, skipping those already rated.
+
+        Args:
+            games (DataFrame): Rows in the sport's raw layout (see SOURCES).
+
+        Returns:
+            DataFrame: One row per newly rated game with its raw date, home
+            and away columns plus RATING_FEATURES.
+        """
+        source = SOURCES[self.sport]
+        played = games.dropna(subset=[source.home_score, source.away_score])
+        dates = pd.to_datetime(played[source.date]).dt.strftime("%Y-%m-%d").to_numpy()
+        order = np.argsort(dates, kind="stable")
+        columns = [played[column].to_numpy() for column in (source.date, source.home, source.away)]
+        seasons = played[source.season].tolist()
+        home_scores = played[source.home_score].to_numpy(dtype=np.float64)
+        away_scores = played[source.away_score].to_numpy(dtype=np.float64)
+        neutral = played[source.neutral].fillna(False).to_numpy(dtype=bool) if source.neutral else np.zeros(len(played), dtype=bool)
+
+        rows = []
+        for i in order:
+            key = f"{columns[1][i]}|{columns[2][i]}"
+            if not self.is_new(dates[i], key):
+                continue
+            features = self.update(
+                columns[1][i], columns[2][i], home_scores[i], away_scores[i], seasons[i], bool(neutral[i])
+            )
+            self.mark_rated(dates[i], key)
+            rows.append((columns[0][i], columns[1][i], columns[2][i], *features.values()))
+        return pd.DataFrame(rows, columns=[source.date, source.home, source.away] + RATING_FEATURES)
+
+    def state(self):
+        return {
+            "sport": self.sport,
+            "params": self.params._asdict(),
+            "ratings": self.ratings,
+            "seasons": self.seasons,
+            "last_date": self.last_date,
+            "last_date_games": sorted(self.last_date_games),
+            "games": self.games,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        engine = cls(state["sport"], EloParams(**state["params"]))
+        engine.ratings = state["ratings"]
+        engine.seasons = state["seasons"]
+        engine.last_date = state["last_date"]
+        engine.last_date_games = set(state["last_date_games"])
+        engine.games = state["games"]
+        return engine
+
+
+def state_path(sport, ratings_dir=RATINGS_DIR):
+    return os.path.join(ratings_dir, f"{sport}_elo_state.json")
+
+
+def games_path(sport, ratings_dir=RATINGS_DIR):
+    return os.path.join(ratings_dir, f"{sport}_elo_games.csv")
+
+
+def load_engine(sport, ratings_dir=RATINGS_DIR):
+    """
+    Saved engine for `sport`, or a fresh one when none was saved.
+    """
+    path = state_path(sport, ratings_dir)
+    if not os.path.exists(path):
+        return EloRatings(sport)
+    with open(path, "r") as f:
+        return EloRatings.from_state(json.load(f))
+
+
+class EngineCache:
+    """
+    Saved engines of several sports for a long-running process. `get`
+    reloads a sport's engine whenever its state file's mtime changes, e.g.
+    after `update_ratings` or `add_result` ran in another process.
+
+    Args:
+        sports (list): Sports to serve; other sports get None.
+    """
+
+    def __init__(self, sports, ratings_dir=RATINGS_DIR):
+        self.ratings_dir = ratings_dir
+        self._engines = {sport: (None, EloRatings(sport)) for sport in sports}  # sport -> (state mtime, engine)
+        self._lock = threading.Lock()
+
+    def _mtime(self, sport):
+        try:
+            return os.stat(state_path(sport, self.ratings_dir)).st_mtime_ns
+        except OSError:
+            return None
+
+    def get(self, sport):
+        """
+        Current engine of `sport`. A state file that fails to load keeps the
+        previous engine and is retried on the next call.
+        """
+        if sport not in self._engines:
+            return None
+        mtime = self._mtime(sport)
+        with self._lock:
+            loaded_mtime, engine = self._engines[sport]
+            if mtime != loaded_mtime:
+                try:
+                    engine = load_engine(sport, self.ratings_dir)
+                    self._engines[sport] = (mtime, engine)
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"Keeping the loaded {sport.upper()} ratings; reload failed: {e}")
+            return engine
+
+
+def save_engine(engine, ratings_dir=RATINGS_DIR):
+    os.makedirs(ratings_dir, exist_ok=True)
+    path = state_path(engine.sport, ratings_dir)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(engine.state(), f)
+    os.replace(tmp_path, path)
+
+
+@profile_stage
+def update_ratings(sport, rebuild=False, ratings_dir=RATINGS_DIR):
+    """
+    Rate the games of the raw results file that are not rated yet and append
+    them to `{sport}_elo_games.csv`; with `rebuild`, replay every game.
+
+    Returns:
+        DataFrame: The newly rated games.
+    """
+    engine = EloRatings(sport) if rebuild else load_engine(sport, ratings_dir)
+    rated = engine.process(pd.read_csv(os.path.join(RAW_DIR, SOURCES[sport].file), low_memory=False))
+    if len(rated) or rebuild:
+        os.makedirs(ratings_dir, exist_ok=True)
+        path = games_path(sport, ratings_dir)
+        append_to_csv(rated, path, first=rebuild or not os.path.exists(path))
+        save_engine(engine, ratings_dir)
+    print(f"Rated {len(rated)} new {sport.upper()} games ({engine.games} total)")
+    return rated
+
+
+def add_result(engine, date, home, away, home_score, away_score, season=None, neutral=False,
+               ratings_dir=RATINGS_DIR):
+    """
+    Rate one finished game in O(1): update the engine, append the game's
+    pre-game features to `{sport}_elo_games.csv` and save the engine.
+
+    Args:
+        date (str): Game date as written in the raw results file.
+
+    Returns:
+        dict: The game's pre-game features, or None if it was already rated.
+    """
+    source = SOURCES[engine.sport]
+    day, key = pd.Timestamp(date).strftime("%Y-%m-%d"), f"{home}|{away}"
+    if not engine.is_new(day, key):
+        return None
+    features = engine.update(home, away, home_score, away_score, season, neutral)
+    engine.mark_rated(day, key)
+    path = games_path(engine.sport, ratings_dir)
+    os.makedirs(ratings_dir, exist_ok=True)
+    row = pd.DataFrame([(date, home, away, *features.values())], columns=[source.date, source.home, source.away] + RATING_FEATURES)
+    append_to_csv(row, path, first=not os.path.exists(path))
+    save_engine(engine, ratings_dir)
+    return features
+
+
+def load_rating_games(sport, ratings_dir=RATINGS_DIR):
+    """
+    Pre-game rating features of every rated game (`{sport}_elo_games.csv`),
+    or None when no ratings were built.
+    """
+    path = games_path(sport, ratings_dir)
+    if not os.path.exists(path):
+        print(f"No {sport.upper()} ratings at {path}; run src/ratings.py to add rating features")
+        return None
+    source = SOURCES[sport]
+    return pd.read_csv(path, dtype={key: str for key in (source.date, source.home, source.away)})
+
+
+def add_rating_features(df, sport, ratings_dir=RATINGS_DIR, games=None, engine=None):
+    """
+    Join the pre-game rating features onto team data by the raw date and team
+    columns. Games that were not rated (not played yet) get the current
+    ratings, which are their pre-game ratings.
+
+    Args:
+        games (DataFrame, optional): `load_rating_games` output, to reuse
+            across calls (e.g. per partition); loaded when omitted.
+        engine (EloRatings, optional): `load_engine` output, likewise.
+    """
+    if games is None:
+        games = load_rating_games(sport, ratings_dir)
+        if games is None:
+            return df
+    source = SOURCES[sport]
+    df = df.merge(games, on=[source.date, source.home, source.away], how="left", suffixes=("", "_rating"))
+
+    unrated = df.index[df[RATING_FEATURES[0]].isna()]
+    if len(unrated):
+        if engine is None:
+            engine = load_engine(sport, ratings_dir)
+        seasons = df[source.season] if source.season in df else pd.Series(None, index=df.index)
+        df.loc[unrated, RATING_FEATURES] = [
+            list(engine.pregame(df.at[i, source.home], df.at[i, source.away], seasons[i]).values()) for i in unrated
+        ]
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update Elo ratings from the raw results files.")
+    parser.add_argument("sports", nargs="*", default=list(SOURCES), help="Leagues to rate (default: all)")
+    parser.add_argument("--rebuild", action="store_true", help="Replay every game instead of only new ones")
+    args = parser.parse_args()
+
+    for sport in args.sports:
+        update_ratings(sport, args.rebuild)
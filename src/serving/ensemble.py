@@ -0,0 +1,81 @@
+import numpy as np
+
+from serving.quantized import is_quantized, quantized_forward
+
+# Quantiles reported for ensemble predictions
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def is_ensemble(weights):
+    """
+    True for stacked ensemble weights, whose arrays carry a leading member axis.
+    """
+    return np.ndim(weights["w1"]) == 3
+
+
+def input_width(weights):
+    """
+    Number of input features of a single network or an ensemble.
+    """
+    return np.shape(weights["w1"])[-2]
+
+
+def input_dtype(weights):
+    """
+    Dtype to build feature rows in: the weights' own, or float32 for an int8
+    network (its inputs are quantized inside the forward pass).
+    """
+    return np.float32 if is_quantized(weights) else weights["w1"].dtype
+
+
+def stack_members(members):
+    """
+    Stack K single-network weight dicts into one ensemble: w1 (K, in, h1),
+    b1 (K, 1, h1), ..., b3 (K, 1, 1).
+    """
+    return {key: np.stack([member[key] for member in members]) for key in members[0]}
+
+
+def member_predictions(X, weights):
+    """
+    Predictions of every member for every row, in one batched matmul per
+    layer: X (n, in) broadcasts against w1 (K, in, h1) to give (K, n, h1).
+
+    Returns:
+        ndarray: (K, n) for an ensemble, (1, n) for a single network.
+    """
+    if is_quantized(weights):
+        return quantized_forward(X, weights).T
+    X = np.asarray(X, dtype=weights["w1"].dtype)
+    a = X
+    for layer in ("1", "2"):
+        z = np.matmul(a, weights[f"w{layer}"]) + weights[f"b{layer}"]
+        a = 0.5 * (1 + np.tanh(0.5 * z))  # Sigmoid
+    out = np.matmul(a, weights["w3"]) + weights["b3"]
+    return out[..., 0] if out.ndim == 3 else out.T
+
+
+def summarize(predictions, quantiles=QUANTILES):
+    """
+    Mean, standard deviation and quantiles over the member axis of a (K, n)
+    prediction array.
+
+    Returns:
+        ndarray: (n, 2 + len(quantiles)) with columns mean, std, quantiles...
+    """
+    return np.column_stack([
+        predictions.mean(axis=0),
+        predictions.std(axis=0),
+        *np.quantile(predictions, quantiles, axis=0),
+    ])
+
+
+def describe(row, quantiles=QUANTILES):
+    """
+    JSON-ready form of one row of `summarize` output.
+    """
+    return {
+        "prediction": float(row[0]),
+        "std": float(row[1]),
+        "quantiles": {str(q): float(value) for q, value in zip(quantiles, row[2:])},
+    }
@@ -0,0 +1,35 @@
+import numpy as np
+
+# Width of the input layer the served network was trained with
+FEATURE_COUNT = 37
+
+
+def build_feature_matrix(sports, spreads, total_points, feature_count=FEATURE_COUNT, dtype=np.float64):
+    """
+    Map request inputs to the model's feature layout in one vectorized step.
+
+    Column 0 flags NBA games, columns 1-2 hold the spread and total points and
+    the remaining one-hot/placeholder columns are zero.
+
+    Args:
+        sports (array-like): 'nba' or 'nfl' per row.
+        spreads (array-like): Home spread per row.
+        total_points (array-like): Total points line per row.
+        dtype (dtype): Matrix dtype; match the model's weights to avoid a cast.
+
+    Returns:
+        ndarray: (n_rows, feature_count) matrix.
+    """
+    sports = np.asarray(sports)
+    X = np.zeros((len(sports), feature_count), dtype=dtype)
+    X[:, 0] = sports == "nba"  # Example: sport encoding
+    X[:, 1] = np.asarray(spreads, dtype=np.float64)
+    X[:, 2] = np.asarray(total_points, dtype=np.float64)
+    return X
+
+
+def build_features(sport, spread, total_points, feature_count=FEATURE_COUNT):
+    """
+    Feature row for a single `/predict` request, shape (1, feature_count).
+    """
+    return build_feature_matrix([sport], [spread], [total_points], feature_count)
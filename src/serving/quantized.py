@@ -0,0 +1,77 @@
+import numpy as np
+
+INT8_MAX = 127
+LAYERS = ("1", "2", "3")
+
+# Largest integer float32 represents exactly; int8 products summed below it
+# are the same in float32 as in int32
+FLOAT32_EXACT_MAX = 2 ** 24
+
+
+def is_quantized(weights):
+    """
+    True for int8 artifacts written by `src/models/quantize.py`.
+    """
+    return np.asarray(weights["w1"]).dtype == np.int8
+
+
+def quantize(a, scale):
+    """
+    Round `a / scale` to the int8 grid, clipping to [-127, 127]. Values are
+    returned in float32 so the matmul can run on BLAS.
+    """
+    q = np.asarray(a, dtype=np.float32) / scale
+    np.rint(q, out=q)
+    np.clip(q, -INT8_MAX, INT8_MAX, out=q)
+    return q
+
+
+def accumulate(q, w):
+    """
+    int32 accumulation of int8 inputs `q` times int8 weights `w`.
+
+    numpy has no BLAS kernel for integers, so when every partial sum fits in
+    float32's exact integer range (in_features * 127 * 127 < 2**24, true for
+    every layer of this network) the product runs as a float32 matmul, which
+    gives the same integers; wider layers fall back to an int32 matmul.
+    """
+    if w.shape[0] * INT8_MAX * INT8_MAX < FLOAT32_EXACT_MAX:
+        return q @ w.astype(np.float32)
+    return (q.astype(np.int32) @ w.astype(np.int32)).astype(np.float32)
+
+
+def quantized_forward(X, weights):
+    """
+    Forward pass of an int8 network: each layer quantizes its input with the
+    calibrated per-column scale, accumulates in int32 and dequantizes with
+    the per-output weight scale before adding the bias and the sigmoid.
+
+    Returns:
+        ndarray: (n, 1) float32 predictions.
+    """
+    a = X
+    for layer in LAYERS:
+        acc = accumulate(quantize(a, weights[f"x{layer}_scale"]), weights[f"w{layer}"])
+        z = acc * weights[f"w{layer}_scale"] + weights[f"b{layer}"]
+        a = z if layer == "3" else 0.5 * (1 + np.tanh(0.5 * z))  # Sigmoid on hidden layers
+    return a
+
+
+def validate_scales(weights):
+    """
+    Check that every layer of an int8 artifact has finite, positive scales of
+    the right shape.
+
+    Raises:
+        ValueError: When a scale is missing or malformed.
+    """
+    for layer in LAYERS:
+        w = np.asarray(weights[f"w{layer}"])
+        for key, shape in ((f"x{layer}_scale", (1, w.shape[0])), (f"w{layer}_scale", (1, w.shape[1]))):
+            if key not in weights:
+                raise ValueError(f"Quantized weights are missing {key}")
+            scale = np.asarray(weights[key])
+            if scale.shape != shape:
+                raise ValueError(f"{key} has shape {scale.shape}, expected {shape}")
+            if not (np.isfinite(scale).all() and (scale > 0).all()):
+                raise ValueError(f"{key} must be finite and positive")
@@ -0,0 +1,540 @@
+import hashlib
+import io
+import os
+import random
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from serving.ensemble import input_dtype, input_width, is_ensemble
+from serving.features import FEATURE_COUNT, build_feature_matrix
+from serving.quantized import is_quantized, validate_scales
+
+WEIGHT_KEYS = ("w1", "b1", "w2", "b2", "w3", "b3")
+
+ModelVersion = namedtuple("ModelVersion", ["version", "path", "weights", "loaded_at"])
+
+
+def validate_weights(weights, feature_count=FEATURE_COUNT):
+    """
+    Check that `weights` is a complete network with chained layer shapes and
+    finite values for `feature_count` inputs (any width when None), and that
+    a forward pass on a zero row produces one finite output. Stacked ensemble
+    weights are checked member by member, and int8 weights must also carry
+    their calibration scales.
+
+    Raises:
+        ValueError: When any check fails.
+    """
+    if not isinstance(weights, dict):
+        raise ValueError(f"Expected a dict of weights, got {type(weights).__name__}")
+    missing = [key for key in WEIGHT_KEYS if key not in weights]
+    if missing:
+        raise ValueError(f"Missing weights: {', '.join(missing)}")
+    if is_ensemble(weights):
+        members = {np.shape(weights[key])[0] if np.ndim(weights[key]) == 3 else None for key in WEIGHT_KEYS}
+        if len(members) != 1 or None in members:
+            raise ValueError("Ensemble weights must all be 3-D with the same number of members")
+        for k in range(members.pop()):
+            validate_weights({key: weights[key][k] for key in WEIGHT_KEYS}, feature_count)
+        return
+    if is_quantized(weights):
+        validate_scales(weights)
+
+    if feature_count is None:
+        feature_count = np.asarray(weights["w1"]).shape[0]
+    inputs = feature_count
+    for layer in ("1", "2", "3"):
+        w, b = np.asarray(weights[f"w{layer}"]), np.asarray(weights[f"b{layer}"])
+        if w.ndim != 2 or w.shape[0] != inputs:
+            raise ValueError(f"w{layer} has shape {w.shape}, expected ({inputs}, n)")
+        if b.shape != (1, w.shape[1]):
+            raise ValueError(f"b{layer} has shape {b.shape}, expected (1, {w.shape[1]})")
+        if not (np.isfinite(w).all() and np.isfinite(b).all()):
+            raise ValueError(f"Layer {layer} contains NaN or infinite values")
+        inputs = w.shape[1]
+    if inputs != 1:
+        raise ValueError(f"Output layer has {inputs} units, expected 1")
+
+    a = np.zeros((1, feature_count))
+    for layer in ("1", "2"):
+        a = 1 / (1 + np.exp(-(a @ weights[f"w{layer}"] + weights[f"b{layer}"])))
+    output = a @ weights["w3"] + weights["b3"]
+    if output.shape != (1, 1) or not np.isfinite(output).all():
+        raise ValueError("Forward pass on a zero row did not produce a finite scalar")
+
+
+def load_version(path, feature_count=FEATURE_COUNT, dtype=None):
+    """
+    Read and validate a weights file, casting it to `dtype` when given
+    (int8 artifacts are kept as they are).
+
+    Returns:
+        ModelVersion: With `version` set to a short content hash of the file.
+    """
+    with open(path, "rb") as f:
+        content = f.read()
+    # Load from the hashed bytes so the version always matches the weights
+    weights = np.load(io.BytesIO(content), allow_pickle=True).item()
+    validate_weights(weights, feature_count)
+    if dtype is not None and not is_quantized(weights):
+        weights = {key: np.asarray(value).astype(dtype, copy=False) for key, value in weights.items()}
+    return ModelVersion(hashlib.sha1(content).hexdigest()[:12], path, weights, time.time())
+
+
+class ModelRegistry:
+    """
+    Holds the served model and an optional candidate, and swaps them without
+    blocking requests.
+
+    Request handlers read `active` (or call `route`) once and use that
+    version for the whole request; swaps replace the reference, so a request
+    never sees a half-loaded model. New artifacts are loaded and validated
+    before the swap, on the watcher thread or the admin call, never on the
+    request path.
+
+    A candidate can run in one of two modes:
+        shadow: scored alongside the active model, its predictions only logged
+        canary: serves `fraction` of requests instead of the active model
+
+    Args:
+        model_dir (str): Directory holding the artifacts.
+        filename (str): Artifact served by default and watched for changes.
+        feature_count (int): Expected input width, checked on load; None
+            accepts any width.
+        dtype (str, optional): Serve the weights in this dtype (e.g.
+            'float32') instead of the artifact's own.
+    """
+
+    def __init__(self, model_dir, filename="nn_weights.npy", feature_count=FEATURE_COUNT, dtype=None):
+        self.model_dir = os.path.abspath(model_dir)
+        self.filename = filename
+        self.feature_count = feature_count
+        self.dtype = dtype
+        self.active = None
+        self.previous = None
+        self.candidate = None
+        self.candidate_mode = None
+        self.canary_fraction = 0.0
+        self._listeners = []
+        self._lock = threading.Lock()  # Serializes loads and swaps, not reads
+        self._watched_stat = None
+        self._watcher = None
+        self._stop_watching = threading.Event()
+
+    def resolve(self, name=None):
+        """
+        Path of artifact `name` inside the model directory. Only plain file
+        names are accepted, since artifacts are unpickled.
+        """
+        name = name or self.filename
+        if os.path.basename(name) != name or not name.endswith(".npy"):
+            raise ValueError(f"Invalid model file name: {name}")
+        return os.path.join(self.model_dir, name)
+
+    def on_swap(self, func):
+        """
+        Call `func(registry)` after every change of the active model or candidate.
+        """
+        self._listeners.append(func)
+
+    def _notify(self):
+        for func in self._listeners:
+            func(self)
+
+    def _stat(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def load(self, name=None):
+        """
+        Load and activate artifact `name` (default: the watched file).
+
+        Returns:
+            ModelVersion: The newly active version.
+        """
+        path = self.resolve(name)
+        with self._lock:
+            stat = self._stat(path)
+            version = load_version(path, self.feature_count, self.dtype)
+            if path == self.resolve():
+                self._watched_stat = stat
+            if self.active is None or version.version != self.active.version:
+                self.previous, self.active = self.active, version
+        self._notify()
+        return self.active
+
+    def reload_if_changed(self):
+        """
+        Reload the watched file if its mtime or size changed. A file that
+        fails validation (e.g. caught mid-write) is skipped and retried on
+        the next call.
+
+        Returns:
+            bool: True when a new version was swapped in.
+        """
+        path = self.resolve()
+        stat = self._stat(path)
+        if stat is None or stat == self._watched_stat:
+            return False
+        current = self.active.version if self.active else None
+        try:
+            version = self.load()
+        except Exception as e:
+            print(f"Skipping model reload of {path}: {e}")
+            return False
+        if version.version != current:
+            print(f"Model reloaded: {current} -> {version.version}")
+            return True
+        return False
+
+    def rollback(self):
+        """
+        Reactivate the previously active version.
+        """
+        with self._lock:
+            if self.previous is None:
+                raise ValueError("No previous model version to roll back to")
+            self.active, self.previous = self.previous, self.active
+        self._notify()
+        return self.active
+
+    def set_candidate(self, name, mode="shadow", fraction=0.1):
+        """
+        Load artifact `name` as a shadow or canary candidate.
+        """
+        if mode not in ("shadow", "canary"):
+            raise ValueError(f"Unknown candidate mode: {mode}")
+        if not 0.0 <= fraction <= 1.0:
+            raise ValueError("Canary fraction must be between 0 and 1")
+        version = load_version(self.resolve(name), self.feature_count, self.dtype)
+        with self._lock:
+            self.candidate, self.candidate_mode, self.canary_fraction = version, mode, fraction
+        self._notify()
+        return version
+
+    def promote_candidate(self):
+        """
+        Make the candidate the active version.
+        """
+        with self._lock:
+            if self.candidate is None:
+                raise ValueError("No candidate model to promote")
+            self.previous, self.active = self.active, self.candidate
+            self.candidate, self.candidate_mode = None, None
+        self._notify()
+        return self.active
+
+    def clear_candidate(self):
+        with self._lock:
+            self.candidate, self.candidate_mode = None, None
+        self._notify()
+
+    def route(self, key=None):
+        """
+        Pick the versions for one request.
+
+        Args:
+            key (str, optional): Stable request key (e.g. game) so a canary
+                routes the same game consistently; random when omitted.
+
+        Returns:
+            tuple: (serving version, shadow version or None)
+        """
+        active, candidate, mode = self.active, self.candidate, self.candidate_mode
+        if candidate is None:
+            return active, None
+        if mode == "shadow":
+            return active, candidate
+        if key is None:
+            draw = random.random()
+        else:
+            draw = int(hashlib.sha1(str(key).encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+        return (candidate if draw < self.canary_fraction else active), None
+
+    def status(self):
+        def describe(version):
+            if version is None:
+                return None
+            return {"version": version.version, "path": os.path.basename(version.path), "loaded_at": version.loaded_at}
+
+        return {
+            "active": describe(self.active),
+            "previous": describe(self.previous),
+            "candidate": describe(self.candidate),
+            "candidate_mode": self.candidate_mode,
+            "canary_fraction": self.canary_fraction if self.candidate_mode == "canary" else None,
+            "watching": self._watcher is not None,
+        }
+
+    def start_watching(self, interval=2.0):
+        """
+        Poll the watched file every `interval` seconds on a daemon thread.
+        """
+        if self._watcher is None and interval > 0:
+            self._stop_watching.clear()
+            self._watcher = threading.Thread(
+                target=self._watch, args=(interval,), name="model-watcher", daemon=True
+            )
+            self._watcher.start()
+        return self
+
+    def stop_watching(self):
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self, interval):
+        while not self._stop_watching.wait(interval):
+            self.reload_if_changed()
+
+
+# Suffix of the int8 artifacts written by src/models/quantize.py
+QUANTIZED_SUFFIX = ".int8.npy"
+
+
+def model_filename(sport):
+    return f"nn_weights_{sport}.npy"
+
+
+def quantized_filename(filename):
+    return filename[: -len(".npy")] + QUANTIZED_SUFFIX
+
+
+class ModelRouter:
+    """
+    One registry per served artifact, shared by every sport that uses it.
+
+    Each sport is served by `nn_weights_{sport}.npy` when it exists and by the
+    shared `fallback` artifact otherwise, so adding a league only means adding
+    it to `sports` (and training its artifact). Sports that resolve to the
+    same file share a single registry and a single copy of the weights.
+
+    The choice of file is checked again on every poll, so a sport switches to
+    its own artifact as soon as it is first trained (and back to the fallback
+    if it is removed) without a restart.
+
+    With dtype 'int8' each of those files is replaced by its quantized
+    `.int8.npy` counterpart where one exists and is at least as new as the
+    float file; a retrained float model is served as is until it is
+    quantized again.
+
+    Args:
+        model_dir (str): Directory holding the artifacts.
+        sports (iterable): Sport codes to serve, e.g. ('nba', 'nfl').
+        fallback (str): Artifact for sports without their own.
+        dtype (str, optional): Dtype the weights are served in, or 'int8'.
+    """
+
+    def __init__(self, model_dir, sports, fallback="nn_weights.npy", dtype=None):
+        self.model_dir = os.path.abspath(model_dir)
+        self.sports = list(sports)
+        self.fallback = fallback
+        self.quantized = dtype == "int8"
+        self.dtype = None if self.quantized else dtype  # Float artifacts without an int8 version keep their own dtype
+        self.registries = {}
+        self.sport_registries = {}
+        self._listeners = []
+        self._watcher = None
+        self._stop_watching = threading.Event()
+        for sport in self.sports:
+            self.sport_registries[sport] = self._registry_for(self.resolve_filename(sport))
+
+    def resolve_filename(self, sport):
+        """
+        Artifact that should serve `sport` now: its own model over the shared
+        one and, with dtype 'int8', the quantized file over the float one.
+        """
+        for name in (model_filename(sport), self.fallback):
+            float_mtime = self._mtime(name)
+            if self.quantized:
+                int8_mtime = self._mtime(quantized_filename(name))
+                if int8_mtime is not None and (float_mtime is None or int8_mtime >= float_mtime):
+                    return quantized_filename(name)
+            if float_mtime is not None:
+                return name
+        return self.fallback
+
+    def _mtime(self, name):
+        try:
+            return os.stat(os.path.join(self.model_dir, name)).st_mtime_ns
+        except OSError:
+            return None
+
+    def _registry_for(self, filename):
+        if filename not in self.registries:
+            registry = ModelRegistry(self.model_dir, filename, feature_count=None, dtype=self.dtype)
+            for func in self._listeners:
+                registry.on_swap(func)
+            self.registries[filename] = registry
+        return self.registries[filename]
+
+    def registry(self, sport):
+        """
+        Registry serving `sport`.
+
+        Raises:
+            ValueError: For sports that are not served.
+        """
+        try:
+            return self.sport_registries[sport]
+        except KeyError:
+            raise ValueError(f"Unsupported sport: {sport}") from None
+
+    def load(self):
+        for registry in set(self.sport_registries.values()):
+            registry.load()
+        return self
+
+    def reresolve(self):
+        """
+        Move every sport whose artifact choice changed to the registry of its
+        new file. The new file is loaded and validated first; a sport whose
+        new file fails to load keeps its current model until the next poll.
+
+        Returns:
+            bool: True when any sport changed file.
+        """
+        sport_registries = dict(self.sport_registries)
+        changed = False
+        for sport in self.sports:
+            filename = self.resolve_filename(sport)
+            current = sport_registries[sport]
+            if filename == current.filename:
+                continue
+            registry = self._registry_for(filename)
+            if registry.active is None:
+                try:
+                    registry.load()
+                except Exception as e:
+                    print(f"Skipping switch of {sport} to {filename}: {e}")
+                    continue
+            print(f"{sport} now served by {filename} (was {current.filename})")
+            sport_registries[sport] = registry
+            changed = True
+        if changed:
+            # Swap the whole mapping so request threads never see it half-updated
+            self.sport_registries = sport_registries
+            in_use = {registry.filename for registry in sport_registries.values()}
+            self.registries = {name: registry for name, registry in self.registries.items() if name in in_use}
+            for registry in set(sport_registries.values()):
+                registry._notify()
+        return changed
+
+    def reload_if_changed(self):
+        """
+        Re-check which file serves each sport, then reload any served file
+        that changed on disk.
+
+        Returns:
+            bool: True when any sport's model changed.
+        """
+        changed = self.reresolve()
+        for registry in set(self.sport_registries.values()):
+            changed = registry.reload_if_changed() or changed
+        return changed
+
+    def start_watching(self, interval=2.0):
+        """
+        Poll every `interval` seconds on a daemon thread (see `reload_if_changed`).
+        """
+        if self._watcher is None and interval > 0:
+            self._stop_watching.clear()
+            self._watcher = threading.Thread(
+                target=self._watch, args=(interval,), name="model-router-watcher", daemon=True
+            )
+            self._watcher.start()
+        return self
+
+    def stop_watching(self):
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self, interval):
+        while not self._stop_watching.wait(interval):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                print(f"Model watcher error: {e}")
+
+    def on_swap(self, func):
+        """
+        Call `func(registry)` after every model change of any sport,
+        including a sport moving to another file.
+        """
+        self._listeners.append(func)
+        for registry in self.registries.values():
+            registry.on_swap(func)
+
+    def status(self):
+        watching = self._watcher is not None
+        return {
+            sport: dict(registry.status(), file=registry.filename, watching=watching)
+            for sport, registry in self.sport_registries.items()
+        }
+
+    def route_rows(self, sports, keys=None):
+        """
+        Group rows by the model version that serves them: by the registry of
+        their sport and, within it, by the version `route` picks (a canary
+        splits a group in two).
+
+        Args:
+            sports (array-like): Sport code per row.
+            keys (list, optional): Canary routing key per row.
+
+        Returns:
+            list: (version, shadow version or None, row indices) per group.
+        """
+        groups = {}
+        for i, sport in enumerate(sports):
+            version, shadow = self.registry(sport).route(keys[i] if keys is not None else None)
+            group_key = (version.version, shadow.version if shadow else None)
+            groups.setdefault(group_key, (version, shadow, []))[2].append(i)
+        return [(version, shadow, np.array(rows)) for version, shadow, rows in groups.values()]
+
+    def predict(self, sports, spreads, total_points, forward, keys=None, on_shadow=None):
+        """
+        Score a mixed-sport batch with one forward pass per model version.
+        Each group's features are built at its model's input width and the
+        results are scattered back into request order.
+
+        Args:
+            sports, spreads, total_points (array-like): Inputs per row.
+            forward (callable): forward(X, weights) -> (n, m) outputs, e.g.
+                (n, 1) predictions or an ensemble summary.
+            keys (list, optional): Canary routing key per row.
+            on_shadow (callable, optional): on_shadow(version, X, predictions)
+                for groups with a shadow candidate.
+
+        Returns:
+            tuple: ((n, m) outputs, ModelVersion per row)
+        """
+        sports = np.asarray(sports)
+        spreads = np.asarray(spreads, dtype=np.float64)
+        total_points = np.asarray(total_points, dtype=np.float64)
+        outputs = None
+        versions = [None] * len(sports)
+
+        for version, shadow, rows in self.route_rows(sports, keys):
+            X = build_feature_matrix(
+                sports[rows], spreads[rows], total_points[rows],
+                input_width(version.weights), input_dtype(version.weights),
+            )
+            group_outputs = forward(X, version.weights)
+            if outputs is None:
+                outputs = np.empty((len(sports), group_outputs.shape[1]), dtype=np.float64)
+            outputs[rows] = group_outputs
+            for i in rows:
+                versions[i] = version
+            if shadow is not None and on_shadow is not None:
+                on_shadow(shadow, X, group_outputs[:, :1])
+        return outputs, versions
@@ -0,0 +1,350 @@
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from betting.lines import LineIndex, start_time
+
+# TheOddsAPI sport key -> sport code used by the model
+SPORT_CODES = {"basketball_nba": "nba", "americanfootball_nfl": "nfl"}
+
+GameUpdate = namedtuple("GameUpdate", ["game_id", "received_at"])
+
+PRUNE_INTERVAL = 60  # Seconds between sweeps for games that have started
+
+
+class GameBoard:
+    """
+    Current spread and total of every game, per bookmaker, built from odds
+    change rows (`OddsStore.append_snapshot` output or equivalent records).
+
+    The model input for a game is the consensus (mean over books) of the home
+    spread and of the Over total.
+    """
+
+    def __init__(self):
+        self.games = {}
+        self._lock = threading.Lock()
+
+    def apply(self, sport, records):
+        """
+        Apply change records and return the ids of the games they touch.
+        """
+        touched = []
+        with self._lock:
+            for record in records:
+                game = self.games.setdefault(record["game_id"], {
+                    "sport": SPORT_CODES.get(sport, sport),
+                    "home_team": record.get("home_team"),
+                    "away_team": record.get("away_team"),
+                    "commence_time": record.get("commence_time"),
+                    "spreads": {},
+                    "totals": {},
+                })
+                point = record.get("point")
+                if point is None or point != point:  # Missing or NaN
+                    continue
+                if record.get("market_type") == "spreads" and record.get("name") == game["home_team"]:
+                    game["spreads"][record.get("bookmaker")] = float(point)
+                elif record.get("market_type") == "totals" and record.get("name") == "Over":
+                    game["totals"][record.get("bookmaker")] = float(point)
+                else:
+                    continue
+                touched.append(record["game_id"])
+        return touched
+
+    def inputs(self, game_ids):
+        """
+        Model inputs for `game_ids`, skipping games without both lines.
+
+        Read in one locked pass with the games' descriptions, so a game
+        dropped by another thread right after can still be published.
+
+        Returns:
+            tuple: (kept game ids, sports, spreads, totals, details)
+        """
+        kept, sports, spreads, totals, details = [], [], [], [], []
+        with self._lock:
+            for game_id in game_ids:
+                game = self.games.get(game_id)
+                if not game or not game["spreads"] or not game["totals"]:
+                    continue
+                kept.append(game_id)
+                sports.append(game["sport"])
+                spreads.append(sum(game["spreads"].values()) / len(game["spreads"]))
+                totals.append(sum(game["totals"].values()) / len(game["totals"]))
+                details.append({key: game[key] for key in ("sport", "home_team", "away_team", "commence_time")})
+        return kept, sports, spreads, totals, details
+
+    def remove_started(self, now=None):
+        """
+        Drop every game whose commence_time is at or before `now`.
+
+        Returns:
+            list: Ids of the removed games.
+        """
+        now = now or pd.Timestamp.now(tz="UTC")
+        with self._lock:
+            starts = {game_id: start_time(game["commence_time"]) for game_id, game in self.games.items()}
+            started = [game_id for game_id, start in starts.items() if start is not None and start <= now]
+            for game_id in started:
+                del self.games[game_id]
+        return started
+
+
+class Broadcaster:
+    """
+    Fan-out of published messages to subscriber queues. Slow subscribers
+    lose their oldest messages instead of blocking the pipeline.
+    """
+
+    def __init__(self, max_queue=1000):
+        self.max_queue = max_queue
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def publish(self, message):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            while True:
+                try:
+                    q.put_nowait(message)
+                    break
+                except queue.Full:
+                    try:
+                        q.get_nowait()
+                    except queue.Empty:
+                        pass
+
+
+class LatencyStats:
+    """
+    Rolling window of line-move to published-prediction latencies.
+    """
+
+    def __init__(self, window=10000):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.samples.extend(seconds)
+            self.count += len(seconds)
+
+    def summary(self):
+        with self._lock:
+            samples = np.array(self.samples, dtype=np.float64) * 1000
+        if samples.size == 0:
+            return {"count": self.count}
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+        return {
+            "count": self.count,
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(samples.max()),
+        }
+
+
+class RepredictionPipeline:
+    """
+    Re-scores games whose lines moved and pushes the new predictions to
+    subscribers.
+
+    Odds changes are queued by `submit`; a worker thread gathers everything
+    that arrives within `batch_window` seconds, keeps only the affected games
+    (once each), scores them with a single `predict_fn` call and publishes one
+    message per game. The same changes keep `lines`, the best-line index,
+    current; `sync` applies full snapshots so pulled lines leave it too, and
+    games are dropped from both once they have started.
+
+    Args:
+        predict_fn (callable): predict_fn(sports, spreads, totals) -> (n,)
+            predictions, e.g. a bound `ModelRouter.predict`.
+        batch_window (float): Seconds to wait for more changes before scoring.
+        max_batch (int): Maximum number of games scored per call.
+    """
+
+    def __init__(self, predict_fn, batch_window=0.002, max_batch=512):
+        self.predict_fn = predict_fn
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.board = GameBoard()
+        self.lines = LineIndex()
+        self.broadcaster = Broadcaster()
+        self.latency = LatencyStats()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="reprediction-pipeline", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, sport, changes):
+        """
+        Queue odds changes for re-scoring.
+
+        Args:
+            sport (str): TheOddsAPI sport key of the changes.
+            changes (DataFrame or list): Changed lines, as a DataFrame or a list
+                of record dicts with game_id, home_team, away_team,
+                market_type, name, bookmaker and point.
+        """
+        received_at = time.perf_counter()
+        records = changes.to_dict("records") if hasattr(changes, "to_dict") else changes
+        self.lines.apply(records)
+        for game_id in dict.fromkeys(self.board.apply(sport, records)):
+            self._queue.put(GameUpdate(game_id, received_at))
+
+    def sync(self, sport, snapshot):
+        """
+        Make `lines` match a full board snapshot of `sport` (e.g. the
+        `OddsPoller` on_snapshot callback), dropping the lines books pulled.
+        The board still lists games in play; they are dropped again here.
+        """
+        records = snapshot.to_dict("records") if hasattr(snapshot, "to_dict") else snapshot
+        self.lines.apply_snapshot(records)
+        self.drop_started()
+
+    def drop_started(self, now=None):
+        """
+        Forget the games that have started.
+
+        Returns:
+            list: Ids of the games removed.
+        """
+        started = self.lines.remove_started(now) + self.board.remove_started(now)
+        return list(dict.fromkeys(started))
+
+    def _collect(self):
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return {}
+        # Oldest pending update per game, so latency covers the first line move
+        pending = {first.game_id: first.received_at}
+        deadline = time.perf_counter() + self.batch_window
+        while len(pending) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                update = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            pending.setdefault(update.game_id, update.received_at)
+        return pending
+
+    def _run(self):
+        next_prune = 0.0
+        while self._running:
+            if time.monotonic() >= next_prune:
+                self.drop_started()
+                next_prune = time.monotonic() + PRUNE_INTERVAL
+            pending = self._collect()
+            if pending:
+                try:
+                    self.score(pending)
+                except Exception as e:
+                    print(f"Error re-scoring games: {e}")
+
+    def score(self, pending):
+        """
+        Score the games in `pending` (game id -> received_at) in one batch and
+        publish the results.
+        """
+        game_ids, sports, spreads, totals, details = self.board.inputs(list(pending))
+        if not game_ids:
+            return
+        predictions = self.predict_fn(sports, spreads, totals)
+        published_at = time.perf_counter()
+        latencies = []
+        for i, game_id in enumerate(game_ids):
+            latency = published_at - pending[game_id]
+            latencies.append(latency)
+            self.broadcaster.publish(dict(
+                details[i],
+                game_id=game_id,
+                spread=spreads[i],
+                totalPoints=totals[i],
+                prediction=float(predictions[i]),
+                latency_ms=latency * 1000,
+            ))
+        self.latency.record(latencies)
+
+
+class FileOddsSource:
+    """
+    Local stand-in for a message queue: tails a JSON-lines file in which each
+    line is {"sport": <sport key>, "changes": [<change record>, ...]} and
+    feeds it to a pipeline.
+    """
+
+    def __init__(self, path, pipeline, poll_interval=0.005):
+        self.path = path
+        self.pipeline = pipeline
+        self.poll_interval = poll_interval
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="odds-file-source", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        # Only messages written after start are replayed; a file created later is read from the top
+        existed = os.path.exists(self.path)
+        while self._running and not os.path.exists(self.path):
+            time.sleep(self.poll_interval)
+        with open(self.path, "r", encoding="utf-8") as f:
+            if existed:
+                f.seek(0, os.SEEK_END)
+            buffer = ""
+            while self._running:
+                chunk = f.readline()
+                if not chunk:
+                    time.sleep(self.poll_interval)
+                    continue
+                buffer += chunk
+                if not buffer.endswith("\n"):
+                    continue  # Partial line; wait for the writer to finish it
+                line, buffer = buffer.strip(), ""
+                if not line:
+                    continue
+                try:
+                    message = json.loads(line)
+                    self.pipeline.submit(message["sport"], message["changes"])
+                except (ValueError, KeyError) as e:
+                    print(f"Skipping malformed odds message: {e}")
@@ -0,0 +1,262 @@
+import numpy as np
+import pandas as pd
+import os
+from sklearn.model_selection import StratifiedKFold, train_test_split
+
+# Define directories
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SPLITS_DIR = os.path.join(PROJECT_ROOT, "data", "splits")
+
+# Columns each split strategy reads from the canonical dataset, per prefix
+SPLIT_COLUMNS = {
+    "nba": {"date": "date", "season": "season", "team": "home_team_combined"},
+    "nfl": {"date": "schedule_date", "season": "schedule_season", "team": "home_team_combined"},
+}
+
+# Labels of the score_diff bins, in code order (see bin_score_diffs)
+SCORE_DIFF_LABELS = np.array(["Large Loss", "Small Loss", "Draw", "Small Win", "Large Win"], dtype=object)
+
+def bin_score_diffs(score_diff):
+    """
+    Vectorized equivalent of `data_splitting.bin_score_diff`.
+
+    Args:
+        score_diff (array-like): Score differences.
+
+    Returns:
+        ndarray: Bin label for every value (NaN falls into 'Large Win', as in
+        the scalar version).
+    """
+    values = np.asarray(score_diff, dtype=np.float64)
+    # Losses split at -10; draws/wins split at 0 and 10 with right-closed bins
+    loss_codes = np.digitize(values, [-10])
+    win_codes = 2 + np.digitize(values, [0, 10], right=True)
+    codes = np.where(values < 0, loss_codes, win_codes)
+    return SCORE_DIFF_LABELS[codes]
+
+def index_dtype(n_rows):
+    """
+    Smallest integer dtype able to address `n_rows` rows.
+    """
+    return np.int32 if n_rows < np.iinfo(np.int32).max else np.int64
+
+def stratified_split_indices(labels, test_size=0.2, val_size=0.1, random_state=42):
+    """
+    Stratified train/validation/test split that returns row positions only.
+
+    Produces the same partition as `data_splitting.split_data` with the same
+    arguments, without copying the DataFrame three times.
+
+    Returns:
+        dict: {'train', 'val', 'test'} -> sorted index arrays.
+    """
+    labels = np.asarray(labels)
+    positions = np.arange(len(labels), dtype=index_dtype(len(labels)))
+    train_val, test = train_test_split(
+        positions, test_size=test_size, random_state=random_state, stratify=labels
+    )
+    train, val = train_test_split(
+        train_val, test_size=val_size / (1 - test_size), random_state=random_state,
+        stratify=labels[train_val]
+    )
+    return {"train": np.sort(train), "val": np.sort(val), "test": np.sort(test)}
+
+def chronological_split_indices(dates, test_size=0.2, val_size=0.1):
+    """
+    Train on the oldest games, validate on the next block and test on the
+    most recent ones.
+
+    Returns:
+        dict: {'train', 'val', 'test'} -> sorted index arrays.
+    """
+    dates = pd.to_datetime(pd.Series(dates)).to_numpy()
+    n_rows = len(dates)
+    order = np.argsort(dates, kind="stable").astype(index_dtype(n_rows))
+    n_test = int(round(n_rows * test_size))
+    n_val = int(round(n_rows * val_size))
+    n_train = n_rows - n_test - n_val
+    return {
+        "train": np.sort(order[:n_train]),
+        "val": np.sort(order[n_train:n_train + n_val]),
+        "test": np.sort(order[n_train + n_val:]),
+    }
+
+def group_kfold_indices(groups, n_splits=5):
+    """
+    K-fold split in which every group (season, team, ...) lands in exactly one
+    test fold.
+
+    Groups are assigned largest first to the fold with the fewest rows so far,
+    which keeps fold sizes balanced.
+
+    Returns:
+        dict: 'fold{k}' -> sorted test indices of fold k. The training rows of a
+        fold are its complement (see `fold_indices`).
+    """
+    codes, uniques = pd.factorize(pd.Series(groups), use_na_sentinel=False)
+    if len(uniques) < n_splits:
+        raise ValueError(f"Cannot make {n_splits} folds from {len(uniques)} groups.")
+    group_sizes = np.bincount(codes, minlength=len(uniques))
+    fold_of_group = np.empty(len(uniques), dtype=np.int64)
+    fold_sizes = np.zeros(n_splits, dtype=np.int64)
+    for group in np.argsort(-group_sizes, kind="stable"):
+        fold = np.argmin(fold_sizes)
+        fold_of_group[group] = fold
+        fold_sizes[fold] += group_sizes[group]
+
+    row_folds = fold_of_group[codes]
+    positions = np.arange(len(codes), dtype=index_dtype(len(codes)))
+    return {f"fold{k}": positions[row_folds == k] for k in range(n_splits)}
+
+def stratified_kfold_indices(labels, n_splits=5, random_state=42):
+    """
+    K-fold split that keeps each label's share (e.g. score_diff_bin) the same
+    in every test fold.
+
+    Returns:
+        dict: 'fold{k}' -> sorted test indices of fold k, like `group_kfold_indices`.
+    """
+    labels = np.asarray(labels)
+    positions = np.arange(len(labels), dtype=index_dtype(len(labels)))
+    folds = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    return {f"fold{k}": np.sort(positions[test]) for k, (_, test) in enumerate(folds.split(positions, labels))}
+
+def fold_indices(indices, k, n_rows):
+    """
+    Training and test row positions of fold `k` of a K-fold manifest.
+    """
+    test = indices[f"fold{k}"]
+    mask = np.ones(n_rows, dtype=bool)
+    mask[test] = False
+    return np.flatnonzero(mask).astype(test.dtype), test
+
+def dataset_path(prefix):
+    return os.path.join(SPLITS_DIR, f"{prefix}_dataset.parquet")
+
+def manifest_path(prefix, strategy="random"):
+    return os.path.join(SPLITS_DIR, f"{prefix}_{strategy}_split.npz")
+
+def save_dataset(df, prefix):
+    """
+    Save the canonical dataset every split manifest of `prefix` indexes into.
+    """
+    os.makedirs(SPLITS_DIR, exist_ok=True)
+    path = dataset_path(prefix)
+    df.reset_index(drop=True).to_parquet(path, index=False)
+    return path
+
+def save_split_manifest(indices, prefix, n_rows, strategy="random"):
+    """
+    Save named index arrays as a compressed manifest. Indices are stored
+    sorted, so row order within a split follows the canonical dataset.
+
+    Args:
+        indices (dict): Split name -> row positions into the canonical dataset.
+        prefix (str): Dataset prefix, e.g. 'nba'.
+        n_rows (int): Row count of the canonical dataset, checked on load.
+        strategy (str): Name of the strategy that produced the split.
+    """
+    os.makedirs(SPLITS_DIR, exist_ok=True)
+    path = manifest_path(prefix, strategy)
+    # Sorted indices are stored as small deltas, which compress to a few KB
+    deltas = {}
+    for name, positions in indices.items():
+        delta = np.diff(np.sort(positions), prepend=0)
+        deltas[name] = delta.astype(np.min_scalar_type(delta.max() if len(delta) else 0))
+    np.savez_compressed(path, __n_rows__=np.int64(n_rows), **deltas)
+    print(f"Split manifest saved to {path}")
+    return path
+
+def load_split_manifest(prefix, strategy="random"):
+    """
+    Load a manifest saved by `save_split_manifest`.
+
+    Returns:
+        tuple: (dict of split name -> index array, canonical dataset row count)
+    """
+    with np.load(manifest_path(prefix, strategy)) as manifest:
+        n_rows = int(manifest["__n_rows__"])
+        indices = {
+            name: np.cumsum(manifest[name], dtype=index_dtype(n_rows))
+            for name in manifest.files if name != "__n_rows__"
+        }
+    return indices, n_rows
+
+def load_dataset(prefix, columns=None):
+    return pd.read_parquet(dataset_path(prefix), columns=columns)
+
+def materialize_split(dataset, indices, n_rows=None):
+    """
+    Materialize one split from the canonical dataset.
+    """
+    if n_rows is not None and len(dataset) != n_rows:
+        raise ValueError(
+            f"Manifest was built for {n_rows} rows but the dataset has {len(dataset)}; re-run the splitter."
+        )
+    return dataset.take(indices).reset_index(drop=True)
+
+def read_split(prefix, name, strategy="random", columns=None):
+    """
+    Load split `name` (e.g. 'train') of `prefix`.
+
+    Uses the manifest and canonical dataset when they exist and falls back to
+    the legacy `{prefix}_{name}.csv` copies otherwise.
+    """
+    if os.path.exists(manifest_path(prefix, strategy)) and os.path.exists(dataset_path(prefix)):
+        indices, n_rows = load_split_manifest(prefix, strategy)
+        return materialize_split(load_dataset(prefix, columns), indices[name], n_rows)
+    return pd.read_csv(os.path.join(SPLITS_DIR, f"{prefix}_{name}.csv"), usecols=columns)
+
+def read_fold(prefix, strategy, k, columns=None):
+    """
+    Load fold `k` of a K-fold manifest as (train, test) DataFrames.
+    """
+    indices, n_rows = load_split_manifest(prefix, strategy)
+    dataset = load_dataset(prefix, columns)
+    train, test = fold_indices(indices, k, n_rows)
+    return materialize_split(dataset, train, n_rows), materialize_split(dataset, test, n_rows)
+
+def create_split_manifest(prefix, strategy, n_splits=5, test_size=0.2, val_size=0.1, random_state=42):
+    """
+    Create a split manifest over the canonical dataset of `prefix`.
+
+    Only the column the strategy needs is read, so new splits take well under
+    a second and add a few KB on disk.
+
+    Args:
+        prefix (str): 'nba' or 'nfl'.
+        strategy (str): 'random' (stratified by score_diff_bin),
+            'chronological', 'season' (season-grouped K-fold), 'team'
+            (home-team-grouped K-fold) or 'stratified' (K-fold stratified by
+            score_diff_bin).
+    """
+    columns = SPLIT_COLUMNS[prefix]
+    if strategy == "random":
+        labels = load_dataset(prefix, ["score_diff_bin"])["score_diff_bin"].to_numpy()
+        indices = stratified_split_indices(labels, test_size, val_size, random_state)
+        n_rows = len(labels)
+    elif strategy == "chronological":
+        dates = load_dataset(prefix, [columns["date"]])[columns["date"]]
+        indices = chronological_split_indices(dates, test_size, val_size)
+        n_rows = len(dates)
+    elif strategy == "stratified":
+        labels = load_dataset(prefix, ["score_diff_bin"])["score_diff_bin"].to_numpy()
+        indices = stratified_kfold_indices(labels, n_splits, random_state)
+        n_rows = len(labels)
+    elif strategy in ("season", "team"):
+        groups = load_dataset(prefix, [columns[strategy]])[columns[strategy]]
+        indices = group_kfold_indices(groups, n_splits)
+        n_rows = len(groups)
+    else:
+        raise ValueError(f"Unknown split strategy: {strategy}")
+    return save_split_manifest(indices, prefix, n_rows, strategy)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Create a split manifest over a canonical dataset.")
+    parser.add_argument("prefix", choices=sorted(SPLIT_COLUMNS))
+    parser.add_argument("strategy", choices=["random", "chronological", "season", "team", "stratified"])
+    parser.add_argument("--folds", type=int, default=5, help="Number of folds for K-fold strategies")
+    args = parser.parse_args()
+    create_split_manifest(args.prefix, args.strategy, n_splits=args.folds)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Modules under src/ import each other by their flat names, as the scripts do
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+for path in (os.path.join(PROJECT_ROOT, "src"), os.path.join(PROJECT_ROOT, "src", "models")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,55 @@
+import pytest
+
+app_module = pytest.importorskip("app")
+
+
+def boom():
+    raise RuntimeError("boom")
+
+
+# Registered before the app serves its first request
+app_module.app.add_url_rule("/_test/boom", "test_boom", boom)
+
+
+def in_flight():
+    return app_module.REQUESTS_IN_FLIGHT._values.get((), 0)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app_module.metrics, "enabled", True)
+    return app_module.app.test_client()
+
+
+def test_in_flight_gauge_returns_to_zero(client):
+    before = in_flight()
+    assert client.get("/metrics").status_code == 200
+    assert in_flight() == before
+
+
+def test_in_flight_gauge_is_decremented_when_a_view_raises(client, monkeypatch):
+    before = in_flight()
+    assert client.get("/_test/boom").status_code == 500
+    assert in_flight() == before
+
+    # Propagated exceptions (debug mode) skip after_request entirely
+    monkeypatch.setitem(app_module.app.config, "PROPAGATE_EXCEPTIONS", True)
+    with pytest.raises(RuntimeError):
+        client.get("/_test/boom")
+    assert in_flight() == before
+
+
+def test_admin_is_disabled_without_a_token(client, monkeypatch):
+    monkeypatch.setattr(app_module, "ADMIN_TOKEN", None)
+    assert client.get("/admin/model").status_code == 404
+    response = client.post("/admin/model", json={"sport": "nba", "action": "reload", "file": "nn_weights.npy"})
+    assert response.status_code == 404
+
+
+def test_admin_requires_the_token(client, monkeypatch):
+    monkeypatch.setattr(app_module, "ADMIN_TOKEN", "s3cret")
+    assert client.post("/admin/model", json={"sport": "nba", "action": "rollback"}).status_code == 403
+    response = client.post("/admin/model", json={"sport": "nba", "action": "rollback"}, headers={"X-Admin-Token": "wrong"})
+    assert response.status_code == 403
+    response = client.get("/admin/model", headers={"X-Admin-Token": "s3cret"})
+    assert response.status_code == 200 and "nba" in response.get_json()
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import split_indices
+from cross_validate import cross_validate
+from split_indices import bin_score_diffs, fold_indices, save_dataset, stratified_kfold_indices
+
+
+def test_stratified_folds_partition_the_rows_and_keep_bin_shares():
+    rng = np.random.default_rng(0)
+    labels = bin_score_diffs(rng.normal(scale=12, size=503).round())
+    folds = stratified_kfold_indices(labels, n_splits=5)
+
+    everything = np.concatenate(list(folds.values()))
+    np.testing.assert_array_equal(np.sort(everything), np.arange(len(labels)))
+    assert all((np.diff(test) > 0).all() for test in folds.values())
+
+    counts = pd.Series(labels).value_counts()
+    for k in range(5):
+        train, test = fold_indices(folds, k, len(labels))
+        assert np.intersect1d(train, test).size == 0 and len(train) + len(test) == len(labels)
+        # Every bin is spread as evenly as possible over the folds
+        fold_counts = pd.Series(labels[test]).value_counts().reindex(counts.index, fill_value=0)
+        assert ((fold_counts - counts // 5).between(0, 1)).all()
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    monkeypatch.setattr(split_indices, "SPLITS_DIR", str(tmp_path))
+    rng = np.random.default_rng(1)
+    n = 120
+    spread = rng.normal(scale=6, size=n)
+    score_diff = -spread + rng.normal(scale=10, size=n)
+    save_dataset(pd.DataFrame({
+        "spread": spread / 20,
+        "total": rng.normal(size=n),
+        "venue": rng.choice(["Arena", "Dome", "Garden"], size=n),
+        "score_diff_bin": bin_score_diffs(score_diff),
+        "score_diff": (score_diff - score_diff.min()) / np.ptp(score_diff),
+    }), "nba")
+    return n
+
+
+def test_out_of_fold_predictions_do_not_depend_on_workers(dataset):
+    serial = cross_validate("nba", n_splits=4, workers=1, epochs=20)
+    parallel = cross_validate("nba", n_splits=4, workers=2, epochs=20)
+
+    oof = serial["oof"]
+    assert len(oof) == dataset and (oof["row"] == np.arange(dataset)).all()
+    assert sorted(oof["fold"].unique()) == [0, 1, 2, 3]
+    assert serial["folds"]["test_rows"].sum() == dataset
+    pd.testing.assert_frame_equal(parallel["oof"], oof, check_exact=False, rtol=1e-10)
+    assert parallel["workers"] == 2 and parallel["oof_mse"] == pytest.approx(serial["oof_mse"], rel=1e-10)
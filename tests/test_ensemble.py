@@ -0,0 +1,41 @@
+import numpy as np
+
+from serving.ensemble import QUANTILES, member_predictions, stack_members, summarize
+
+
+def network(n_features, seed):
+    rng = np.random.default_rng(seed)
+    return {
+        "w1": rng.normal(size=(n_features, 8)), "b1": rng.normal(size=(1, 8)),
+        "w2": rng.normal(size=(8, 4)), "b2": rng.normal(size=(1, 4)),
+        "w3": rng.normal(size=(4, 1)), "b3": rng.normal(size=(1, 1)),
+    }
+
+
+def forward(X, weights):
+    a = X
+    for layer in ("1", "2"):
+        a = 1 / (1 + np.exp(-(a @ weights[f"w{layer}"] + weights[f"b{layer}"])))
+    return (a @ weights["w3"] + weights["b3"])[:, 0]
+
+
+def test_batched_ensemble_matches_a_loop_over_members():
+    members = [network(5, seed) for seed in range(4)]
+    X = np.random.default_rng(9).normal(size=(30, 5))
+    expected = np.stack([forward(X, member) for member in members])
+
+    predictions = member_predictions(X, stack_members(members))
+    assert predictions.shape == (4, 30)
+    np.testing.assert_allclose(predictions, expected, rtol=1e-12, atol=1e-12)
+
+    summary = summarize(predictions)
+    for i in range(len(X)):
+        column = expected[:, i]
+        np.testing.assert_allclose(summary[i], [column.mean(), column.std(), *np.quantile(column, QUANTILES)],
+                                   rtol=1e-12, atol=1e-12)
+
+
+def test_single_network_predictions_have_one_member():
+    member = network(5, 0)
+    X = np.random.default_rng(9).normal(size=(3, 5))
+    np.testing.assert_allclose(member_predictions(X, member), forward(X, member)[None, :], rtol=1e-12)
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+import explain
+
+TRAIN = pd.DataFrame({
+    "spread": [-3.5, 2.0, 7.5, -1.0, 4.0, 0.5],
+    "team": ["BOS", "NYK", "BOS", "LAL", "NYK", "LAL"],
+    "venue": ["Garden", "Garden", "Arena", "Arena", "Garden", "Arena"],
+    "total": [220.5, 210.0, 231.5, 205.0, 215.5, 224.0],
+    "score_diff": [0.4, 0.6, 0.3, 0.5, 0.7, 0.45],
+})
+
+# The test split has no LAL game and an expansion team the model never saw
+TEST = pd.DataFrame({
+    "spread": [1.0, -2.0, 3.0],
+    "team": ["NYK", "SEA", "BOS"],
+    "venue": ["Garden", "Arena", "Garden"],
+    "total": [200.0, 210.0, 220.0],
+    "score_diff": [0.55, 0.35, 0.5],
+})
+
+
+def network(n_features, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "w1": rng.normal(size=(n_features, 6)), "b1": rng.normal(size=(1, 6)),
+        "w2": rng.normal(size=(6, 4)), "b2": rng.normal(size=(1, 4)),
+        "w3": rng.normal(size=(4, 1)), "b3": rng.normal(size=(1, 1)),
+    }
+
+
+def test_split_is_encoded_in_the_training_layout(monkeypatch):
+    splits = {"train": TRAIN, "test": TEST}
+    monkeypatch.setattr(explain, "read_split", lambda sport, split: splits[split])
+    X, y, columns, features = explain.load_features("nba", "test")
+
+    # Encoding the test split alone would give team_NYK/SEA and no LAL column
+    expected = pd.get_dummies(TRAIN.drop(columns=["score_diff"]), drop_first=True)
+    assert columns == list(expected.columns)
+    assert features == {"spread": [0], "total": [1], "team": [2, 3], "venue": [4]}
+    np.testing.assert_array_equal(X, [
+        [1.0, 200.0, 0, 1, 1],
+        [-2.0, 210.0, 0, 0, 0],
+        [3.0, 220.0, 0, 0, 1],
+    ])
+    np.testing.assert_array_equal(y, TEST["score_diff"])
+
+
+def test_batched_permutation_losses_match_brute_force(monkeypatch):
+    rng = np.random.default_rng(1)
+    X = np.column_stack([rng.normal(size=(40, 2)), np.eye(3)[rng.integers(0, 3, 40)]])
+    y = rng.normal(size=40)
+    weights = network(X.shape[1])
+    features = {"a": [0], "b": [1], "team": [2, 3, 4]}
+    # Small batches so the repeats are split across several stacked passes
+    monkeypatch.setattr(explain, "MAX_BATCH_ROWS", 100)
+
+    baseline, report = explain.permutation_importance(X, y, weights, features, repeats=5, seed=7)
+    assert baseline == np.mean((explain.predict(X, weights) - y) ** 2)
+
+    for i, (name, columns) in enumerate(features.items()):
+        stream = np.random.default_rng([7, i])
+        losses = []
+        for _ in range(5):
+            permuted = X.copy()
+            permuted[:, columns] = X[stream.permutation(len(X))][:, columns]
+            losses.append(np.mean((explain.predict(permuted, weights) - y) ** 2))
+        row = report.set_index("feature").loc[name]
+        np.testing.assert_allclose(row["importance"], np.mean(losses) - baseline, rtol=1e-12, atol=1e-15)
+        np.testing.assert_allclose(row["importance_std"], np.std(np.subtract(losses, baseline), ddof=1),
+                                   rtol=1e-9, atol=1e-15)
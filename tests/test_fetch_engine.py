@@ -0,0 +1,165 @@
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from data_gathering.fetch_engine import FetchEngine
+
+
+class StubServer:
+    """
+    Localhost HTTP server that records when each request arrives. Paths:
+    /echo/<text> answers <text>, /slow sleeps 0.2 s, /fail/<n> answers 503
+    to its first n requests and /limited answers 429 with Retry-After: 1
+    once; every other request gets a 200.
+    """
+
+    def __init__(self):
+        self.arrivals = []  # (path, monotonic time)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.host = f"127.0.0.1:{self.httpd.server_port}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def url(self, path):
+        return f"http://{self.host}{path}"
+
+    def times(self, path):
+        with self._lock:
+            return [arrived for seen, arrived in self.arrivals if seen == path]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.arrivals.append((self.path, time.monotonic()))
+                    seen = sum(path == self.path for path, _ in server.arrivals)
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    self._answer(seen)
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+            def _answer(self, seen):
+                headers = {}
+                if self.path == "/slow":
+                    time.sleep(0.2)
+                if self.path.startswith("/fail/") and seen <= int(self.path.rsplit("/", 1)[1]):
+                    status = 503
+                elif self.path == "/limited" and seen == 1:
+                    status, headers = 429, {"Retry-After": "1"}
+                else:
+                    status = 200
+                body = self.path.rsplit("/", 1)[1].encode() if self.path.startswith("/echo/") else b"ok"
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def server():
+    stub = StubServer()
+    stub.thread.start()
+    yield stub
+    stub.httpd.shutdown()
+    stub.httpd.server_close()
+
+
+def engine_for(server, min_interval=0.0, max_concurrency=4, **kwargs):
+    limits = {server.host: {"min_interval": min_interval, "max_concurrency": max_concurrency}}
+    return FetchEngine(host_limits=limits, headers={}, **kwargs)
+
+
+def test_requests_to_one_host_are_spaced_by_min_interval(server):
+    with engine_for(server, min_interval=0.2, max_workers=4) as engine:
+        results = engine.fetch_many([server.url(f"/echo/{i}") for i in range(4)])
+    assert [result.status_code for result in results] == [200] * 4
+    starts = sorted(arrived for _, arrived in server.arrivals)
+    assert all(later - earlier >= 0.18 for earlier, later in zip(starts, starts[1:]))
+
+
+def test_concurrency_per_host_is_capped(server):
+    with engine_for(server, max_concurrency=2, max_workers=6) as engine:
+        engine.fetch_many([server.url("/slow")] * 6)
+    assert server.max_in_flight == 2
+
+
+def test_retryable_status_is_retried_with_exponential_backoff(server):
+    with engine_for(server, retries=3, backoff=0.1) as engine:
+        result = engine.get(server.url("/fail/2"))
+    assert result.status_code == 200 and result.content == b"ok"
+    first, second, third = server.times("/fail/2")
+    assert second - first >= 0.09
+    assert third - second >= 0.19
+
+
+def test_last_response_is_returned_when_retries_run_out(server):
+    with engine_for(server, retries=2, backoff=0.01) as engine:
+        result = engine.get(server.url("/fail/5"))
+    assert result.status_code == 503
+    assert len(server.times("/fail/5")) == 3
+
+
+def test_retry_after_delays_the_retry(server):
+    with engine_for(server, retries=1, backoff=0.01) as engine:
+        result = engine.get(server.url("/limited"))
+    assert result.status_code == 200
+    first, second = server.times("/limited")
+    assert second - first >= 0.95
+
+
+def test_connection_errors_are_raised_after_the_last_retry():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    with FetchEngine(host_limits={}, headers={}, retries=1, backoff=0.01) as engine:
+        with pytest.raises(requests.ConnectionError):
+            engine.get(f"http://127.0.0.1:{port}/")
+
+
+def test_backoff_after_a_connection_error_frees_the_host_slot(server):
+    with engine_for(server, max_concurrency=1, retries=1, backoff=0.5) as engine:
+        session_get = engine.session.get
+        failed = threading.Event()
+
+        def flaky(url, **kwargs):
+            if url.endswith("/flaky") and not failed.is_set():
+                failed.set()
+                raise requests.ConnectionError("connection reset")
+            return session_get(url, **kwargs)
+
+        engine.session.get = flaky
+        retrying = threading.Thread(target=engine.get, args=(server.url("/flaky"),))
+        retrying.start()
+        failed.wait()
+        start = time.monotonic()
+        assert engine.get(server.url("/echo/x")).status_code == 200
+        assert time.monotonic() - start < 0.3
+        retrying.join()
+    assert len(server.times("/flaky")) == 1
+
+
+def test_map_preserves_order(server):
+    urls = [server.url(f"/echo/{i}") for i in range(8)]
+    with engine_for(server, max_workers=4) as engine:
+        bodies = engine.map(lambda url: engine.get(url).content.decode(), urls)
+        results = engine.fetch_many(urls)
+    assert bodies == [str(i) for i in range(8)]
+    assert [result.url for result in results] == urls
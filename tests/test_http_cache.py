@@ -0,0 +1,66 @@
+import time
+from datetime import date, timedelta
+
+from data_gathering.http_cache import CURRENT_SEASON_TTL, IMMUTABLE, ResponseCache, season_policy, ttl_policy
+
+URL = "https://www.basketball-reference.com/leagues/NBA_2024_totals.html"
+
+
+def cached_meta(cache, url=URL):
+    meta, _ = cache.lookup(url)
+    return meta
+
+
+def test_season_policy_follows_the_season_end():
+    assert season_policy(date.today() + timedelta(days=30)) == ttl_policy(CURRENT_SEASON_TTL)
+    policy = season_policy(date.today() - timedelta(days=30))
+    assert policy.immutable and policy.since is not None
+
+
+def test_snapshot_cached_before_the_season_end_is_revalidated_once(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.store(URL, b"<table>mid-season</table>", {"ETag": '"v1"'}, ttl_policy(CURRENT_SEASON_TTL))
+    season_over = season_policy(date.today() - timedelta(days=1))
+
+    # Stored while the season was still being played: stale under the completed-season policy
+    meta = cached_meta(cache)
+    meta["validated_at"] = season_over.since - 3600
+    assert not cache.is_fresh(meta, season_over)
+
+    # Once the origin confirms it after the season end, it is kept for good
+    cache.mark_validated(meta, season_over)
+    assert cache.is_fresh(cached_meta(cache), season_over)
+
+
+def test_entry_fetched_after_the_season_end_is_immutable(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    season_over = season_policy(date.today() - timedelta(days=1))
+    cache.store(URL, b"<table>final</table>", {}, season_over)
+    assert cache.is_fresh(cached_meta(cache), season_over)
+    # No TTL applies: confirmed a second after the season end is still fresh a year on
+    assert cache.is_fresh(dict(cached_meta(cache), validated_at=season_over.since + 1), season_over)
+
+
+def test_plain_immutable_policy_trusts_any_entry(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.store(URL, b"<table></table>", {}, ttl_policy(60))
+    meta = dict(cached_meta(cache), validated_at=0)
+    assert cache.is_fresh(meta, IMMUTABLE)
+
+
+def test_ttl_entries_expire(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.store(URL, b"<table></table>", {}, ttl_policy(60))
+    meta = cached_meta(cache)
+    assert cache.is_fresh(meta, ttl_policy(60))
+    assert not cache.is_fresh(dict(meta, validated_at=time.time() - 120), ttl_policy(60))
+
+
+def test_mark_validated_stores_new_validators(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.store(URL, b"<table></table>", {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}, ttl_policy(60))
+    cache.mark_validated(cached_meta(cache), ttl_policy(60), {"ETag": '"v2"'})
+    meta = cached_meta(cache)
+    assert meta["etag"] == '"v2"'
+    assert meta["last_modified"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+    assert cache.conditional_headers(meta)["If-None-Match"] == '"v2"'
@@ -0,0 +1,103 @@
+import pandas as pd
+
+from betting.lines import LineIndex
+from serving.streaming import RepredictionPipeline
+
+KICKOFF = "2099-01-01T20:00:00Z"
+
+
+def line(bookmaker, market_type, name, price, point=None, game_id="g1", commence_time=KICKOFF):
+    return {
+        "game_id": game_id, "commence_time": commence_time, "home_team": "Boston Celtics",
+        "away_team": "New York Knicks", "bookmaker": bookmaker, "market_type": market_type,
+        "name": name, "price": price, "point": point,
+    }
+
+
+def h2h_board(game_id="g1", commence_time=KICKOFF):
+    return [
+        line("DraftKings", "h2h", "Boston Celtics", 1.9, game_id=game_id, commence_time=commence_time),
+        line("DraftKings", "h2h", "New York Knicks", 2.0, game_id=game_id, commence_time=commence_time),
+        line("FanDuel", "h2h", "Boston Celtics", 2.2, game_id=game_id, commence_time=commence_time),
+        line("FanDuel", "h2h", "New York Knicks", 2.1, game_id=game_id, commence_time=commence_time),
+    ]
+
+
+def test_snapshot_drops_lines_a_book_pulled():
+    index = LineIndex()
+    index.apply(h2h_board())
+    assert index.best_line("g1", "h2h", "Boston Celtics").bookmaker == "FanDuel"
+    assert index.arbitrage("g1", "h2h") is not None
+
+    changed = index.apply_snapshot([record for record in h2h_board() if record["bookmaker"] != "FanDuel"])
+    assert changed == [("g1", "h2h")]
+    assert index.best_line("g1", "h2h", "Boston Celtics").bookmaker == "DraftKings"
+    assert index.consensus("g1", "h2h", "Boston Celtics").books == 1
+    assert index.book_lines("g1", "h2h", "New York Knicks") == {"DraftKings": (2.0, None)}
+    assert index.arbitrage("g1", "h2h") is None
+
+
+def test_snapshot_drops_a_pulled_market_and_leaves_other_games_alone():
+    index = LineIndex()
+    index.apply(h2h_board() + h2h_board("g2") + [line("DraftKings", "spreads", "Boston Celtics", 1.91, -3.5)])
+
+    index.apply_snapshot(h2h_board())
+    assert index.best_line("g1", "spreads", "Boston Celtics") is None
+    assert list(index.describe("g1")["markets"]) == ["h2h"]
+    assert index.best_line("g2", "h2h", "Boston Celtics").price == 2.2
+    assert len(index.to_frame()) == 8
+
+
+def test_started_games_are_removed():
+    index = LineIndex()
+    index.apply(h2h_board() + h2h_board("g2", "2099-01-02T01:00:00Z"))
+    assert index.remove_started(pd.Timestamp("2099-01-01T19:59:00Z")) == []
+    assert index.remove_started(pd.Timestamp("2099-01-01T20:00:00Z")) == ["g1"]
+    assert index.describe("g1") is None and index.arbitrage("g1", "h2h") is None
+    assert set(index.to_frame()["game_id"]) == {"g2"}
+
+
+def test_pipeline_drops_started_games_from_lines_and_board():
+    pipeline = RepredictionPipeline(lambda sports, spreads, totals: [0.0] * len(sports))
+    records = h2h_board() + [
+        line("DraftKings", "spreads", "Boston Celtics", 1.91, -3.5),
+        line("DraftKings", "totals", "Over", 1.91, 220.5),
+    ]
+    pipeline.submit("basketball_nba", records)
+    assert pipeline.board.inputs(["g1"])[0] == ["g1"]
+
+    assert pipeline.drop_started(pd.Timestamp("2099-01-01T21:00:00Z")) == ["g1"]
+    assert pipeline.lines.describe("g1") is None
+    assert pipeline.board.inputs(["g1"])[0] == []
+
+
+def test_pipeline_sync_applies_full_snapshots():
+    pipeline = RepredictionPipeline(lambda sports, spreads, totals: [0.0] * len(sports))
+    pipeline.submit("basketball_nba", pd.DataFrame(h2h_board()))
+    pipeline.sync("basketball_nba", pd.DataFrame(h2h_board()[:2]))
+    assert pipeline.lines.book_lines("g1", "h2h", "Boston Celtics") == {"DraftKings": (1.9, None)}
+
+
+def test_pipeline_sync_does_not_bring_back_games_in_play():
+    pipeline = RepredictionPipeline(lambda sports, spreads, totals: [0.0] * len(sports))
+    pipeline.sync("basketball_nba", h2h_board("live", "2000-01-01T00:00:00Z") + h2h_board())
+    assert pipeline.lines.describe("live") is None
+    assert pipeline.lines.describe("g1") is not None
+
+
+def test_pipeline_publishes_a_game_dropped_while_it_is_scored():
+    def predict_and_drop(sports, spreads, totals):
+        # The prune sweep removes the game between reading inputs and publishing
+        pipeline.drop_started(pd.Timestamp("2099-01-01T21:00:00Z"))
+        return [0.5] * len(sports)
+
+    pipeline = RepredictionPipeline(predict_and_drop)
+    pipeline.submit("basketball_nba", h2h_board() + [
+        line("DraftKings", "spreads", "Boston Celtics", 1.91, -3.5),
+        line("DraftKings", "totals", "Over", 1.91, 220.5),
+    ])
+    subscriber = pipeline.broadcaster.subscribe()
+    pipeline.score({"g1": 0.0})
+    message = subscriber.get_nowait()
+    assert message["game_id"] == "g1" and message["home_team"] == "Boston Celtics"
+    assert message["prediction"] == 0.5 and pipeline.board.inputs(["g1"])[0] == []
@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+
+from serving.registry import ModelRouter
+
+
+def write_weights(path, seed, inputs=5):
+    rng = np.random.default_rng(seed)
+    shapes = {"w1": (inputs, 4), "b1": (1, 4), "w2": (4, 3), "b2": (1, 3), "w3": (3, 1), "b3": (1, 1)}
+    np.save(path, {key: rng.normal(size=shape) for key, shape in shapes.items()})
+
+
+def test_per_sport_artifact_written_after_startup_is_served(tmp_path):
+    write_weights(tmp_path / "nn_weights.npy", seed=0)
+    router = ModelRouter(tmp_path, ("nba", "nfl")).load()
+    shared_version = router.registry("nba").active.version
+    assert router.registry("nba").filename == "nn_weights.npy"
+    assert not router.reload_if_changed()
+
+    write_weights(tmp_path / "nn_weights_nba.npy", seed=1)
+    assert router.reload_if_changed()
+    assert router.registry("nba").filename == "nn_weights_nba.npy"
+    assert router.registry("nba").active.version != shared_version
+    assert router.registry("nfl").filename == "nn_weights.npy"
+    assert router.registry("nfl").active.version == shared_version
+
+    # Removing the sport's own artifact falls back to the shared one
+    os.remove(tmp_path / "nn_weights_nba.npy")
+    assert router.reload_if_changed()
+    assert router.registry("nba").filename == "nn_weights.npy"
+    assert router.registry("nba") is router.registry("nfl")
+
+
+def test_invalid_per_sport_artifact_keeps_current_model(tmp_path):
+    write_weights(tmp_path / "nn_weights.npy", seed=0)
+    router = ModelRouter(tmp_path, ("nba",)).load()
+    (tmp_path / "nn_weights_nba.npy").write_bytes(b"half-written")
+
+    assert not router.reload_if_changed()
+    assert router.registry("nba").filename == "nn_weights.npy"
+
+    write_weights(tmp_path / "nn_weights_nba.npy", seed=1)
+    assert router.reload_if_changed()
+    assert router.registry("nba").filename == "nn_weights_nba.npy"
+
+
+def test_listeners_hear_about_a_sport_switching_file(tmp_path):
+    write_weights(tmp_path / "nn_weights.npy", seed=0)
+    router = ModelRouter(tmp_path, ("nba", "nfl"))
+    swaps = []
+    router.on_swap(lambda registry: swaps.append(registry.filename))
+    router.load()
+    swaps.clear()
+
+    write_weights(tmp_path / "nn_weights_nfl.npy", seed=2)
+    router.reload_if_changed()
+    assert "nn_weights_nfl.npy" in swaps
+
+
+def write_int8(tmp_path, float_name):
+    from models.quantize import calibrate, quantize_weights
+
+    weights = np.load(tmp_path / float_name, allow_pickle=True).item()
+    X = np.random.default_rng(0).normal(size=(32, weights["w1"].shape[0]))
+    np.save(tmp_path / float_name.replace(".npy", ".int8.npy"), quantize_weights(weights, calibrate(X, weights)))
+
+
+def age(path, seconds):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns - int(seconds * 1e9)))
+
+
+def test_int8_artifact_older_than_its_float_model_is_not_served(tmp_path):
+    write_weights(tmp_path / "nn_weights_nba.npy", seed=0)
+    age(tmp_path / "nn_weights_nba.npy", 60)
+    write_int8(tmp_path, "nn_weights_nba.npy")
+    router = ModelRouter(tmp_path, ("nba",), dtype="int8").load()
+    assert router.registry("nba").filename == "nn_weights_nba.int8.npy"
+
+    # Retrained: the float model is newer than its quantized copy
+    write_weights(tmp_path / "nn_weights_nba.npy", seed=1)
+    age(tmp_path / "nn_weights_nba.int8.npy", 60)
+    assert router.reload_if_changed()
+    assert router.registry("nba").filename == "nn_weights_nba.npy"
+
+    # Quantized again: back to int8
+    write_int8(tmp_path, "nn_weights_nba.npy")
+    assert router.reload_if_changed()
+    assert router.registry("nba").filename == "nn_weights_nba.int8.npy"
+    assert router.registry("nba").active.weights["w1"].dtype == np.int8
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from data_gathering import api_fetcher
+from data_gathering.fetch_engine import FetchEngine
+from data_gathering.odds_poller import DISTANT_INTERVAL, QUOTA_BACKOFF, RETRY_INTERVAL, OddsPoller, QuotaTracker, poll_interval
+from data_gathering.odds_store import OddsStore
+
+
+class MockOddsAPI:
+    """
+    Localhost stand-in for TheOddsAPI: every request gets `status`, the
+    JSON of `board` and `quota` as x-requests-* headers.
+    """
+
+    def __init__(self):
+        self.board = []
+        self.status = 200
+        self.quota = {"x-requests-remaining": "500", "x-requests-used": "0", "x-requests-last": "1"}
+        self.requests = []
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                api.requests.append(self.path)
+                body = json.dumps(api.board).encode()
+                self.send_response(api.status)
+                for name, value in api.quota.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def game(game_id, starts_in, home_price=1.9):
+    commence_time = pd.Timestamp.now(tz="UTC") + starts_in
+    return {
+        "id": game_id, "commence_time": commence_time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "home_team": "Boston Celtics", "away_team": "New York Knicks",
+        "bookmakers": [{"title": "DraftKings", "markets": [{"key": "h2h", "outcomes": [
+            {"name": "Boston Celtics", "price": home_price}, {"name": "New York Knicks", "price": 2.0},
+        ]}]}],
+    }
+
+
+@pytest.fixture
+def api(monkeypatch):
+    mock = MockOddsAPI()
+    mock.thread.start()
+    monkeypatch.setattr(api_fetcher, "ODDS_API_URL", mock.url)
+    yield mock
+    mock.httpd.shutdown()
+    mock.httpd.server_close()
+
+
+@pytest.fixture
+def poller(tmp_path):
+    changes = []
+    engine = FetchEngine(host_limits={}, headers={}, retries=0)
+    poller = OddsPoller(["basketball_nba"], markets=["h2h"], engine=engine, store=OddsStore(str(tmp_path)),
+                        on_changes=lambda sport, lines: changes.append(lines))
+    poller.changes = changes
+    yield poller
+    engine.close()
+
+
+def test_poll_interval_follows_the_next_game():
+    now = pd.Timestamp("2025-01-01T12:00:00Z")
+    at = lambda **offset: (now + pd.Timedelta(**offset)).isoformat()
+    assert poll_interval([at(minutes=10), at(days=2)], now) == 60
+    assert poll_interval([at(hours=2)], now) == 5 * 60
+    assert poll_interval([at(hours=12)], now) == 30 * 60
+    assert poll_interval([at(days=3)], now) == DISTANT_INTERVAL
+    # Games under way do not count
+    assert poll_interval([at(minutes=-30), at(hours=2)], now) == 5 * 60
+    assert poll_interval([], now) == DISTANT_INTERVAL
+
+
+def test_poll_schedule_and_change_detection(api, poller):
+    api.board = [game("g1", pd.Timedelta(minutes=20))]
+    assert asyncio.run(poller.poll_once("basketball_nba")) == 60
+    assert len(poller.changes) == 1 and len(poller.changes[0]) == 2
+
+    # Unchanged board: nothing is reported
+    assert asyncio.run(poller.poll_once("basketball_nba")) == 60
+    assert len(poller.changes) == 1
+
+    api.board = [game("g1", pd.Timedelta(minutes=20), home_price=1.8), game("g2", pd.Timedelta(hours=2))]
+    asyncio.run(poller.poll_once("basketball_nba"))
+    moved = poller.changes[-1]
+    assert len(moved) == 3
+    assert set(moved["game_id"]) == {"g1", "g2"}
+    assert moved.loc[moved["game_id"] == "g1", "price"].tolist() == [1.8]
+
+
+def test_quota_is_tracked_and_stretches_intervals(api, poller):
+    api.board = [game("g1", pd.Timedelta(hours=2))]
+    api.quota = {"x-requests-remaining": "10", "x-requests-used": "490", "x-requests-last": "1"}
+    assert asyncio.run(poller.poll_once("basketball_nba")) == 5 * 60 * QUOTA_BACKOFF
+    assert (poller.quota.remaining, poller.quota.used) == (10, 490)
+
+
+def test_failed_poll_without_quota_headers_keeps_the_last_quota(api, poller):
+    api.board = [game("g1", pd.Timedelta(hours=2))]
+    asyncio.run(poller.poll_once("basketball_nba"))
+    api.status, api.quota = 502, {}
+    assert asyncio.run(poller.poll_once("basketball_nba")) == RETRY_INTERVAL
+    assert (poller.quota.remaining, poller.quota.used) == (500, 0)
+
+
+def test_poller_stops_when_the_quota_runs_out(api, poller):
+    api.board = [game("g1", pd.Timedelta(minutes=20))]
+    api.quota = {"x-requests-remaining": "0", "x-requests-used": "500", "x-requests-last": "1"}
+    asyncio.run(asyncio.wait_for(poller.run(max_polls=5), timeout=10))
+    assert poller.polls["basketball_nba"] == 1
+    assert len(api.requests) == 1
+
+
+def test_quota_tracker_keeps_values_missing_from_the_headers():
+    quota = QuotaTracker()
+    quota.update({"x-requests-remaining": "3", "x-requests-used": "497", "x-requests-last": "2"})
+    quota.update({"x-requests-used": "499"})
+    assert (quota.remaining, quota.used, quota.last_cost) == (3, 499, 2)
+    assert quota.exhausted is False
+    quota.update({"x-requests-remaining": "1"})
+    assert quota.exhausted is True
+
+
+def test_full_board_is_passed_to_on_snapshot(api, poller):
+    snapshots = []
+    poller.on_snapshot = lambda sport, snapshot: snapshots.append(snapshot)
+    api.board = [game("g1", pd.Timedelta(minutes=20))]
+    asyncio.run(poller.poll_once("basketball_nba"))
+    asyncio.run(poller.poll_once("basketball_nba"))
+    assert [len(snapshot) for snapshot in snapshots] == [2, 2]
+    assert len(poller.changes) == 1
@@ -0,0 +1,66 @@
+import glob
+import os
+
+import pandas as pd
+
+from data_gathering import odds_store
+from data_gathering.api_fetcher import ingest_odds
+from data_gathering.odds_poller import OddsPoller
+from data_gathering.odds_store import OddsStore, get_default_store, odds_frame
+
+SPORT = "basketball_nba"
+NOW = pd.Timestamp("2025-01-01T12:00:00Z")
+
+
+def board(*games):
+    """
+    Snapshot with one h2h line per team for each (game id, commence_time, home price).
+    """
+    rows = []
+    for game_id, commence_time, price in games:
+        for name, line_price in (("Home", price), ("Away", 2.0)):
+            rows.append({"game_id": game_id, "commence_time": commence_time, "home_team": "Home",
+                         "away_team": "Away", "bookmaker": "DraftKings", "market_type": "h2h",
+                         "name": name, "price": line_price, "point": None})
+    return odds_frame({key: [row[key] for row in rows] for key in rows[0]})
+
+
+def snapshot_files(root):
+    return glob.glob(os.path.join(root, f"sport={SPORT}", "date=*", "*.parquet"))
+
+
+def test_only_changed_lines_are_written(tmp_path):
+    store = OddsStore(str(tmp_path))
+    assert len(store.append_snapshot(SPORT, board(("g1", "2025-01-01T20:00:00Z", 1.9)), NOW)) == 2
+    assert store.append_snapshot(SPORT, board(("g1", "2025-01-01T20:00:00Z", 1.9)), NOW).empty
+    moved = store.append_snapshot(SPORT, board(("g1", "2025-01-01T20:00:00Z", 1.8)), NOW + pd.Timedelta(minutes=1))
+    assert moved["price"].tolist() == [1.8]
+    assert len(snapshot_files(tmp_path)) == 2
+    assert len(store.load_history(SPORT)) == 3
+
+
+def test_started_games_are_pruned_from_latest(tmp_path):
+    store = OddsStore(str(tmp_path))
+    store.append_snapshot(SPORT, board(("g1", "2025-01-01T13:00:00Z", 1.9), ("g2", "2025-01-02T01:00:00Z", 1.9)), NOW)
+
+    # g1 is in play: its lines are neither stored nor kept, even without other changes
+    in_play = board(("g1", "2025-01-01T13:00:00Z", 1.5), ("g2", "2025-01-02T01:00:00Z", 1.9))
+    assert store.append_snapshot(SPORT, in_play, NOW + pd.Timedelta(hours=2)).empty
+    assert set(store.latest_lines(SPORT)["game_id"]) == {"g2"}
+    assert set(OddsStore(str(tmp_path)).latest_lines(SPORT)["game_id"]) == {"g2"}
+    assert len(snapshot_files(tmp_path)) == 1
+
+
+def test_one_store_per_process(tmp_path, monkeypatch):
+    monkeypatch.setattr(odds_store, "_default_store", OddsStore(str(tmp_path)))
+    store = get_default_store()
+    assert get_default_store() is store
+    assert OddsPoller([SPORT]).store is store
+
+    game = {"id": "g1", "commence_time": "2099-01-01T20:00:00Z", "home_team": "Home", "away_team": "Away",
+            "bookmakers": [{"title": "DraftKings", "markets": [{"key": "h2h", "outcomes": [
+                {"name": "Home", "price": 1.9}, {"name": "Away", "price": 2.0}]}]}]}
+    _, changes = ingest_odds(SPORT, [game], write_csv=False)
+    assert len(changes) == 2
+    assert len(store.latest_lines(SPORT)) == 2
+    assert ingest_odds(SPORT, [game], write_csv=False)[1].empty
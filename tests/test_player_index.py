@@ -0,0 +1,72 @@
+import pandas as pd
+
+from player_index import PlayerIndex, injury_impact, resolve_injuries
+
+STATS = pd.DataFrame(
+    [
+        # Traded mid-season: combined row first, then one row per team in trade order
+        ("Dennis Schröder", "2TM", "PG", 2025, 1000, 200, 400),
+        ("Dennis Schröder", "BKN", "PG", 2025, 700, 150, 300),
+        ("Dennis Schröder", "GSW", "PG", 2025, 300, 50, 100),
+        ("Stephen Curry", "GSW", "PG", 2025, 1700, 300, 450),
+        ("Cam Thomas", "BKN", "SG", 2025, 800, 100, 150),
+    ],
+    columns=["Player", "Team", "Pos", "Year", "PTS", "TRB", "AST"],
+)
+
+
+def impact_for(injuries):
+    index = PlayerIndex("nba")
+    stats = STATS.assign(player_id=index.add_players(STATS))
+    return injury_impact(resolve_injuries(injuries, index), stats, "nba").set_index("Team")
+
+
+def test_traded_player_counts_only_for_the_latest_team():
+    impact = impact_for(pd.DataFrame({"NAME": ["Dennis Schroder"], "TEAM": [None], "STATUS": ["Out"]}))
+    assert list(impact.index) == ["GSW"]
+    assert impact.at["GSW", "injured_PTS"] == 300
+    assert impact.at["GSW", "injured_PTS_share"] == 300 / 2000
+
+
+def test_shares_stay_within_the_team_total():
+    injuries = pd.DataFrame({
+        "NAME": ["Dennis Schröder", "Stephen Curry", "Cam Thomas"], "TEAM": [None] * 3, "STATUS": ["Out"] * 3,
+    })
+    impact = impact_for(injuries)
+    shares = impact[[f"injured_{m}_share" for m in ("PTS", "TRB", "AST")]]
+    assert (shares <= 1).all().all()
+    assert impact.at["GSW", "injured_PTS_share"] == 1.0
+    assert impact.at["BKN", "injured_PTS"] == 800
+
+
+FAMILY = pd.DataFrame(
+    [
+        ("Tim Hardaway", "MIA", "PG", 1999, 1300, 200, 500),
+        ("Tim Hardaway Jr.", "DAL", "SG", 2024, 1100, 230, 130),
+        ("Luka Dončić", "DAL", "PG", 2024, 2300, 650, 700),
+    ],
+    columns=["Player", "Team", "Pos", "Year", "PTS", "TRB", "AST"],
+)
+
+
+def test_father_and_son_are_different_players():
+    index = PlayerIndex("nba")
+    ids = index.add_players(FAMILY)
+    assert ids[0] != ids[1]
+    assert index.resolve_one("Tim Hardaway Jr.")[0] == ids[1]
+    assert index.resolve_one("Tim Hardaway")[0] == ids[0]
+    # A report without the suffix still finds the son on his team
+    assert index.resolve_one("Tim Hardaway", team="DAL")[:2] == (ids[1], "fuzzy")
+    assert index.resolve_one("Tim Hardaway Jr", team="MIA")[0] is None
+
+
+def test_injury_to_the_son_is_not_attached_to_the_father(tmp_path, monkeypatch):
+    import cleaner
+
+    monkeypatch.setattr(cleaner, "OUTPUT_DIR", str(tmp_path))
+    injuries = pd.DataFrame({"NAME": ["Tim Hardaway Jr."], "POS": ["SG"], "STATUS": ["Out"]})
+    cleaner.merge_player_data(FAMILY, injuries, "nba")
+    player_data = pd.read_csv(tmp_path / "nba_player_data.csv")
+    status = player_data.set_index("player_id")["STATUS"]
+    assert status["tim hardaway jr"] == "Out"
+    assert status.isna()["tim hardaway"]
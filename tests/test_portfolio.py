@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from betting.portfolio import (
+    allocate, cap_exposure, evaluate_slate, fair_probabilities, group_codes, kelly_fractions,
+)
+
+ODDS_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "raw", "basketball_nba_odds.csv")
+
+
+def test_fair_probabilities_remove_the_vig_per_market():
+    price = np.array([1.9, 1.9, 1.5, 3.0, 2.5])
+    implied, fair = fair_probabilities(price, np.array([0, 0, 1, 1, 2]))
+    np.testing.assert_allclose(implied, 1 / price)
+    np.testing.assert_allclose(fair, [0.5, 0.5, (1 / 1.5) / (1 / 1.5 + 1 / 3), (1 / 3) / (1 / 1.5 + 1 / 3), 1.0])
+
+
+def test_kelly_fractions():
+    # Full Kelly at p=0.55, even money is 0.1 of the bankroll
+    stakes = kelly_fractions(np.array([0.55, 0.45, np.nan, 0.4]), np.array([2.0, 2.0, 2.0, 3.0]), fraction=0.25)
+    np.testing.assert_allclose(stakes, [0.025, 0.0, 0.0, 0.25 * 0.2 / 2.0])
+
+
+def test_cap_exposure_scales_groups_proportionally():
+    stakes = cap_exposure(np.array([0.02, 0.01, 0.01, 0.005]), np.array([0, 0, 1, 1]), cap=0.015)
+    np.testing.assert_allclose(stakes, [0.01, 0.005, 0.01, 0.005])
+
+
+def test_allocate_applies_bet_game_group_and_total_caps():
+    probability, price = np.full(4, 0.6), np.full(4, 2.0)  # Kelly 0.25 * 0.2 = 0.05 each
+    stakes = allocate(probability, price, game=np.array([0, 0, 1, 2]), group=np.array([0, 0, 0, 1]),
+                      max_bet=0.02, max_game_exposure=0.03, max_group_exposure=0.04, max_total_exposure=1.0)
+    # Bet cap 0.02 each; game 0 -> 0.015 each; group 0 (0.05) -> scaled to 0.04
+    np.testing.assert_allclose(stakes, [0.012, 0.012, 0.016, 0.02])
+
+    stakes = allocate(probability, price, game=np.arange(4), max_bet=0.02, max_total_exposure=0.04)
+    np.testing.assert_allclose(stakes, np.full(4, 0.01))
+
+
+def test_group_codes_give_unlabeled_games_their_own_group():
+    np.testing.assert_array_equal(group_codes(pd.Series(["a", None, "b", np.nan, "a"])), [0, 2, 1, 3, 0])
+    np.testing.assert_array_equal(group_codes(pd.Series([None, None])), [0, 1])
+
+
+def slate(n_games):
+    lines, predictions = [], []
+    for i in range(n_games):
+        home, away = f"Home {i}", f"Away {i}"
+        lines += [(home, away, "Book", "h2h", home, 2.0, None), (home, away, "Book", "h2h", away, 2.0, None)]
+        predictions.append((home, away, 6.0))
+    lines = pd.DataFrame(lines, columns=["home_team", "away_team", "bookmaker", "market_type", "name", "price", "point"])
+    return lines, pd.DataFrame(predictions, columns=["home_team", "away_team", "margin"])
+
+
+def test_evaluate_slate_with_missing_group_labels():
+    lines, predictions = slate(3)
+    ungrouped = evaluate_slate(lines, predictions, max_bet=0.05, max_game_exposure=0.05, max_group_exposure=0.05)
+    result = evaluate_slate(lines, predictions.assign(group=["a", None, None]), max_bet=0.05,
+                            max_game_exposure=0.05, max_group_exposure=0.05)
+    # Each game is alone in its group, so the group cap changes nothing
+    np.testing.assert_allclose(result["stake"], ungrouped["stake"])
+    assert (result["stake"] > 0).sum() == 3
+
+    # Two games sharing a label share the cap
+    shared = evaluate_slate(lines, predictions.assign(group=["a", "a", None]), max_bet=0.05,
+                            max_game_exposure=0.05, max_group_exposure=0.05)
+    stakes = shared.groupby("home_team")["stake"].sum()
+    assert stakes["Home 0"] + stakes["Home 1"] == pytest.approx(0.05)
+    assert stakes["Home 2"] == pytest.approx(ungrouped.groupby("home_team")["stake"].sum()["Home 2"])
+
+
+def test_evaluate_slate_on_the_saved_board_with_partial_groups():
+    lines = pd.read_csv(ODDS_PATH)
+    games = lines[["home_team", "away_team"]].drop_duplicates().reset_index(drop=True)
+    games["margin"] = 5.0
+    games["group"] = np.where(np.arange(len(games)) % 2 == 0, "early", None)
+    result = evaluate_slate(lines, games)
+    assert len(result) and np.isfinite(result["stake"]).all()
+    np.testing.assert_allclose(result.groupby(["home_team", "away_team", "bookmaker", "market_type"])["fair_prob"].sum(), 1.0)
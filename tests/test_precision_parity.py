@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from train_nn import precision_parity
+
+
+@pytest.fixture
+def matrix():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 10))
+    y = (X @ rng.normal(size=10) + rng.normal(scale=0.5, size=300)).reshape(-1, 1)
+    return X[:240], y[:240], X[240:], y[240:]
+
+
+@pytest.mark.parametrize("precision", ["float32", "mixed"])
+def test_reduced_precision_matches_float64(matrix, precision):
+    report = precision_parity(*matrix, precision, epochs=50)
+    assert report[f"{precision}_val_loss"] == pytest.approx(report["float64_val_loss"], rel=1e-4)
+    assert report["max_abs_prediction_diff"] < 1e-5
+    assert report["max_relative_prediction_diff"] < 1e-2
+
+
+def test_float64_parity_is_exact(matrix):
+    report = precision_parity(*matrix, "float64", epochs=10)
+    assert report["max_abs_prediction_diff"] == 0.0
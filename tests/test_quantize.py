@@ -0,0 +1,50 @@
+import numpy as np
+
+from quantize import calibrate, quantize_weights
+from serving.ensemble import member_predictions
+from serving.quantized import is_quantized, quantized_forward, validate_scales
+
+
+def network(n_features, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "w1": rng.normal(scale=0.3, size=(n_features, 16)), "b1": rng.normal(size=(1, 16)),
+        "w2": rng.normal(scale=0.5, size=(16, 8)), "b2": rng.normal(size=(1, 8)),
+        "w3": rng.normal(size=(8, 1)), "b3": rng.normal(size=(1, 1)),
+    }
+
+
+def matrix(rows, seed):
+    # Numeric columns plus a one-hot block, like the encoded splits
+    rng = np.random.default_rng(seed)
+    return np.column_stack([rng.normal(size=(rows, 6)), np.eye(4)[rng.integers(0, 4, rows)]])
+
+
+def test_int8_forward_stays_close_to_float64():
+    weights = network(10)
+    quantized = quantize_weights(weights, calibrate(matrix(500, 1), weights))
+    assert is_quantized(quantized)
+    validate_scales(quantized)
+
+    X = matrix(200, 2)
+    reference = member_predictions(X, weights).T
+    predictions = quantized_forward(X.astype(np.float32), quantized)
+    assert predictions.shape == (200, 1) and predictions.dtype == np.float32
+    # Error stays a small fraction of the spread of the predictions
+    diff = np.abs(predictions - reference)
+    assert diff.max() < 0.15 * reference.std()
+    assert diff.mean() < 0.05 * reference.std()
+    assert np.corrcoef(predictions[:, 0], reference[:, 0])[0, 1] > 0.995
+
+
+def test_one_hot_columns_missing_from_calibration_round_trip():
+    weights = network(10)
+    calibration = matrix(500, 1)
+    calibration[:, 9] = 0  # Category never seen while calibrating
+    scales = calibrate(calibration, weights)
+    np.testing.assert_allclose(scales["x1_scale"][0, 9], 1 / 127)
+
+    X = np.zeros((1, 10))
+    X[0, 9] = 1
+    reference = member_predictions(X, weights).T
+    np.testing.assert_allclose(quantized_forward(X, quantize_weights(weights, scales)), reference, atol=0.05)
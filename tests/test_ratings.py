@@ -0,0 +1,92 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ratings
+from ratings import (
+    EngineCache, RATING_FEATURES, add_rating_features, add_result, load_engine, load_rating_games, update_ratings,
+)
+
+
+def test_engine_cache_reloads_when_the_state_file_changes(tmp_path):
+    cache = EngineCache(["nba"], ratings_dir=str(tmp_path))
+    served = cache.get("nba")
+    assert served.games == 0
+    assert cache.get("nfl") is None
+
+    # Another process rates a game and saves the state
+    writer = load_engine("nba", str(tmp_path))
+    add_result(writer, "2025-01-01", "Boston Celtics", "New York Knicks", 120, 100, ratings_dir=str(tmp_path))
+    reloaded = cache.get("nba")
+    assert reloaded is not served and reloaded.games == 1
+    assert reloaded.rating("Boston Celtics") > reloaded.rating("New York Knicks")
+    assert cache.get("nba") is reloaded
+
+    state_path = ratings.state_path("nba", str(tmp_path))
+    with open(state_path, "w") as f:
+        f.write("{")  # Broken state keeps the last good engine
+    os.utime(state_path, ns=(1, 1))
+    assert cache.get("nba") is reloaded
+
+
+def test_rating_games_are_reused_across_calls(tmp_path, monkeypatch):
+    engine = load_engine("nba", str(tmp_path))
+    add_result(engine, "2025-01-01", "Boston Celtics", "New York Knicks", 120, 100, ratings_dir=str(tmp_path))
+    games = load_rating_games("nba", str(tmp_path))
+    assert load_rating_games("nfl", str(tmp_path)) is None
+
+    def no_reads(*args, **kwargs):
+        raise AssertionError("rating games were read again")
+
+    monkeypatch.setattr(ratings.pd, "read_csv", no_reads)
+    monkeypatch.setattr(ratings, "load_engine", no_reads)
+    team_data = pd.DataFrame({
+        "date": ["2025-01-01", "2025-01-03"], "season": [2025, 2025],
+        "home": ["Boston Celtics", "New York Knicks"], "away": ["New York Knicks", "Boston Celtics"],
+    })
+    rated = add_rating_features(team_data, "nba", str(tmp_path), games=games, engine=engine)
+    assert rated[RATING_FEATURES].notna().all().all()
+    # The unplayed game gets the current ratings
+    assert rated.at[1, "home_elo"] == engine.rating("New York Knicks")
+
+
+def results_frame():
+    # Two games a day over two seasons, in the raw nba layout
+    rng = np.random.default_rng(0)
+    teams = ["bos", "ny", "lal", "gs"]
+    rows = []
+    for day, date in enumerate(pd.date_range("2023-03-01", periods=10).append(pd.date_range("2023-10-24", periods=10))):
+        season = 2023 if day < 10 else 2024
+        home, away, *rest = rng.permutation(teams)
+        for pair in ((home, away), tuple(rest)):
+            rows.append((season, date.strftime("%Y-%m-%d"), pair[1], pair[0], *rng.integers(85, 130, 2)))
+    return pd.DataFrame(rows, columns=["season", "date", "away", "home", "score_away", "score_home"])
+
+
+def test_incremental_ratings_match_a_rebuild(tmp_path, monkeypatch):
+    monkeypatch.setattr(ratings, "RAW_DIR", str(tmp_path))
+    raw_path = tmp_path / ratings.SOURCES["nba"].file
+    results = results_frame()
+    incremental, rebuilt = str(tmp_path / "incremental"), str(tmp_path / "rebuilt")
+
+    # First season from the results file, then one game at a time, then the rest from the file
+    results.iloc[:20].to_csv(raw_path, index=False)
+    update_ratings("nba", ratings_dir=incremental)
+    engine = load_engine("nba", incremental)
+    for game in results.iloc[20:25].itertuples():
+        add_result(engine, game.date, game.home, game.away, game.score_home, game.score_away, game.season,
+                   ratings_dir=incremental)
+    assert add_result(engine, game.date, game.home, game.away, game.score_home, game.score_away, game.season,
+                      ratings_dir=incremental) is None
+    results.to_csv(raw_path, index=False)
+    assert len(update_ratings("nba", ratings_dir=incremental)) == len(results) - 25
+    assert len(update_ratings("nba", ratings_dir=incremental)) == 0
+
+    update_ratings("nba", rebuild=True, ratings_dir=rebuilt)
+    expected, actual = load_engine("nba", rebuilt), load_engine("nba", incremental)
+    assert actual.games == expected.games == len(results)
+    assert actual.ratings == pytest.approx(expected.ratings, rel=1e-12)
+    assert actual.seasons == expected.seasons
+    pd.testing.assert_frame_equal(load_rating_games("nba", incremental), load_rating_games("nba", rebuilt))
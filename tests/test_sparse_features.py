@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from sparse_features import OneHotLayout
+
+TRAIN = pd.DataFrame({
+    "spread": [-3.5, 2.0, 7.5, -1.0, 4.0, 0.5],
+    "home": ["BOS", "NYK", "BOS", "LAL", "NYK", None],
+    "total": [220.5, 210.0, 231.5, 205.0, 215.5, 224.0],
+    "surface": ["grass", "turf", "turf", "grass", "turf", "grass"],
+})
+
+
+def dummies(df):
+    return pd.get_dummies(df, drop_first=True, dtype=np.float64)
+
+
+def test_matrix_matches_get_dummies():
+    layout = OneHotLayout.fit(TRAIN)
+    X = layout.transform(TRAIN)
+    expected = dummies(TRAIN)
+    assert layout.feature_names == list(expected.columns)
+    assert X.shape == expected.shape
+    np.testing.assert_array_equal(X.toarray(), expected.to_numpy())
+
+    rng = np.random.default_rng(0)
+    w = rng.normal(size=(X.shape[1], 3))
+    dz = rng.normal(size=(len(TRAIN), 3))
+    np.testing.assert_allclose(X.dot(w), expected.to_numpy() @ w)
+    np.testing.assert_allclose(X.gradient(dz), expected.to_numpy().T @ dz)
+
+
+def test_take_restricts_rows():
+    X = OneHotLayout.fit(TRAIN).transform(TRAIN)
+    rows = np.array([5, 0, 0, 3])
+    sample = X.take(rows)
+    dense = X.toarray()[rows]
+    np.testing.assert_array_equal(sample.toarray(), dense)
+
+    rng = np.random.default_rng(1)
+    w = rng.normal(size=(X.shape[1], 2))
+    dz = rng.normal(size=(len(rows), 2))
+    np.testing.assert_allclose(sample.dot(w), dense @ w)
+    np.testing.assert_allclose(sample.gradient(dz), dense.T @ dz)
+
+
+def test_unseen_categories_map_to_the_baseline():
+    layout = OneHotLayout.fit(TRAIN)
+    test = pd.DataFrame({
+        "spread": [1.0, -2.0, 3.0],
+        "home": ["MIA", "NYK", "BOS"],
+        "total": [200.0, 210.0, 220.0],
+        "surface": ["dome", "turf", "grass"],
+    })
+    X = layout.transform(test)
+    # get_dummies on the combined frame, keeping only the train columns,
+    # is what the test split looks like in the train layout
+    expected = dummies(pd.concat([TRAIN, test], ignore_index=True))[layout.feature_names].iloc[len(TRAIN):]
+    assert X.shape == (len(test), len(layout.feature_names))
+    np.testing.assert_array_equal(X.toarray(), expected.to_numpy())
+
+    w = np.random.default_rng(2).normal(size=(X.shape[1], 2))
+    np.testing.assert_allclose(X.dot(w), expected.to_numpy() @ w)
@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_gathering.table_extractor import extract_table
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+def test_regular_table_skips_repeated_headers_and_types_columns():
+    table = extract_table(fixture("regular_table.html"), table_id="totals_stats")
+    assert list(table.columns) == ["Rk", "Player", "Team", "G", "PTS"]
+    assert table["Player"].tolist() == ["Luka Dončić", "Jalen Brunson", "Nikola Jokić"]
+    assert pd.api.types.is_numeric_dtype(table["G"])
+    assert table["G"].tolist() == [70, 77, 79]
+    assert np.isnan(table.loc[1, "PTS"])
+
+
+def test_table_found_by_class():
+    table = extract_table(fixture("regular_table.html"), css_class="Table")
+    assert list(table.columns) == ["NAME", "POS", "STATUS"]
+    assert table["STATUS"].tolist() == ["Out", "Day-To-Day"]
+
+
+def test_commented_out_table():
+    table = extract_table(fixture("commented_table.html"), table_id="passing")
+    assert list(table.columns) == ["Player", "Tm", "Cmp", "Yds"]
+    assert table["Yds"].tolist() == [4183, 4306]
+
+
+def test_missing_table_is_none():
+    assert extract_table(fixture("regular_table.html"), table_id="passing") is None
+    assert extract_table(fixture("commented_table.html"), table_id="rushing") is None
+
+
+def test_duplicate_header_names_are_numbered():
+    table = extract_table(fixture("duplicate_headers.html"), table_id="rushing_and_receiving")
+    assert list(table.columns) == ["Player", "Yds", "TD", "Yds.1", "TD.1"]
+    assert table.loc[0, "Yds"] == 1459 and table.loc[0, "Yds.1"] == 564
+
+
+def test_colspan_cells_fill_every_spanned_column():
+    table = extract_table(fixture("colspan_header.html"), table_id="totals_stats")
+    assert list(table.columns) == ["Player", "Team", "Team.1", "G", "PTS"]
+    assert table.loc[0, "Team.1"] == "Golden State"
+    # 'Did Not Play' spans G and PTS, which then stay text like in `pd.read_html`
+    assert table["G"].tolist() == ["74", "75", "Did Not Play"]
+    assert table["PTS"].tolist() == ["1956", "2031", "Did Not Play"]